@@ -1,3 +1,23 @@
 __version__ = '0.0.1'
 
-from .inverter_model import Inverter
\ No newline at end of file
+# The OpenMDAO wrappers are only imported on first access (PEP 562), so that
+# importing the package, or its NumPy physics core (physics,
+# inductor_core_materials, material_registry, mosfet_devices, pwm), does not
+# pay for importing OpenMDAO
+_lazy_attributes = {'Inverter': 'inverter_model',
+                    'evaluate_inverter': 'physics'}
+
+
+def __getattr__(name):
+    module = _lazy_attributes.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_attributes))
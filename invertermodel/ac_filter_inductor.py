@@ -2,34 +2,56 @@ import numpy as np
 
 import openmdao.api as om
 
+from .electrothermal import TemperatureDependence
+from .eval_cache import EvaluationCache, cached_compute, cached_compute_partials
 from .inductor_core_materials import FE4491
+from .physics import ac_filter_inductor
 
 
 class ACFilterInductor(om.ExplicitComponent):
     def initialize(self):
         self.options.declare('core_material', default=FE4491,
                              desc='Dataclass that defines inductor core materials')
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("use_cs", default=False, types=bool,
+                             desc="Compute partials with complex step instead of analytically")
+        self.options.declare("cache", default=None, types=EvaluationCache, allow_none=True,
+                             desc="Cache of the outputs and partials, keyed on the inputs")
+        self.options.declare("thermal", default=False, types=bool,
+                             desc="Add the winding temperature dependence of the resistivity and the "
+                                  "losses of a single inductor, coupling the losses to a thermal network")
 
     def setup(self):
-        self.add_input("I_phase_rms", units='A',
+        nn = self.options['num_nodes']
+        ar = np.arange(nn)
+        thermal = self.options['thermal']
+
+        # Annealed copper
+        self._temperature = TemperatureDependence('resistivity', 'T_windings', 20.0, 3.93e-3) \
+            if thermal else None
+
+        self.add_input("I_phase_rms", shape=nn, units='A',
                        desc="The motor phase RMS current")
-        self.add_input("electrical_frequency", units='Hz',
+        self.add_input("electrical_frequency", shape=nn, units='Hz',
                        desc="The inverter’s output electrical frequency")
-        self.add_input("resistivity", units='ohm*m',
-                       desc="Resistivity of the conductor wire")
-        self.add_input("wire_density", units='kg/m**3',
+        self.add_input("resistivity", shape=nn, units='ohm*m',
+                       desc="Resistivity of the conductor wire" + (" at 20 degC" if thermal else ""))
+        if thermal:
+            self._temperature.add_inputs(self, desc="Temperature of the inductor windings")
+        self.add_input("wire_density", shape=nn, units='kg/m**3',
                        desc="The density of the conductor wire")
 
-        self.add_input("n_turns", units='unitless',
+        self.add_input("n_turns", shape=nn, units='unitless',
                        desc="Number of wire turns wrapping the inductor core")
-        self.add_input("r_wire", units='m',
+        self.add_input("r_wire", shape=nn, units='m',
                        desc="The radius of the wire that wraps the inductor core")
 
-        self.add_input("R_core", units='m',
+        self.add_input("R_core", shape=nn, units='m',
                        desc="The major radius of the toroidal inductor core")
-        self.add_input("r_core", units='m',
+        self.add_input("r_core", shape=nn, units='m',
                        desc="The minor radius of the toroidal inductor core")
-        self.add_input("mu_r", units='H/m',
+        self.add_input("mu_r", shape=nn, units='H/m',
                        desc="The relative permeability of the inductor core material")
         # self.add_input("core_density", units='kg/m**3',
         #                desc="The density of the inductor core material")
@@ -37,33 +59,102 @@ class ACFilterInductor(om.ExplicitComponent):
         self.add_discrete_input(
             "n_phases", val=3, desc="The number of inverter phases")
 
-        self.add_output("max_flux_density", units='T',
+        self.add_output("max_flux_density", shape=nn, units='T',
                         desc="The maximum flux density in the inductor core")
-        self.add_output("radius_difference", units='m',
+        self.add_output("radius_difference", shape=nn, units='m',
                         desc='The difference between the toroid\'s major and minor radii, used to ensure a valid shape')
-        self.add_output("fill_factor", units='unitless',
+        self.add_output("fill_factor", shape=nn, units='unitless',
                         desc="The inductor winding fill factor")
-        self.add_output("inductance", units='H',
+        self.add_output("inductance", shape=nn, units='H',
                         desc="The inductance value of the toroidal inductor")
-        self.add_output("mass", units='kg',
+        self.add_output("mass", shape=nn, units='kg',
                         desc="The toroidal inductor's total mass")
-        self.add_output("P_loss_core", units='W',
+        self.add_output("P_loss_core", shape=nn, units='W',
                         desc="Losses in the inductor due to core loss effects")
-        self.add_output("P_loss_copper", units='W',
+        self.add_output("P_loss_copper", shape=nn, units='W',
                         desc="Losses in the inductor due to resistive effects")
-        self.add_output("P_loss", units='W',
+        self.add_output("P_loss", shape=nn, units='W',
                         desc="Losses in the inductor due to resistive and core loss effects")
+        if thermal:
+            self.add_output("P_loss_core_phase", shape=nn, units='W',
+                            desc="The core losses in a single inductor")
+            self.add_output("P_loss_copper_phase", shape=nn, units='W',
+                            desc="The copper losses in a single inductor")
 
-        self.declare_partials('*', '*', method='cs')
+        if self.options['use_cs']:
+            self.declare_partials('*', '*', rows=ar, cols=ar, method='cs')
+        else:
+            self.declare_partials('radius_difference', 'R_core',
+                                  rows=ar, cols=ar, val=1.0)
+            self.declare_partials('radius_difference', 'r_core',
+                                  rows=ar, cols=ar, val=-1.0)
+            self.declare_partials(
+                'fill_factor', ['n_turns', 'r_wire', 'R_core', 'r_core'], rows=ar, cols=ar)
+            self.declare_partials(
+                'inductance', ['n_turns', 'R_core', 'r_core', 'mu_r'], rows=ar, cols=ar)
+            self.declare_partials(
+                'mass', ['wire_density', 'n_turns', 'r_wire', 'R_core', 'r_core'], rows=ar, cols=ar)
+            self.declare_partials(
+                'max_flux_density', ['I_phase_rms', 'n_turns', 'R_core', 'mu_r'], rows=ar, cols=ar)
+            self.declare_partials(
+                'P_loss_core', ['I_phase_rms', 'electrical_frequency', 'n_turns', 'R_core', 'r_core', 'mu_r'], rows=ar, cols=ar)
+            self.declare_partials(
+                'P_loss_copper', ['I_phase_rms', 'resistivity', 'n_turns', 'r_wire', 'r_core'], rows=ar, cols=ar)
+            self.declare_partials(
+                'P_loss', ['I_phase_rms', 'electrical_frequency', 'resistivity', 'n_turns', 'r_wire', 'R_core', 'r_core', 'mu_r'], rows=ar, cols=ar)
+            if thermal:
+                self._temperature.declare_partials(self, ['P_loss_copper', 'P_loss'])
+                self.declare_partials('P_loss_core_phase', self._core_loss_inputs,
+                                      rows=ar, cols=ar)
+                self.declare_partials('P_loss_copper_phase', self._copper_loss_inputs,
+                                      rows=ar, cols=ar)
 
-        # self.declare_partials(
-        #     'fill_factor', ['n_turns', 'r_wire', 'R_core', 'r_core'], method='cs')
-        # self.declare_partials(
-        #     'inductance', ['n_turns', 'R_core', 'r_core', 'mu'], method='cs')
-        # self.declare_partials(
-        #     'P_loss', ['I_phase_rms', 'resistivity', 'n_turns', 'r_wire', 'r_core'], method='cs')
+    _core_loss_inputs = ['I_phase_rms', 'electrical_frequency', 'n_turns', 'R_core', 'r_core', 'mu_r']
+    _copper_loss_inputs = ['I_phase_rms', 'resistivity', 'T_windings', 'resistivity_tempco',
+                           'n_turns', 'r_wire', 'r_core']
 
+    @cached_compute
     def compute(self, inputs, outputs, discrete_inputs, discrete_outputs):
+        if self._temperature is not None:
+            inputs = self._temperature.scaled(inputs)
+
+        for name, value in ac_filter_inductor(inputs['I_phase_rms'],
+                                              inputs['electrical_frequency'],
+                                              inputs['resistivity'],
+                                              inputs['wire_density'],
+                                              inputs['n_turns'],
+                                              inputs['r_wire'],
+                                              inputs['R_core'],
+                                              inputs['r_core'],
+                                              inputs['mu_r'],
+                                              core_material=self.options['core_material'],
+                                              n_phases=discrete_inputs['n_phases']).items():
+            outputs[name] = value
+
+        if self._temperature is not None:
+            n_phases = discrete_inputs['n_phases']
+            outputs['P_loss_core_phase'] = outputs['P_loss_core'] / n_phases
+            outputs['P_loss_copper_phase'] = outputs['P_loss_copper'] / n_phases
+
+    @cached_compute_partials
+    def compute_partials(self, inputs, partials, discrete_inputs, discrete_outputs=None):
+        if self.options['use_cs']:
+            return
+
+        if self._temperature is None:
+            self._partials(inputs, partials, discrete_inputs)
+            return
+
+        self._partials(self._temperature.scaled(inputs), partials, discrete_inputs)
+        self._temperature.chain_partials(inputs, partials, ['P_loss_copper', 'P_loss'])
+
+        n_phases = discrete_inputs['n_phases']
+        for name in self._core_loss_inputs:
+            partials['P_loss_core_phase', name] = partials['P_loss_core', name] / n_phases
+        for name in self._copper_loss_inputs:
+            partials['P_loss_copper_phase', name] = partials['P_loss_copper', name] / n_phases
+
+    def _partials(self, inputs, partials, discrete_inputs):
         core_material = self.options['core_material']
 
         I_phase_rms = inputs['I_phase_rms']
@@ -77,49 +168,101 @@ class ACFilterInductor(om.ExplicitComponent):
         R_core = inputs['R_core']
         r_core = inputs['r_core']
         mu_r = inputs['mu_r']
-        # core_density = inputs['core_density']
 
         n_phases = discrete_inputs['n_phases']
 
-        wire_area = np.pi * r_wire**2
-        copper_area = n_turns * wire_area
-        available_area = np.pi * (R_core-r_core)**2
-        print(
-            f"available_area: {available_area} {R_core-r_core}")
-        outputs['radius_difference'] = R_core-r_core
-
-        outputs['fill_factor'] = copper_area / available_area
-
-        core_area = np.pi * r_core**2
-        l_path = 2*np.pi*R_core
-        mu = mu_r * 4*np.pi*1e-7
-        outputs['inductance'] = mu * core_area * n_turns / l_path
+        radius_difference = R_core - r_core
+        partials['fill_factor', 'n_turns'] = r_wire**2 / radius_difference**2
+        partials['fill_factor', 'r_wire'] = 2 * \
+            n_turns * r_wire / radius_difference**2
+        partials['fill_factor', 'R_core'] = -2 * \
+            n_turns * r_wire**2 / radius_difference**3
+        partials['fill_factor', 'r_core'] = 2 * \
+            n_turns * r_wire**2 / radius_difference**3
 
-        wire_volume = copper_area * l_path
-        wire_mass = wire_volume * wire_density
-
-        core_area = np.pi * r_core**2
-        core_volume = core_area * 2 * np.pi * R_core
+        # inductance = mu_0 * mu_r * r_core**2 * n_turns / (2 * R_core)
+        k_L = 4*np.pi*1e-7 / 2
+        partials['inductance', 'n_turns'] = k_L * mu_r * r_core**2 / R_core
+        partials['inductance', 'R_core'] = -k_L * \
+            mu_r * r_core**2 * n_turns / R_core**2
+        partials['inductance', 'r_core'] = 2 * \
+            k_L * mu_r * r_core * n_turns / R_core
+        partials['inductance', 'mu_r'] = k_L * r_core**2 * n_turns / R_core
 
+        # wire_mass = n_turns * pi * r_wire**2 * 2 * pi * R_core * wire_density
+        # core_mass = pi * r_core**2 * 2 * pi * R_core * core_density
         core_density = core_material.density
-        core_mass = core_volume * core_density
-        outputs['mass'] = n_phases * wire_mass + core_mass
-
-        B = mu * np.sqrt(2) * \
-            I_phase_rms * n_turns / l_path
-        # I_phase_rms * l_path / (n_turns * core_area)
+        k_m = 2 * np.pi**2
+        wire_mass = k_m * n_turns * r_wire**2 * R_core * wire_density
+        core_mass = k_m * r_core**2 * R_core * core_density
+        dcore_mass_dR_core = k_m * r_core**2 * core_density
+        dcore_mass_dr_core = 2 * k_m * r_core * R_core * core_density
+        partials['mass', 'wire_density'] = n_phases * \
+            k_m * n_turns * r_wire**2 * R_core
+        partials['mass', 'n_turns'] = n_phases * \
+            k_m * r_wire**2 * R_core * wire_density
+        partials['mass', 'r_wire'] = n_phases * 2 * \
+            k_m * n_turns * r_wire * R_core * wire_density
+        partials['mass', 'R_core'] = n_phases * \
+            wire_mass / R_core + dcore_mass_dR_core
+        partials['mass', 'r_core'] = dcore_mass_dr_core
 
-        outputs['max_flux_density'] = B
+        # B = mu_0 * mu_r * sqrt(2) * I_phase_rms * n_turns / (2 * pi * R_core)
+        k_B = 4*np.pi*1e-7 * np.sqrt(2) / (2 * np.pi)
+        B = k_B * mu_r * I_phase_rms * n_turns / R_core
+        dB_dI_phase_rms = k_B * mu_r * n_turns / R_core
+        dB_dn_turns = k_B * mu_r * I_phase_rms / R_core
+        dB_dR_core = -B / R_core
+        dB_dmu_r = k_B * I_phase_rms * n_turns / R_core
+        partials['max_flux_density', 'I_phase_rms'] = dB_dI_phase_rms
+        partials['max_flux_density', 'n_turns'] = dB_dn_turns
+        partials['max_flux_density', 'R_core'] = dB_dR_core
+        partials['max_flux_density', 'mu_r'] = dB_dmu_r
 
         freq_scaler = 1e-3 if core_material.f_units == 'kHz' else 1.0
-        steinmetz_params = core_material.steinmetz_params
-        steinmetz_loss = steinmetz_params[0] * \
-            (electrical_frequency *
-             freq_scaler)**steinmetz_params[1] * B**steinmetz_params[2]
-        outputs['P_loss_core'] = n_phases * steinmetz_loss * core_mass
+        k, alpha, beta = core_material.steinmetz_params
+        f_scaled = electrical_frequency * freq_scaler
+        steinmetz_loss = k * f_scaled**alpha * B**beta
+        dsteinmetz_df = k * alpha * f_scaled**(alpha - 1) * freq_scaler * B**beta
+        dsteinmetz_dB = k * beta * f_scaled**alpha * B**(beta - 1)
+
+        dcore_dI_phase_rms = n_phases * core_mass * dsteinmetz_dB * dB_dI_phase_rms
+        dcore_df = n_phases * core_mass * dsteinmetz_df
+        dcore_dn_turns = n_phases * core_mass * dsteinmetz_dB * dB_dn_turns
+        dcore_dR_core = n_phases * (steinmetz_loss * dcore_mass_dR_core +
+                                    core_mass * dsteinmetz_dB * dB_dR_core)
+        dcore_dr_core = n_phases * steinmetz_loss * dcore_mass_dr_core
+        dcore_dmu_r = n_phases * core_mass * dsteinmetz_dB * dB_dmu_r
+        partials['P_loss_core', 'I_phase_rms'] = dcore_dI_phase_rms
+        partials['P_loss_core', 'electrical_frequency'] = dcore_df
+        partials['P_loss_core', 'n_turns'] = dcore_dn_turns
+        partials['P_loss_core', 'R_core'] = dcore_dR_core
+        partials['P_loss_core', 'r_core'] = dcore_dr_core
+        partials['P_loss_core', 'mu_r'] = dcore_dmu_r
 
-        turn_length = 2*np.pi*r_core
-        outputs['P_loss_copper'] = n_phases * n_turns * resistivity * \
-            turn_length * I_phase_rms**2 / wire_area
+        # P_loss_copper = 2 * n_phases * n_turns * resistivity * r_core * I_phase_rms**2 / r_wire**2
+        P_loss_copper = 2 * n_phases * n_turns * resistivity * \
+            r_core * I_phase_rms**2 / r_wire**2
+        dcopper_dI_phase_rms = 4 * n_phases * n_turns * \
+            resistivity * r_core * I_phase_rms / r_wire**2
+        dcopper_dresistivity = 2 * n_phases * n_turns * \
+            r_core * I_phase_rms**2 / r_wire**2
+        dcopper_dn_turns = 2 * n_phases * resistivity * \
+            r_core * I_phase_rms**2 / r_wire**2
+        dcopper_dr_wire = -2 * P_loss_copper / r_wire
+        dcopper_dr_core = 2 * n_phases * n_turns * \
+            resistivity * I_phase_rms**2 / r_wire**2
+        partials['P_loss_copper', 'I_phase_rms'] = dcopper_dI_phase_rms
+        partials['P_loss_copper', 'resistivity'] = dcopper_dresistivity
+        partials['P_loss_copper', 'n_turns'] = dcopper_dn_turns
+        partials['P_loss_copper', 'r_wire'] = dcopper_dr_wire
+        partials['P_loss_copper', 'r_core'] = dcopper_dr_core
 
-        outputs['P_loss'] = outputs['P_loss_core'] + outputs['P_loss_copper']
+        partials['P_loss', 'I_phase_rms'] = dcore_dI_phase_rms + dcopper_dI_phase_rms
+        partials['P_loss', 'electrical_frequency'] = dcore_df
+        partials['P_loss', 'resistivity'] = dcopper_dresistivity
+        partials['P_loss', 'n_turns'] = dcore_dn_turns + dcopper_dn_turns
+        partials['P_loss', 'r_wire'] = dcopper_dr_wire
+        partials['P_loss', 'R_core'] = dcore_dR_core
+        partials['P_loss', 'r_core'] = dcore_dr_core + dcopper_dr_core
+        partials['P_loss', 'mu_r'] = dcore_dmu_r
@@ -0,0 +1,209 @@
+import numpy as np
+
+import openmdao.api as om
+
+from .electrothermal import thermal_limits
+from .inverter_model import Inverter
+from .physics import dc_link_feasible
+
+
+# Baseline design and operating point used throughout the tests, based on
+# https://assets.wolfspeed.com/uploads/2020/12/C2M0025120D.pdf for the switches
+baseline_design = {
+    'load_inductance': 5.88007877e-5,
+    'load_phase_back_emf': 946.36734443,
+    'load_phase_resistance': 0.28172998,
+
+    'I_phase_rms': 49.81200136,
+    'r_wire': 0.00104543,
+
+    'electrical_frequency': 1727.18721061,
+
+    'bus_voltage': 2000,
+    'switching_frequency': 80000,
+
+    'ac_filter_inductor.wire_density': 8960,
+    'ac_filter_inductor.resistivity': 1.77e-8,
+    'ac_filter_inductor.n_turns': 45.74874813,
+    'ac_filter_inductor.R_core': 0.02,
+    'ac_filter_inductor.r_core': 0.01,
+    'ac_filter_inductor.mu_r': 1200,
+
+    'dc_link_cap.C': 100e-6,
+    'dc_link_cap.dissipation_factor': 140*1e-4,
+    'dc_link_cap.specific_capacitance': 0.0006372145185838208,
+
+    'mosfet.R_ds_on': 0.025,
+    'mosfet.Q_rr': 487e-9
+}
+
+
+def setup_inverter_problem(num_nodes=1, values=None, **inverter_options):
+    """
+    Build and set up a Problem whose model is a promoted Inverter group, and
+    apply `values` (defaults to `baseline_design`) to its inputs
+    """
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("inverter",
+                             Inverter(num_nodes=num_nodes,
+                                      **inverter_options),
+                             promotes=["*"])
+    prob.setup()
+
+    set_values(prob, baseline_design if values is None else values)
+    return prob
+
+
+def set_values(prob, values):
+    """
+    Set each (promoted name, value) pair in `values` on `prob`, broadcasting
+    scalars across all of the nodes
+    """
+    for key, value in values.items():
+        prob.set_val(key, value)
+
+
+def run_analysis(prob):
+    """
+    Run the Inverter model as an analysis rather than an optimization.
+
+    The modulation index seen by the ripple and DC link models is normally the
+    `modulation_index_slack` design variable, which an optimizer drives to the
+    computed modulation index. Here the slack is instead set equal to the
+    computed modulation index. Nodes whose modulation index is too high for the
+    bus voltage are flagged infeasible instead of raising an AnalysisError; their
+    slack is zeroed so the rest of the batch can still be evaluated.
+
+    Returns
+    -------
+    feasible : ndarray of bool
+        True for every node with a valid operating point
+    """
+    prob.set_val('modulation_index_slack', 0.0)
+    prob.run_model()
+
+    modulation_index = prob.get_val('modulation_index')
+    feasible = dc_link_feasible(prob.get_val('I_phase_rms'), modulation_index,
+                                prob.get_val('power_factor'))
+
+    prob.set_val('modulation_index_slack',
+                 np.where(feasible, modulation_index, 0.0))
+    prob.run_model()
+    return feasible
+
+
+def add_design_problem(model, objective='efficiency'):
+    """
+    Declare the design variables, constraints and objective of the baseline
+    efficiency maximization (that of tests/test_inverter.py) on `model`, a
+    group with a promoted Inverter. With `objective='mass'` the mass is
+    minimized instead, subject to the same constraints.
+    """
+    # Common design vars
+    model.add_design_var('I_phase_rms', lower=10)
+    model.add_design_var('r_wire', lower=0.001)
+
+    # ### MOSFET
+    model.add_design_var('switching_frequency', lower=1.0, upper=1e6, ref=1e6)
+
+    # ### Inductor
+    model.add_design_var('ac_filter_inductor.n_turns', lower=1)
+    model.add_design_var('ac_filter_inductor.R_core', lower=0.002, upper=0.1,
+                         ref0=0.002, ref=0.1)
+    model.add_design_var('ac_filter_inductor.r_core', lower=0.001,
+                         ref0=0.001, ref=1.0)
+    model.add_design_var('ac_filter_inductor.mu_r', lower=200, upper=1200)
+
+    model.add_constraint('ac_filter_inductor.radius_difference', lower=0.0001,
+                         linear=True)
+    model.add_constraint('ac_filter_inductor.fill_factor', upper=0.5, ref=0.5)
+    model.add_constraint('ac_filter_inductor.max_flux_density', upper=1.5)
+
+    # ### Capacitor
+    model.add_design_var('dc_link_cap.C', lower=0.0, ref=1e-4)
+
+    model.add_design_var('modulation_index_slack', upper=1.0)
+    model.add_constraint('modulation_index_residual', equals=0.0)
+    model.add_constraint('modulation_index', upper=1.0)
+
+    model.add_constraint('I_ripple', upper=0.05)
+    model.add_constraint('V_ripple', upper=0.01)
+
+    if objective == 'efficiency':
+        model.add_objective('efficiency', ref=-1)
+    elif objective == 'mass':
+        model.add_objective('mass', ref=100)
+    else:
+        raise ValueError(f"Unknown objective '{objective}', expected 'efficiency' or 'mass'")
+
+
+def add_thermal_constraints(model, limits=None, use_filter_inductor=True):
+    """
+    Constrain the temperatures of an Inverter with the `thermal` option to
+    `limits`, a dict of upper limits in degC by promoted name (defaults to the
+    ratings in `electrothermal.thermal_limits`)
+    """
+    for name, upper in (thermal_limits if limits is None else limits).items():
+        if use_filter_inductor or not name.startswith('inductor_thermal.'):
+            model.add_constraint(name, upper=upper, units='degC', ref=100.0)
+
+
+def setup_optimization_problem(driver=None, values=None, objective='efficiency',
+                               temperature_limits=None, configure=None, **inverter_options):
+    """
+    Build and set up the baseline efficiency maximization of a single Inverter
+    design, driven by `driver` (defaults to SLSQP from ScipyOptimizeDriver),
+    starting from `values` (defaults to `baseline_design`). See
+    `add_design_problem` for `objective`, and `add_thermal_constraints` for
+    `temperature_limits`, which needs the `thermal` Inverter option.
+    `configure`, if given, is called with the model before setup, e.g. to add
+    constraints.
+    """
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("inverter",
+                             Inverter(**inverter_options),
+                             promotes=["*"])
+    add_design_problem(prob.model, objective=objective)
+    if temperature_limits is not None:
+        add_thermal_constraints(prob.model, temperature_limits,
+                                use_filter_inductor=inverter_options.get('use_filter_inductor', True))
+    if configure is not None:
+        configure(prob.model)
+    prob.driver = om.ScipyOptimizeDriver(optimizer='SLSQP', tol=1e-6, maxiter=200) \
+        if driver is None else driver
+    prob.setup()
+
+    set_values(prob, baseline_design if values is None else values)
+    prob.set_val('modulation_index_slack', 0.9)
+    return prob
+
+
+# Exceptions of an optimization that failed rather than of a bug: the
+# AnalysisError of an infeasible design, and the ValueError and RuntimeError
+# SciPy and the drivers raise when the iterates diverge
+optimization_errors = (om.AnalysisError, ValueError, RuntimeError)
+
+
+def quiet(prob):
+    """
+    Silence the printout of the driver of `prob`, for optimizations run in
+    bulk, and return `prob`
+    """
+    prob.driver.options['debug_print'] = []
+    if isinstance(prob.driver, om.ScipyOptimizeDriver):
+        prob.driver.options['disp'] = False
+    return prob
+
+
+def optimize(prob, result=None, errors=optimization_errors):
+    """
+    Run the driver of `prob` and return True if it converged. An exception in
+    `errors` counts as not converged, and its repr is stored under 'error' in
+    the dict `result`, if given.
+    """
+    try:
+        return bool(prob.run_driver().success)
+    except errors as error:
+        if result is not None:
+            result['error'] = repr(error)
+        return False
@@ -0,0 +1,257 @@
+"""
+Performance benchmarks of the Inverter model.
+
+Run with
+
+    python -m invertermodel.benchmark --save baseline.json
+
+to record a baseline on a given machine, and later with
+
+    python -m invertermodel.benchmark --check baseline.json
+
+to exit with an error if the throughput of any benchmark dropped by more than
+the threshold (20% by default) relative to the baseline.
+
+The import benchmarks time importing the NumPy physics core and the OpenMDAO
+wrappers in a fresh interpreter, their throughput is in imports per second.
+The map lookup benchmark interpolates a memory-mapped efficiency map at one
+random operating point per node.
+"""
+import argparse
+import datetime
+import json
+import platform
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import openmdao
+import openmdao.api as om
+
+from .analysis import baseline_design, run_analysis, set_values, \
+    setup_inverter_problem, setup_optimization_problem
+from .efficiency_map import generate_efficiency_map
+from .inverter_model import Inverter
+
+
+default_batch_sizes = (1, 16, 256, 4096)
+
+_totals_of = ['efficiency', 'total_loss', 'mass', 'I_ripple', 'V_ripple']
+_totals_wrt = ['I_phase_rms', 'switching_frequency',
+               'ac_filter_inductor.n_turns', 'dc_link_cap.C']
+
+
+def time_call(func, repeat=5):
+    """
+    Best wall time of `repeat` calls of `func`, which is given the index of the
+    call
+    """
+    best = np.inf
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _setup(num_nodes, repeat):
+    def setup(_):
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("inverter", Inverter(num_nodes=num_nodes),
+                                 promotes=["*"])
+        prob.setup()
+        prob.final_setup()
+    return time_call(setup, repeat)
+
+
+def _run_model(num_nodes, repeat):
+    prob = setup_inverter_problem(num_nodes=num_nodes)
+    # Vary the operating point between calls, so no evaluation is a repeat
+    I_phase_rms = baseline_design['I_phase_rms'] * np.linspace(0.5, 1.0, repeat)
+    return time_call(lambda i: (prob.set_val('I_phase_rms', I_phase_rms[i]),
+                                run_analysis(prob)),
+                     repeat)
+
+
+def _compute_totals(num_nodes, repeat):
+    prob = setup_inverter_problem(num_nodes=num_nodes)
+    run_analysis(prob)
+    return time_call(lambda _: prob.compute_totals(_totals_of, _totals_wrt), repeat)
+
+
+def _check_partials(num_nodes, repeat):
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("inverter", Inverter(num_nodes=num_nodes),
+                             promotes=["*"])
+    prob.setup(force_alloc_complex=True)
+    set_values(prob, baseline_design)
+    run_analysis(prob)
+    return time_call(lambda _: prob.check_partials(method='cs', out_stream=None),
+                     repeat)
+
+
+def _optimization(num_nodes, repeat):
+    def optimize(_):
+        prob = setup_optimization_problem()
+        if prob.run_driver().success is False:
+            raise RuntimeError("Benchmark optimization failed to converge")
+    return time_call(optimize, repeat)
+
+
+def _map_lookup(num_nodes, repeat):
+    axes = (np.linspace(10.0, 60.0, 26), np.linspace(200.0, 1800.0, 17),
+            np.linspace(1600.0, 2400.0, 5))
+    rng = np.random.default_rng(0)
+    points = [rng.uniform(axis[0], axis[-1], num_nodes) for axis in axes]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        efficiency_map = generate_efficiency_map(os.path.join(tmpdir, 'map.npy'), *axes)
+        elapsed = time_call(lambda _: efficiency_map.interpolate(*points), repeat)
+        # Release the memory map before the file is removed
+        del efficiency_map
+    return elapsed
+
+
+def _import(module):
+    def benchmark(num_nodes, repeat):
+        # Timed within a fresh interpreter, excluding the interpreter's own
+        # startup
+        code = ("import time; start = time.perf_counter(); "
+                f"import {module}; print(time.perf_counter() - start)")
+        return min(float(subprocess.run([sys.executable, '-c', code], check=True,
+                                        capture_output=True, text=True).stdout)
+                   for _ in range(repeat))
+    return benchmark
+
+
+# Benchmark name: (function, largest batch size it is run at). Derivative
+# checks and total derivatives scale with the number of columns of the
+# Jacobian, so they are limited to smaller batches, and the optimization is of
+# a single design, as are the imports.
+benchmarks = {
+    'import_physics': (_import('invertermodel.physics'), 1),
+    'import_inverter': (_import('invertermodel.inverter_model'), 1),
+    'setup': (_setup, None),
+    'run_model': (_run_model, None),
+    'compute_totals': (_compute_totals, 256),
+    'check_partials': (_check_partials, 16),
+    'optimization': (_optimization, 1),
+    'map_lookup': (_map_lookup, None),
+}
+
+
+def _metadata():
+    return {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'openmdao': openmdao.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'system': platform.system()}
+
+
+def run_benchmarks(batch_sizes=default_batch_sizes, repeat=5, names=None,
+                   out_stream=sys.stdout):
+    """
+    Time every benchmark in `names` (defaults to all of `benchmarks`) at every
+    batch size it supports
+
+    Returns
+    -------
+    dict
+        Machine and library versions under 'metadata', and the time per call
+        and throughput (operating points per second) of every benchmark and
+        batch size under 'results'
+    """
+    results = {}
+    for name in benchmarks if names is None else names:
+        func, max_batch_size = benchmarks[name]
+        results[name] = {}
+        for num_nodes in batch_sizes:
+            if max_batch_size is not None and num_nodes > max_batch_size:
+                continue
+            elapsed = func(num_nodes, repeat)
+            results[name][str(num_nodes)] = {'time': elapsed,
+                                             'throughput': num_nodes / elapsed}
+            if out_stream is not None:
+                print(f"{name:>16} {num_nodes:>6d} nodes: {elapsed*1e3:10.3f} ms "
+                      f"({num_nodes / elapsed:12.1f} nodes/s)", file=out_stream)
+
+    return {'metadata': _metadata(), 'results': results}
+
+
+def save_baseline(results, path):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2)
+
+
+def load_baseline(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def find_regressions(results, baseline, threshold=0.2):
+    """
+    Compare `results` to `baseline` (both from `run_benchmarks`)
+
+    Returns
+    -------
+    list of dict
+        Every benchmark and batch size whose throughput dropped by more than
+        `threshold` (a fraction) relative to the baseline
+    """
+    regressions = []
+    for name, cases in results['results'].items():
+        for num_nodes, result in cases.items():
+            reference = baseline['results'].get(name, {}).get(num_nodes)
+            if reference is None:
+                continue
+            ratio = result['throughput'] / reference['throughput']
+            if ratio < 1 - threshold:
+                regressions.append({'benchmark': name,
+                                    'num_nodes': int(num_nodes),
+                                    'throughput': result['throughput'],
+                                    'baseline_throughput': reference['throughput'],
+                                    'ratio': ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-sizes', type=int, nargs='+',
+                        default=list(default_batch_sizes))
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Number of timed calls, the best is kept")
+    parser.add_argument('--benchmarks', nargs='+', choices=list(benchmarks),
+                        help="Subset of the benchmarks to run")
+    parser.add_argument('--save', metavar='PATH',
+                        help="Write the results to a JSON baseline")
+    parser.add_argument('--check', metavar='PATH',
+                        help="Compare the results to a JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Largest allowed fractional drop in throughput")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.batch_sizes, args.repeat, args.benchmarks)
+    if args.save:
+        save_baseline(results, args.save)
+
+    if args.check:
+        regressions = find_regressions(results, load_baseline(args.check),
+                                       args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']} at {regression['num_nodes']} nodes: "
+                  f"{regression['throughput']:.1f} nodes/s vs "
+                  f"{regression['baseline_throughput']:.1f} nodes/s in the baseline "
+                  f"({regression['ratio']:.0%})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
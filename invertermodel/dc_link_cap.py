@@ -2,6 +2,11 @@ import numpy as np
 
 import openmdao.api as om
 
+from .electrothermal import TemperatureDependence
+from .eval_cache import EvaluationCache, cached_compute, cached_compute_partials
+from .physics import dc_link_capacitor, dc_link_feasible
+from .pwm import PWMWaveform, waveform_dc_link_capacitor
+
 
 class DCLinkCapacitor(om.ExplicitComponent):
     """
@@ -11,34 +16,122 @@ class DCLinkCapacitor(om.ExplicitComponent):
     """
 
     def initialize(self):
-        pass
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("use_cs", default=False, types=bool,
+                             desc="Compute partials with complex step instead of analytically")
+        self.options.declare("cache", default=None, types=EvaluationCache, allow_none=True,
+                             desc="Cache of the outputs and partials, keyed on the inputs")
+        self.options.declare("pwm", default=None, types=PWMWaveform, allow_none=True,
+                             desc="Waveform-level PWM model of the capacitor RMS current, "
+                                  "instead of the closed form")
+        self.options.declare("thermal", default=False, types=bool,
+                             desc="Add the hotspot temperature dependence of the dissipation factor, "
+                                  "coupling the losses to a thermal network")
 
     def setup(self):
-        self.add_input("I_phase_rms", units='A',
+        nn = self.options['num_nodes']
+        ar = np.arange(nn)
+        thermal = self.options['thermal']
+
+        # Metallized polypropylene film, whose dissipation factor rises slowly
+        # with temperature
+        self._temperature = TemperatureDependence('dissipation_factor', 'T_hotspot', 25.0, 2e-3) \
+            if thermal else None
+
+        self.add_input("I_phase_rms", shape=nn, units='A',
                        desc="The motor phase RMS current")
-        self.add_input("modulation_index", units='unitless',
+        self.add_input("modulation_index", shape=nn, units='unitless',
                        desc="Modulation index")
-        self.add_input("power_factor", units='unitless',
+        self.add_input("power_factor", shape=nn, units='unitless',
                        desc="Power factor of the motor circuit accounting for external passive filters")
-        self.add_input("switching_frequency", units='Hz',
+        self.add_input("switching_frequency", shape=nn, units='Hz',
                        desc="The inverter’s switching frequency")
-        self.add_input("C", units='F',
+        self.add_input("C", shape=nn, units='F',
                        desc="The DC link's total capacitance")
-        self.add_input("dissipation_factor", units='unitless',
-                       desc="The dissipation factor of the capacitor")
-        self.add_input("specific_capacitance", units='F/kg',
+        self.add_input("dissipation_factor", shape=nn, units='unitless',
+                       desc="The dissipation factor of the capacitor" + (" at 25 degC" if thermal else ""))
+        if thermal:
+            self._temperature.add_inputs(self, desc="Hotspot temperature of the capacitors")
+        self.add_input("specific_capacitance", shape=nn, units='F/kg',
                        desc="The specific capacitance of a single capacitor")
+        if self.options['pwm'] is not None:
+            self.add_input("electrical_frequency", shape=nn, units='Hz',
+                           desc="The inverter’s output electrical frequency")
 
-        self.add_output("V_ripple", units='V',
+        self.add_output("V_ripple", shape=nn, units='V',
                         desc="Voltage ripple on the capacitor")
-        self.add_output("P_loss", units='W',
+        self.add_output("P_loss", shape=nn, units='W',
                         desc="Losses in the capacitor due to the current ripple it experiences")
-        self.add_output("mass", units='kg',
+        self.add_output("mass", shape=nn, units='kg',
                         desc="The mass of all the DC link capacitors")
 
-        self.declare_partials('*', '*', method='cs')
+        if self.options['use_cs']:
+            self.declare_partials('*', '*', rows=ar, cols=ar, method='cs')
+        else:
+            self.declare_partials(['V_ripple', 'P_loss'], ['I_phase_rms',
+                                                           'modulation_index',
+                                                           'power_factor',
+                                                           'switching_frequency',
+                                                           'C'], rows=ar, cols=ar)
+            self.declare_partials('P_loss', 'dissipation_factor', rows=ar, cols=ar)
+            if thermal:
+                self._temperature.declare_partials(self, 'P_loss')
+            self.declare_partials('mass', ['C', 'specific_capacitance'], rows=ar, cols=ar)
 
+    def _waveform_model(self, inputs, partials=False):
+        return waveform_dc_link_capacitor(self.options['pwm'],
+                                          inputs['I_phase_rms'],
+                                          inputs['modulation_index'],
+                                          inputs['power_factor'],
+                                          inputs['switching_frequency'],
+                                          inputs['C'],
+                                          inputs['dissipation_factor'],
+                                          inputs['specific_capacitance'],
+                                          inputs['electrical_frequency'],
+                                          partials=partials)
+
+    @cached_compute
     def compute(self, inputs, outputs):
+        if self._temperature is not None:
+            inputs = self._temperature.scaled(inputs)
+
+        if self.options['pwm'] is not None:
+            # The switching waveforms are valid at any modulation index
+            for name, value in self._waveform_model(inputs).items():
+                outputs[name] = value
+            return
+
+        I_phase_rms = inputs['I_phase_rms']
+        modulation_index = inputs['modulation_index']
+        power_factor = inputs['power_factor']
+
+        if not np.all(dc_link_feasible(I_phase_rms, modulation_index, power_factor)):
+            raise om.AnalysisError(
+                f'Modulation index ({modulation_index}) too high! Insufficient bus voltage for given load')
+
+        for name, value in dc_link_capacitor(I_phase_rms,
+                                             modulation_index,
+                                             power_factor,
+                                             inputs['switching_frequency'],
+                                             inputs['C'],
+                                             inputs['dissipation_factor'],
+                                             inputs['specific_capacitance']).items():
+            outputs[name] = value
+
+    @cached_compute_partials
+    def compute_partials(self, inputs, partials):
+        if self.options['use_cs']:
+            return
+
+        if self._temperature is None:
+            self._partials(inputs, partials)
+            return
+
+        self._partials(self._temperature.scaled(inputs), partials)
+        self._temperature.chain_partials(inputs, partials, ['P_loss'])
+
+    def _partials(self, inputs, partials):
         I_phase_rms = inputs['I_phase_rms']
         modulation_index = inputs['modulation_index']
         power_factor = inputs['power_factor']
@@ -47,23 +140,60 @@ class DCLinkCapacitor(om.ExplicitComponent):
         dissipation_factor = inputs['dissipation_factor']
         specific_cap = inputs['specific_capacitance']
 
-        I_in_rms = I_phase_rms * \
-            np.sqrt(2 * np.sqrt(3) / np.pi *
-                    modulation_index * (power_factor**2 + 0.25))
-        I_in_avg = 0.75 * np.sqrt(2)*I_phase_rms * \
-            modulation_index * power_factor
+        partials['mass', 'C'] = 1 / specific_cap
+        partials['mass', 'specific_capacitance'] = -C / specific_cap**2
 
-        if I_in_avg > I_in_rms:
-            raise om.AnalysisError(
-                f'Modulation index ({modulation_index}) too high! Insufficient bus voltage for given load')
+        if self.options['pwm'] is not None:
+            outputs, derivatives = self._waveform_model(inputs, partials=True)
+            for (output, name), value in derivatives.items():
+                partials[output, name] = value
 
-        I_cap_rms = np.sqrt(I_in_rms**2 - I_in_avg**2)
-        # print(
-        #     f"I_in_rms: {I_in_rms}, I_in_avg: {I_in_avg}, I_cap_rms: {I_cap_rms}")
+            V_ripple = outputs['V_ripple']
+            P_loss = outputs['P_loss']
+            partials['V_ripple', 'I_phase_rms'] = V_ripple / I_phase_rms
+            partials['V_ripple', 'switching_frequency'] = -V_ripple / switching_frequency
+            partials['V_ripple', 'C'] = -V_ripple / C
+            partials['P_loss', 'I_phase_rms'] = 2 * P_loss / I_phase_rms
+            partials['P_loss', 'switching_frequency'] = -P_loss / switching_frequency
+            partials['P_loss', 'C'] = -P_loss / C
+            partials['P_loss', 'dissipation_factor'] = P_loss / dissipation_factor
+            return
 
-        outputs['V_ripple'] = I_cap_rms / (C * switching_frequency)
+        # I_cap_rms = I_phase_rms * sqrt(g)
+        a = 2 * np.sqrt(3) / np.pi
+        g = a * modulation_index * (power_factor**2 + 0.25) - \
+            1.125 * modulation_index**2 * power_factor**2
+        dg_dm = a * (power_factor**2 + 0.25) - \
+            2.25 * modulation_index * power_factor**2
+        dg_dpf = 2 * a * modulation_index * power_factor - \
+            2.25 * modulation_index**2 * power_factor
 
-        R_cap_f = dissipation_factor / (2*np.pi*switching_frequency*C)
-        outputs['P_loss'] = I_cap_rms**2 * R_cap_f
+        sqrt_g = np.sqrt(g)
+        I_cap_rms = I_phase_rms * sqrt_g
+        # At zero modulation index the capacitor current has an infinite
+        # slope in the modulation index and none in the power factor, both
+        # taken as zero rather than dividing by zero
+        nonzero = np.real(sqrt_g) > 0
+        dI_cap_dm = np.divide(0.5 * I_phase_rms * dg_dm, sqrt_g,
+                              out=np.zeros_like(sqrt_g * dg_dm), where=nonzero)
+        dI_cap_dpf = np.divide(0.5 * I_phase_rms * dg_dpf, sqrt_g,
+                               out=np.zeros_like(sqrt_g * dg_dpf), where=nonzero)
 
-        outputs['mass'] = C / specific_cap
+        V_ripple = I_cap_rms / (C * switching_frequency)
+        partials['V_ripple', 'I_phase_rms'] = sqrt_g / (C * switching_frequency)
+        partials['V_ripple', 'modulation_index'] = dI_cap_dm / \
+            (C * switching_frequency)
+        partials['V_ripple', 'power_factor'] = dI_cap_dpf / \
+            (C * switching_frequency)
+        partials['V_ripple', 'switching_frequency'] = -V_ripple / switching_frequency
+        partials['V_ripple', 'C'] = -V_ripple / C
+
+        R_cap_f = dissipation_factor / (2*np.pi*switching_frequency*C)
+        P_loss = I_cap_rms**2 * R_cap_f
+        partials['P_loss', 'I_phase_rms'] = 2 * I_phase_rms * g * R_cap_f
+        partials['P_loss', 'modulation_index'] = I_phase_rms**2 * dg_dm * R_cap_f
+        partials['P_loss', 'power_factor'] = I_phase_rms**2 * dg_dpf * R_cap_f
+        partials['P_loss', 'switching_frequency'] = -P_loss / switching_frequency
+        partials['P_loss', 'C'] = -P_loss / C
+        partials['P_loss', 'dissipation_factor'] = I_cap_rms**2 / \
+            (2*np.pi*switching_frequency*C)
@@ -0,0 +1,263 @@
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy.stats import qmc
+
+from .analysis import baseline_design, run_analysis, set_values, setup_inverter_problem
+
+
+# Outputs recorded for every case of a sweep
+sweep_outputs = ('efficiency',
+                 'total_loss',
+                 'mass',
+                 'I_ripple',
+                 'V_ripple',
+                 'modulation_index',
+                 'mosfet.P_loss',
+                 'ac_filter_inductor.P_loss',
+                 'ac_filter_inductor.fill_factor',
+                 'ac_filter_inductor.max_flux_density',
+                 'dc_link_cap.P_loss')
+
+
+def _sweep_outputs(use_filter_inductor=True):
+    return tuple(name for name in sweep_outputs
+                 if use_filter_inductor or not name.startswith('ac_filter_inductor.'))
+
+
+def full_factorial(bounds, levels):
+    """
+    Full-factorial sampling of the box `bounds` ({name: (lower, upper)}) with
+    `levels` evenly spaced levels per variable (an int, or {name: int}).
+
+    Returns
+    -------
+    dict
+        Columns of case values keyed by variable name
+    """
+    if isinstance(levels, int):
+        levels = {name: levels for name in bounds}
+
+    axes = [np.linspace(lower, upper, levels[name])
+            for name, (lower, upper) in bounds.items()]
+    grid = np.meshgrid(*axes, indexing='ij')
+    return {name: values.ravel() for name, values in zip(bounds, grid)}
+
+
+def _scale_unit_samples(bounds, samples):
+    lower = np.array([bound[0] for bound in bounds.values()], dtype=float)
+    upper = np.array([bound[1] for bound in bounds.values()], dtype=float)
+    samples = qmc.scale(samples, lower, upper)
+    return {name: samples[:, i] for i, name in enumerate(bounds)}
+
+
+def latin_hypercube(bounds, n_samples, seed=None):
+    """
+    Latin hypercube sampling of the box `bounds` ({name: (lower, upper)})
+    """
+    sampler = qmc.LatinHypercube(d=len(bounds), seed=seed)
+    return _scale_unit_samples(bounds, sampler.random(n_samples))
+
+
+def sobol(bounds, n_samples, seed=None):
+    """
+    Scrambled Sobol sampling of the box `bounds` ({name: (lower, upper)}).
+    `n_samples` should be a power of two to keep the sequence balanced.
+    """
+    sampler = qmc.Sobol(d=len(bounds), seed=seed)
+    return _scale_unit_samples(bounds, sampler.random(n_samples))
+
+
+# Per-process state of the sweep workers, so the Problem is only set up once
+# per worker rather than once per case
+_worker = {}
+
+
+def _init_worker(design, shard_size, outputs, inverter_options):
+    _worker['prob'] = setup_inverter_problem(num_nodes=shard_size,
+                                             values=design,
+                                             **inverter_options)
+    _worker['shard_size'] = shard_size
+    _worker['outputs'] = outputs
+
+
+def _run_shard(shard_index, shard_cases, shard_path):
+    start = time.perf_counter()
+    prob = _worker['prob']
+    shard_size = _worker['shard_size']
+
+    n_cases = len(next(iter(shard_cases.values())))
+    padded = {name: np.pad(values, (0, shard_size - n_cases), mode='edge')
+              for name, values in shard_cases.items()}
+    set_values(prob, padded)
+    feasible = run_analysis(prob)[:n_cases]
+
+    columns = dict(shard_cases)
+    columns['feasible'] = feasible
+    for name in _worker['outputs']:
+        columns[name] = np.where(feasible,
+                                 prob.get_val(name)[:n_cases],
+                                 np.nan)
+
+    # Write then rename, so that a crash never leaves a partial shard behind
+    tmp_path = shard_path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **columns)
+    os.replace(tmp_path, shard_path)
+
+    return shard_index, os.getpid(), n_cases, time.perf_counter() - start
+
+
+def _sweep_digest(cases, design, inverter_options):
+    """
+    Digest of everything that sets the results of a sweep besides its size
+    and columns: the case values, the design values and the Inverter options
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for values in (cases, design):
+        for name in sorted(values):
+            digest.update(name.encode())
+            digest.update(np.asarray(values[name], dtype=float).tobytes())
+    digest.update(json.dumps(inverter_options, sort_keys=True, default=repr).encode())
+    return digest.hexdigest()
+
+
+def _shard_path(store_path, shard_index):
+    return os.path.join(store_path, f'shard_{shard_index:06d}.npz')
+
+
+def run_sweep(cases, store_path, design=None, shard_size=256, max_workers=None,
+              outputs=None, **inverter_options):
+    """
+    Evaluate every case of a design of experiments on a pool of worker
+    processes and store the results on disk.
+
+    Cases are split into shards of `shard_size`, and each worker sets up a
+    single Inverter problem with `num_nodes=shard_size` that it reuses for
+    every shard it evaluates. Each shard is written to its own .npz file in
+    `store_path`, one array per input or output column. Running the same sweep
+    again with the same `store_path` resumes it, skipping every shard already
+    on disk. A sweep only resumes a store written with the same cases, design
+    and Inverter options.
+
+    Parameters
+    ----------
+    cases : dict
+        Columns of case values keyed by promoted Inverter input name, e.g. the
+        output of `full_factorial`, `latin_hypercube` or `sobol`
+    store_path : str
+        Directory of the columnar results store
+    design : dict, optional
+        Values for the Inverter inputs not being swept, defaults to
+        `analysis.baseline_design`
+    shard_size : int
+        Number of cases evaluated per run of the model
+    max_workers : int, optional
+        Number of worker processes, defaults to the number of CPUs
+    outputs : iterable of str, optional
+        Promoted names of the outputs to record, defaults to the
+        `sweep_outputs` of the Inverter's options
+    **inverter_options
+        Options passed to the Inverter group
+
+    Returns
+    -------
+    dict
+        Throughput report of the sweep, with per-worker statistics under
+        'workers'
+    """
+    start = time.perf_counter()
+    if outputs is None:
+        outputs = _sweep_outputs(inverter_options.get('use_filter_inductor', True))
+    cases = {name: np.asarray(values, dtype=float)
+             for name, values in cases.items()}
+    n_cases = len(next(iter(cases.values())))
+    n_shards = -(-n_cases // shard_size)
+
+    os.makedirs(store_path, exist_ok=True)
+    manifest = {'n_cases': n_cases,
+                'shard_size': shard_size,
+                'inputs': list(cases),
+                'outputs': list(outputs),
+                'digest': _sweep_digest(cases, baseline_design if design is None else design,
+                                        inverter_options)}
+    manifest_path = os.path.join(store_path, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            if json.load(file) != manifest:
+                raise ValueError(f"Sweep store {store_path} was written by a different sweep, "
+                                 "use a new directory")
+    else:
+        with open(manifest_path, 'w') as file:
+            json.dump(manifest, file, indent=2)
+
+    pending = [i for i in range(n_shards)
+               if not os.path.exists(_shard_path(store_path, i))]
+
+    workers = {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_worker,
+                                 initargs=(design, shard_size, tuple(outputs),
+                                           inverter_options)) as executor:
+            futures = []
+            for i in pending:
+                shard = slice(i * shard_size, (i + 1) * shard_size)
+                futures.append(executor.submit(_run_shard,
+                                               i,
+                                               {name: values[shard]
+                                                for name, values in cases.items()},
+                                               _shard_path(store_path, i)))
+
+            for future in as_completed(futures):
+                _, pid, n_shard_cases, elapsed = future.result()
+                stats = workers.setdefault(pid, {'n_shards': 0,
+                                                 'n_cases': 0,
+                                                 'busy_time': 0.0})
+                stats['n_shards'] += 1
+                stats['n_cases'] += n_shard_cases
+                stats['busy_time'] += elapsed
+
+    for stats in workers.values():
+        stats['cases_per_second'] = stats['n_cases'] / stats['busy_time']
+
+    elapsed = time.perf_counter() - start
+    n_evaluated = sum(stats['n_cases'] for stats in workers.values())
+    return {'n_cases': n_cases,
+            'n_evaluated': n_evaluated,
+            'n_shards_skipped': n_shards - len(pending),
+            'elapsed': elapsed,
+            'cases_per_second': n_evaluated / elapsed,
+            'workers': workers}
+
+
+def load_sweep(store_path, columns=None):
+    """
+    Load the columns of a sweep results store, in case order
+
+    Parameters
+    ----------
+    store_path : str
+        Directory written by `run_sweep`
+    columns : iterable of str, optional
+        Columns to load, defaults to every column
+
+    Returns
+    -------
+    dict
+        Arrays keyed by column name. Missing shards of an interrupted sweep are
+        skipped.
+    """
+    columns = None if columns is None else list(columns)
+    shard_paths = sorted(glob.glob(os.path.join(store_path, 'shard_*.npz')))
+    data = {}
+    for path in shard_paths:
+        with np.load(path) as shard:
+            for name in shard.files if columns is None else columns:
+                data.setdefault(name, []).append(shard[name])
+    return {name: np.concatenate(values) for name, values in data.items()}
@@ -0,0 +1,236 @@
+import csv
+import itertools
+import os
+import struct
+
+import numpy as np
+
+from .analysis import run_analysis, set_values, setup_inverter_problem
+
+
+# Columns of a drive cycle profile, in the order expected for unnamed data
+profile_inputs = ('I_phase_rms', 'electrical_frequency', 'bus_voltage')
+
+# Per-sample results, keyed by field name in the output file
+drive_cycle_outputs = {
+    'total_loss': 'total_loss',
+    'mosfet_loss': 'mosfet.P_loss',
+    'inductor_loss': 'ac_filter_inductor.P_loss',
+    'capacitor_loss': 'dc_link_cap.P_loss',
+    'efficiency': 'efficiency',
+    'I_ripple': 'I_ripple',
+    'V_ripple': 'V_ripple',
+    'modulation_index': 'modulation_index',
+}
+
+
+def _output_dtype(use_filter_inductor=True):
+    fields = [(name, np.float64) for name in drive_cycle_outputs
+              if use_filter_inductor or name != 'inductor_loss']
+    fields.append(('feasible', np.bool_))
+    return np.dtype(fields)
+
+
+def _check_profile_names(names):
+    missing = [name for name in profile_inputs if name not in names]
+    if missing:
+        raise ValueError(f"Drive cycle profile is missing the columns {missing}, "
+                         f"got {list(names)}")
+
+
+def _as_profile_columns(array, names=None):
+    """
+    Return a (n, 3) float array of the profile inputs from a chunk of profile
+    data, which is either a structured array or a plain 2D array whose columns
+    are either named by `names` or ordered as `profile_inputs`
+    """
+    if array.dtype.names is not None:
+        _check_profile_names(array.dtype.names)
+        return np.column_stack([np.asarray(array[name], dtype=float)
+                                for name in profile_inputs])
+
+    array = np.asarray(array, dtype=float)
+    if array.ndim == 1:
+        array = array.reshape(1, -1)
+    if names is not None:
+        _check_profile_names(names)
+        array = array[:, [names.index(name) for name in profile_inputs]]
+    if array.shape[1] != len(profile_inputs):
+        raise ValueError(f"Drive cycle profile must have the columns {profile_inputs}, "
+                         f"got {array.shape[1]} columns")
+    return array
+
+
+def _iter_array_chunks(array, chunk_size):
+    for start in range(0, array.shape[0], chunk_size):
+        yield _as_profile_columns(array[start:start + chunk_size])
+
+
+def _is_numeric_row(line):
+    try:
+        for value in line.split(','):
+            float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _iter_csv_chunks(path, chunk_size):
+    with open(path, newline='') as file:
+        first = file.readline()
+        if _is_numeric_row(first):
+            names = None
+            # Without a header the first line is data, read with the first chunk
+            lines = [first]
+        else:
+            names = [name.strip() for name in next(csv.reader([first]))]
+            lines = []
+
+        while True:
+            lines += itertools.islice(file, chunk_size - len(lines))
+            if not lines:
+                return
+            yield _as_profile_columns(np.loadtxt(lines, delimiter=',', ndmin=2), names)
+            lines = []
+
+
+def _iter_generator_chunks(rows, chunk_size):
+    buffer = []
+    n_buffered = 0
+    for row in rows:
+        row = _as_profile_columns(np.asarray(row))
+        buffer.append(row)
+        n_buffered += row.shape[0]
+        if n_buffered >= chunk_size:
+            data = np.concatenate(buffer)
+            for start in range(0, n_buffered - chunk_size + 1, chunk_size):
+                yield data[start:start + chunk_size]
+            remainder = n_buffered % chunk_size
+            buffer = [data[n_buffered - remainder:]] if remainder else []
+            n_buffered = remainder
+    if n_buffered:
+        yield np.concatenate(buffer)
+
+
+def iter_profile(profile, chunk_size):
+    """
+    Lazily read a drive cycle profile in chunks of at most `chunk_size` samples.
+
+    Parameters
+    ----------
+    profile : str, os.PathLike, ndarray, or iterable
+        Either a path to a .csv file (with an optional header naming the
+        columns) or a .npy file (opened memory-mapped), an array (including
+        np.memmap), or an iterable yielding individual samples or blocks of
+        samples. Unnamed columns are assumed to be ordered as `profile_inputs`.
+
+    Yields
+    ------
+    ndarray
+        (n, 3) array of `profile_inputs` with n <= chunk_size
+    """
+    if isinstance(profile, (str, os.PathLike)):
+        extension = os.path.splitext(profile)[1].lower()
+        if extension == '.npy':
+            yield from _iter_array_chunks(np.load(profile, mmap_mode='r'), chunk_size)
+        elif extension == '.csv':
+            yield from _iter_csv_chunks(profile, chunk_size)
+        else:
+            raise ValueError(f"Unsupported drive cycle profile file: {profile}")
+    elif isinstance(profile, np.ndarray):
+        yield from _iter_array_chunks(profile, chunk_size)
+    else:
+        yield from _iter_generator_chunks(profile, chunk_size)
+
+
+def _npy_header(dtype, n_samples):
+    return repr({'descr': np.lib.format.dtype_to_descr(dtype),
+                 'fortran_order': False,
+                 'shape': (n_samples,)})
+
+
+def _write_npy_header(file, dtype, n_samples):
+    """
+    Write a version 1.0 .npy header for a 1D array of `dtype`. The header is
+    always padded to the size needed for the largest possible sample count, so
+    it can be rewritten in place once the number of streamed samples is known.
+    """
+    magic = np.lib.format.magic(1, 0)
+    header_len = len(_npy_header(dtype, np.iinfo(np.int64).max)) + 1
+    header_len += -(len(magic) + 2 + header_len) % 64
+
+    header = _npy_header(dtype, n_samples).ljust(header_len - 1) + '\n'
+    file.write(magic)
+    file.write(struct.pack('<H', header_len))
+    file.write(header.encode('latin1'))
+
+
+class DriveCycleRunner:
+    """
+    Evaluate a fixed Inverter design over a long drive or mission profile.
+
+    A single Problem with `num_nodes=chunk_size` is set up once and reused for
+    every chunk of the profile. Results are streamed to a .npy file on disk, so
+    neither the profile nor the results are ever held in memory in full.
+
+    Parameters
+    ----------
+    design : dict, optional
+        Values for the Inverter inputs, defaults to `analysis.baseline_design`
+    chunk_size : int
+        Number of samples evaluated per run of the model
+    **inverter_options
+        Options passed to the Inverter group
+    """
+
+    def __init__(self, design=None, chunk_size=4096, **inverter_options):
+        self.chunk_size = chunk_size
+        self.prob = setup_inverter_problem(num_nodes=chunk_size,
+                                           values=design,
+                                           **inverter_options)
+        self.dtype = _output_dtype(
+            inverter_options.get('use_filter_inductor', True))
+
+    def evaluate_chunk(self, chunk):
+        """
+        Evaluate up to `chunk_size` samples of (I_phase_rms,
+        electrical_frequency, bus_voltage) and return a structured array of
+        the results. Infeasible samples have NaN outputs.
+        """
+        n_samples = chunk.shape[0]
+        if n_samples < self.chunk_size:
+            chunk = np.pad(chunk, ((0, self.chunk_size - n_samples), (0, 0)),
+                           mode='edge')
+
+        set_values(self.prob, dict(zip(profile_inputs, chunk.T)))
+        feasible = run_analysis(self.prob)
+
+        results = np.empty(n_samples, dtype=self.dtype)
+        results['feasible'] = feasible[:n_samples]
+        for name in self.dtype.names[:-1]:
+            value = self.prob.get_val(drive_cycle_outputs[name])[:n_samples]
+            results[name] = np.where(results['feasible'], value, np.nan)
+        return results
+
+    def run(self, profile, output_path):
+        """
+        Evaluate every sample in `profile` (see `iter_profile`) and write the
+        results to the .npy file `output_path`.
+
+        Returns
+        -------
+        np.memmap
+            Read-only memory-mapped view of the structured results array
+        """
+        n_samples = 0
+        with open(output_path, 'wb') as file:
+            _write_npy_header(file, self.dtype, 0)
+            for chunk in iter_profile(profile, self.chunk_size):
+                results = self.evaluate_chunk(chunk)
+                file.write(results.tobytes())
+                n_samples += results.size
+
+            file.seek(0)
+            _write_npy_header(file, self.dtype, n_samples)
+
+        return np.load(output_path, mmap_mode='r')
@@ -0,0 +1,233 @@
+import os
+
+import numpy as np
+
+from .analysis import run_analysis, set_values, setup_inverter_problem
+
+
+# Axes of an efficiency map, in order
+map_axes = ('I_phase_rms', 'electrical_frequency', 'bus_voltage')
+
+# Maps of an efficiency map, keyed by map name
+efficiency_map_outputs = {
+    'efficiency': 'efficiency',
+    'total_loss': 'total_loss',
+    'power_out': 'power_out',
+    'mosfet_loss': 'mosfet.P_loss',
+    'inductor_core_loss': 'ac_filter_inductor.P_loss_core',
+    'inductor_copper_loss': 'ac_filter_inductor.P_loss_copper',
+    'capacitor_loss': 'dc_link_cap.P_loss',
+}
+
+
+def _map_names(use_filter_inductor=True):
+    return [name for name in efficiency_map_outputs
+            if use_filter_inductor or not name.startswith('inductor_')]
+
+
+def generate_efficiency_map(path, I_phase_rms, electrical_frequency, bus_voltage,
+                            design=None, batch_size=None, dtype=np.float32,
+                            **inverter_options):
+    """
+    Evaluate a fixed Inverter design at every point of the grid spanned by
+    the `map_axes` and save the efficiency, power and loss breakdown maps to
+    the .npy file `path`.
+
+    The whole grid is evaluated in a single run of a Problem with one node per
+    grid point, unless `batch_size` limits the number of nodes per run.
+    Operating points with a modulation index too high for the bus voltage are
+    NaN in every map.
+
+    The file holds a single record whose fields are the grid points of each
+    axis, the map 'names', and the 'maps' array of shape (*axes, n_maps) with
+    every map of a grid point stored together. It can be memory-mapped, see
+    `EfficiencyMap.load`.
+
+    Parameters
+    ----------
+    I_phase_rms, electrical_frequency, bus_voltage : array_like
+        Increasing grid points of each axis, a single point for a map at a
+        fixed value, e.g. of the bus voltage
+    design : dict, optional
+        Values of the other Inverter inputs, defaults to
+        `analysis.baseline_design`
+    batch_size : int, optional
+        Maximum number of nodes per run of the model
+    dtype : numpy dtype
+        Type of the stored maps
+
+    Returns
+    -------
+    EfficiencyMap
+        The memory-mapped maps
+    """
+    axes = {'I_phase_rms': np.asarray(I_phase_rms, dtype=float),
+            'electrical_frequency': np.asarray(electrical_frequency, dtype=float),
+            'bus_voltage': np.asarray(bus_voltage, dtype=float)}
+    for name, points in axes.items():
+        if points.ndim != 1 or points.size == 0 or np.any(np.diff(points) <= 0):
+            raise ValueError(f"The grid points of '{name}' must be strictly increasing")
+
+    shape = tuple(points.size for points in axes.values())
+    grid = np.meshgrid(*axes.values(), indexing='ij')
+    cases = {name: values.ravel() for name, values in zip(axes, grid)}
+    n_cases = cases['I_phase_rms'].size
+    batch_size = n_cases if batch_size is None else min(batch_size, n_cases)
+
+    names = _map_names(inverter_options.get('use_filter_inductor', True))
+    prob = setup_inverter_problem(num_nodes=batch_size, values=design, **inverter_options)
+
+    maps = np.empty((n_cases, len(names)), dtype=dtype)
+    for start in range(0, n_cases, batch_size):
+        n_batch = min(batch_size, n_cases - start)
+        batch = slice(start, start + n_batch)
+        set_values(prob, {name: np.pad(values[batch], (0, batch_size - n_batch), mode='edge')
+                          for name, values in cases.items()})
+        feasible = run_analysis(prob)[:n_batch]
+        for i, name in enumerate(names):
+            value = prob.get_val(efficiency_map_outputs[name])[:n_batch]
+            maps[batch, i] = np.where(feasible, value, np.nan)
+
+    record = np.zeros((), dtype=[(name, float, points.shape) for name, points in axes.items()] +
+                      [('names', f'U{max(len(name) for name in names)}', (len(names),)),
+                       ('maps', dtype, shape + (len(names),))])
+    for name, points in axes.items():
+        record[name] = points
+    record['names'] = names
+    record['maps'] = maps.reshape(shape + (len(names),))
+
+    # Write then rename, so that a crash never leaves a partial map behind
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        np.save(file, record)
+    os.replace(tmp_path, path)
+
+    return EfficiencyMap.load(path)
+
+
+class EfficiencyMap:
+    """
+    Vectorized multilinear interpolation of maps tabulated on a rectilinear
+    grid, e.g. those of `generate_efficiency_map`.
+
+    Queries outside of the grid are clamped to its boundary. Evenly spaced
+    axes are indexed arithmetically rather than searched, and axes of a single
+    grid point are constant.
+
+    Parameters
+    ----------
+    axes : dict
+        Increasing grid points of each axis, in the order of the dimensions of
+        `maps`
+    names : iterable of str
+        Names of the maps, in the order of the last dimension of `maps`
+    maps : ndarray
+        Values of every map at every grid point, of shape (*axes, n_maps)
+    chunk_size : int
+        Number of points interpolated at once
+    """
+
+    def __init__(self, axes, names, maps, chunk_size=8192):
+        self.axes = {name: np.asarray(points, dtype=float) for name, points in axes.items()}
+        self.names = [str(name) for name in names]
+        self.shape = tuple(points.size for points in self.axes.values())
+        if maps.shape != self.shape + (len(self.names),):
+            raise ValueError(f"Maps of shape {maps.shape} do not match the grid "
+                             f"{self.shape} of {len(self.names)} maps")
+        self.maps = maps
+        self.chunk_size = chunk_size
+        # A plain view of a memory map is faster to index
+        self._rows = np.asarray(maps).reshape(-1, len(self.names))
+        self._has_nan = bool(np.isnan(self._rows).any())
+
+        self._strides = np.cumprod((self.shape + (1,))[:0:-1])[::-1]
+        self._uniform = {name: points.size > 1 and
+                         np.allclose(np.diff(points), points[1] - points[0], rtol=1e-12, atol=0.0)
+                         for name, points in self.axes.items()}
+        # Offsets of the rows of the 2**d corners of a cell from its first
+        # corner. The bits of a corner, last axis lowest, are set for the axes
+        # along which it is the upper end of the cell. A cell of a single
+        # point axis has the same lower and upper end.
+        corners = np.arange(2**len(self.shape))
+        self._upper = (corners[:, None] >> np.arange(len(self.shape))[::-1]) & 1
+        self._offsets = (self._upper * (np.array(self.shape) > 1)) @ self._strides
+
+    @classmethod
+    def load(cls, path, mmap=True, chunk_size=8192):
+        """
+        Load the maps saved by `generate_efficiency_map`, memory-mapped unless
+        `mmap` is False
+        """
+        record = np.load(path, mmap_mode='r' if mmap else None)
+        names = list(record['names'])
+        axes = {name: np.array(record[name]) for name in record.dtype.names
+                if name not in ('names', 'maps')}
+        return cls(axes, names, record['maps'], chunk_size=chunk_size)
+
+    def _cells(self, points):
+        """
+        Index of the first corner of the cell holding each point, and the
+        point's fractional position within the cell along each axis
+        """
+        index = np.zeros(points[0].shape, dtype=np.intp)
+        fractions = []
+        for d, (name, axis) in enumerate(self.axes.items()):
+            x = points[d]
+            if axis.size == 1:
+                i = np.zeros(x.shape, dtype=np.intp)
+                t = np.zeros(x.shape)
+            elif self._uniform[name]:
+                position = np.clip((x - axis[0]) / (axis[1] - axis[0]), 0, axis.size - 1)
+                i = np.minimum(position.astype(np.intp), axis.size - 2)
+                t = position - i
+            else:
+                i = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, axis.size - 2)
+                t = np.clip((x - axis[i]) / (axis[i + 1] - axis[i]), 0.0, 1.0)
+            index += i * self._strides[d]
+            fractions.append(t)
+        return index, fractions
+
+    def interpolate(self, *points):
+        """
+        Interpolate every map at the points given by one array per axis
+
+        Returns
+        -------
+        ndarray
+            Values of shape (n_points, n_maps), of the type of the maps
+        """
+        points = [np.ravel(np.asarray(x, dtype=float)) for x in points]
+        n_points = points[0].size
+        values = np.empty((n_points, len(self.names)), dtype=self._rows.dtype)
+
+        # Chunks keep the temporaries in cache
+        for start in range(0, n_points, self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            index, fractions = self._cells([x[chunk] for x in points])
+            corners = [np.take(self._rows, index + offset, axis=0)
+                       for offset in self._offsets]
+            # Neighbouring corners differ along the last remaining axis
+            for t in fractions[::-1]:
+                t = t.astype(self._rows.dtype)[:, None]
+                corners = [self._lerp(lower, upper, t)
+                           for lower, upper in zip(corners[0::2], corners[1::2])]
+            values[chunk] = corners[0]
+        return values
+
+    def _lerp(self, lower, upper, t):
+        value = lower + t * (upper - lower)
+        if not self._has_nan:
+            return value
+        # Grid points next to a NaN (infeasible) one keep their value
+        return np.where(t == 0, lower, np.where(t == 1, upper, value))
+
+    def __call__(self, I_phase_rms, electrical_frequency, bus_voltage, names=None):
+        """
+        Interpolate the maps `names` (defaults to every map) at each operating
+        point, returned as a dict of arrays of the broadcast shape of the
+        operating point arrays
+        """
+        points = np.broadcast_arrays(I_phase_rms, electrical_frequency, bus_voltage)
+        values = self.interpolate(*points)
+        return {name: values[:, self.names.index(name)].reshape(points[0].shape)
+                for name in (self.names if names is None else names)}
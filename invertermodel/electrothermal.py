@@ -0,0 +1,88 @@
+import numpy as np
+
+
+# Default thermal resistances, per switch, per phase inductor and for the DC
+# link capacitor bank as a whole, and ambient temperature of the coupled
+# Inverter, by promoted name
+thermal_defaults = {
+    'temperature_ambient': (313.15, 'K'),
+
+    'mosfet_thermal.resistance_junction_to_case': (0.24, 'K/W'),
+    'mosfet_thermal.resistance_case_to_sink': (0.1, 'K/W'),
+    'mosfet_thermal.resistance_sink_to_air': (0.2, 'K/W'),
+
+    'inductor_thermal.resistance_core_to_windings': (1.0, 'K/W'),
+    'inductor_thermal.resistance_windings_to_sink': (0.5, 'K/W'),
+    'inductor_thermal.resistance_sink_to_air': (1.0, 'K/W'),
+
+    'dc_link_cap_thermal.resistance_hotspot_to_case': (1.5, 'K/W'),
+    'dc_link_cap_thermal.resistance_case_to_air': (4.0, 'K/W'),
+}
+
+# Rated upper limits of the temperatures of the coupled Inverter, in degC
+thermal_limits = {
+    'mosfet_thermal.temperature_junction': 150.0,
+    'inductor_thermal.temperature_windings': 155.0,
+    'dc_link_cap_thermal.temperature_hotspot': 105.0,
+}
+
+
+class TemperatureDependence:
+    """
+    Linear temperature dependence of one input of a loss component,
+        value = value_ref * (1 + tempco * (T - T_ref)),
+    where the input `name` holds value_ref, the value at `reference_temperature`
+    (degC). The component gains the temperature input `temperature` and the
+    temperature coefficient input `<name>_tempco`.
+    """
+
+    def __init__(self, name, temperature, reference_temperature, tempco):
+        self.name = name
+        self.temperature = temperature
+        self.tempco = f'{name}_tempco'
+        self.reference_temperature = reference_temperature
+        self.default_tempco = tempco
+
+    def add_inputs(self, component, desc):
+        nn = component.options['num_nodes']
+        component.add_input(self.temperature, val=self.reference_temperature, shape=nn,
+                            units='degC', desc=desc)
+        component.add_input(self.tempco, val=self.default_tempco, shape=nn, units='1/K',
+                            desc=f"Temperature coefficient of the {self.name}")
+
+    def declare_partials(self, component, of):
+        ar = np.arange(component.options['num_nodes'])
+        component.declare_partials(of, [self.temperature, self.tempco], rows=ar, cols=ar)
+
+    def factor(self, inputs):
+        return 1 + inputs[self.tempco] * (inputs[self.temperature] - self.reference_temperature)
+
+    def scaled(self, inputs):
+        """
+        View of `inputs` in which `name` holds its value at the temperature
+        """
+        return _ScaledInputs(inputs, self.name, inputs[self.name] * self.factor(inputs))
+
+    def chain_partials(self, inputs, partials, of):
+        """
+        Turn the partials of `of` with respect to the scaled value, computed
+        from `scaled(inputs)`, into partials with respect to the reference
+        value, the temperature and the temperature coefficient
+        """
+        value_ref = inputs[self.name]
+        for output in of:
+            d_value = np.array(partials[output, self.name])
+            partials[output, self.name] = d_value * self.factor(inputs)
+            partials[output, self.temperature] = d_value * value_ref * inputs[self.tempco]
+            partials[output, self.tempco] = d_value * value_ref * \
+                (inputs[self.temperature] - self.reference_temperature)
+
+
+class _ScaledInputs:
+    def __init__(self, inputs, name, value):
+        self._inputs = inputs
+        self._name = name
+        self._value = value
+
+    def __getitem__(self, name):
+        return self._value if name == self._name else self._inputs[name]
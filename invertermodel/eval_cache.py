@@ -0,0 +1,156 @@
+import functools
+import hashlib
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EvaluationCache:
+    """
+    Least recently used cache of component outputs and partials, keyed on a
+    hash of the component's input vector.
+
+    A single cache is normally shared by every component of an Inverter (see
+    its `cache` option), and may be shared across Problems: entries are
+    namespaced by component class, path and options, so identical components
+    share entries.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Memory budget of the cached arrays, the least recently used entries are
+        evicted once it is exceeded
+    """
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._namespaces = weakref.WeakKeyDictionary()
+        self._stats = {kind: {'hits': 0, 'misses': 0}
+                       for kind in ('compute', 'partials')}
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _namespace(self, component):
+        namespace = self._namespaces.get(component)
+        if namespace is None:
+            options = sorted((name, repr(value))
+                             for name, value in component.options.items()
+                             if name != 'cache')
+            namespace = repr((type(component).__qualname__,
+                              component.pathname,
+                              options)).encode()
+            self._namespaces[component] = namespace
+        return namespace
+
+    def key(self, component, kind, inputs, discrete_inputs=None):
+        digest = hashlib.blake2b(self._namespace(component), digest_size=16)
+        digest.update(kind.encode())
+        digest.update(inputs.asarray().tobytes())
+        if discrete_inputs:
+            digest.update(repr(sorted(discrete_inputs.items())).encode())
+        return kind, digest.digest()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self._stats[key[0]]['misses'] += 1
+        else:
+            self._stats[key[0]]['hits'] += 1
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        Store `value`, an array or a dict of arrays, under `key`
+        """
+        nbytes = value.nbytes if isinstance(value, np.ndarray) else \
+            sum(array.nbytes for array in value.values())
+        if nbytes > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1]
+        self._entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    def stats(self):
+        """
+        Hit and miss counts of the cached outputs and partials, along with the
+        size of the cache
+        """
+        stats = {kind: dict(counts) for kind, counts in self._stats.items()}
+        for counts in stats.values():
+            n_lookups = counts['hits'] + counts['misses']
+            counts['hit_rate'] = counts['hits'] / n_lookups if n_lookups else 0.0
+        stats.update(n_entries=len(self._entries),
+                     nbytes=self.nbytes,
+                     evictions=self.evictions)
+        return stats
+
+    def reset_stats(self):
+        for counts in self._stats.values():
+            counts['hits'] = counts['misses'] = 0
+        self.evictions = 0
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+
+def cached_compute(compute):
+    """
+    Decorator of an ExplicitComponent's compute, looking its outputs up in the
+    EvaluationCache of the component's `cache` option first
+    """
+    @functools.wraps(compute)
+    def wrapper(self, inputs, outputs, *args):
+        cache = self.options['cache']
+        if cache is None or self.under_complex_step:
+            return compute(self, inputs, outputs, *args)
+
+        key = cache.key(self, 'compute', inputs, *args[:1])
+        entry = cache.get(key)
+        if entry is not None:
+            outputs.set_val(entry[0])
+            return
+
+        compute(self, inputs, outputs, *args)
+        cache.put(key, outputs.asarray().copy())
+
+    return wrapper
+
+
+def cached_compute_partials(compute_partials):
+    """
+    Decorator of an ExplicitComponent's compute_partials, looking its analytic
+    partials up in the EvaluationCache of the component's `cache` option first
+    """
+    @functools.wraps(compute_partials)
+    def wrapper(self, inputs, partials, *args):
+        cache = self.options['cache']
+        if cache is None or self.options['use_cs'] or self.under_complex_step:
+            return compute_partials(self, inputs, partials, *args)
+
+        key = cache.key(self, 'partials', inputs, *args[:1])
+        entry = cache.get(key)
+        if entry is not None:
+            for subjac, value in entry[0].items():
+                partials[subjac] = value
+            return
+
+        compute_partials(self, inputs, partials, *args)
+        cache.put(key, {subjac: np.array(value, copy=True)
+                        for subjac, value in partials.items()})
+
+    return wrapper
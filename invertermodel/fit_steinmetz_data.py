@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, asdict
+
+import numpy as np
+
+
+_table_pattern = re.compile(r'^_loss_vs_gauss_(\d+(?:\.\d+)?)(hz|khz|mhz)$')
+
+_frequency_scale = {'hz': 1.0, 'khz': 1e3, 'mhz': 1e6}
+_flux_density_scale = {'G': 1.0, 'T': 1e4}
+
+
+@dataclass(frozen=True)
+class SteinmetzFit:
+    """
+    Fitted Steinmetz coefficients and the quality of the fit
+
+    r_squared and rms_log_error are computed on log(loss), max_relative_error
+    on the loss itself.
+    """
+    k: float
+    alpha: float
+    beta: float
+    r_squared: float
+    rms_log_error: float
+    max_relative_error: float
+    n_points: int
+    table_hash: str
+
+    @property
+    def params(self):
+        return np.array([self.k, self.alpha, self.beta])
+
+
+def material_name(material):
+    return getattr(material, '__name__', type(material).__name__)
+
+
+def loss_tables(material):
+    """
+    Collect every loss table of `material`, converted to the material's
+    `f_units` and `B_units`. Loss tables are attributes named
+    `_loss_vs_gauss_<frequency><unit>` (e.g. `_loss_vs_gauss_10khz`) holding rows
+    of (flux density in gauss, loss).
+
+    Returns
+    -------
+    frequency, B, loss : ndarray
+        Flattened data points of all of the tables
+    """
+    f_scale = _frequency_scale[material.f_units.lower()]
+    B_scale = _flux_density_scale[material.B_units]
+
+    frequency, B, loss = [], [], []
+    for attr in sorted(dir(material)):
+        match = _table_pattern.match(attr)
+        if match is None:
+            continue
+        table = np.asarray(getattr(material, attr), dtype=float)
+        table_f = float(match.group(1)) * _frequency_scale[match.group(2)]
+        frequency.append(np.full(table.shape[0], table_f / f_scale))
+        B.append(table[:, 0] / B_scale)
+        loss.append(table[:, 1])
+
+    if not frequency:
+        raise ValueError(
+            f"Core material {material_name(material)} has no loss tables to fit")
+
+    return np.concatenate(frequency), np.concatenate(B), np.concatenate(loss)
+
+
+def table_hash(frequency, B, loss):
+    data = np.ascontiguousarray(np.stack([frequency, B, loss]), dtype=float)
+    return hashlib.sha256(data.tobytes()).hexdigest()
+
+
+def fit_steinmetz_batch(datasets):
+    """
+    Fit the Steinmetz coefficients, P = k * f**alpha * B**beta, of many datasets
+    at once. Each fit is a linear least-squares fit of log(P), and the normal
+    equations of every dataset are solved in a single batched call.
+
+    Parameters
+    ----------
+    datasets : list of (frequency, B, loss) tuples
+
+    Returns
+    -------
+    list of SteinmetzFit
+    """
+    if not datasets:
+        return []
+
+    counts = np.array([len(data[0]) for data in datasets])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    frequency, B, loss = (np.concatenate([data[i] for data in datasets])
+                          for i in range(3))
+
+    # log(loss) = log(k) + alpha*log(f) + beta*log(B)
+    A = np.column_stack([np.ones_like(frequency), np.log(frequency), np.log(B)])
+    y = np.log(loss)
+
+    # Per-dataset normal equations, assembled with segment sums
+    AtA = np.add.reduceat(A[:, :, None] * A[:, None, :], offsets, axis=0)
+    Aty = np.add.reduceat(A * y[:, None], offsets, axis=0)
+    x = np.linalg.solve(AtA, Aty[:, :, None])[:, :, 0]
+
+    dataset_index = np.repeat(np.arange(len(datasets)), counts)
+    y_fit = np.einsum('ij,ij->i', A, x[dataset_index])
+    residual = y - y_fit
+
+    y_mean = np.add.reduceat(y, offsets) / counts
+    ss_res = np.add.reduceat(residual**2, offsets)
+    ss_tot = np.add.reduceat((y - y_mean[dataset_index])**2, offsets)
+    relative_error = np.abs(np.expm1(y_fit - y))
+    max_relative_error = np.maximum.reduceat(relative_error, offsets)
+
+    fits = []
+    for i, data in enumerate(datasets):
+        fits.append(SteinmetzFit(k=float(np.exp(x[i, 0])),
+                                 alpha=float(x[i, 1]),
+                                 beta=float(x[i, 2]),
+                                 r_squared=float(1 - ss_res[i] / ss_tot[i]),
+                                 rms_log_error=float(
+                                     np.sqrt(ss_res[i] / counts[i])),
+                                 max_relative_error=float(
+                                     max_relative_error[i]),
+                                 n_points=int(counts[i]),
+                                 table_hash=table_hash(*data)))
+    return fits
+
+
+def fit_steinmetz(frequency, B, loss):
+    """
+    Fit the Steinmetz coefficients of a single dataset
+    """
+    return fit_steinmetz_batch([(np.asarray(frequency, dtype=float),
+                                 np.asarray(B, dtype=float),
+                                 np.asarray(loss, dtype=float))])[0]
+
+
+def _default_cache_path():
+    cache_home = os.environ.get('XDG_CACHE_HOME',
+                                os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'invertermodel', 'steinmetz_fits.json')
+
+
+class SteinmetzCache:
+    """
+    Cache of Steinmetz fits keyed on the hash of the loss table data, so a
+    material is only refit when its tables change. Fits are kept in memory
+    and, if `path` is not None, persisted to a JSON file.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._fits = None
+
+    def _load(self):
+        if self._fits is None:
+            self._fits = {}
+            if self.path is not None and os.path.exists(self.path):
+                with open(self.path) as file:
+                    self._fits = {key: SteinmetzFit(**fit)
+                                  for key, fit in json.load(file).items()}
+        return self._fits
+
+    def get(self, key):
+        return self._load().get(key)
+
+    def update(self, fits):
+        self._load().update({fit.table_hash: fit for fit in fits})
+        if self.path is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w') as file:
+                    json.dump({key: asdict(fit) for key, fit in self._fits.items()},
+                              file, indent=2)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                # A read-only cache location only costs a refit next time
+                pass
+
+    def clear(self):
+        self._fits = {}
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+default_cache = SteinmetzCache(_default_cache_path())
+
+
+def fit_materials(materials, cache=default_cache):
+    """
+    Fit the Steinmetz coefficients of every material in `materials`, reusing
+    cached fits for any material whose loss tables have not changed
+
+    Returns
+    -------
+    dict
+        SteinmetzFit keyed by material name
+    """
+    datasets = {material_name(material): loss_tables(material)
+                for material in materials}
+    hashes = {name: table_hash(*data) for name, data in datasets.items()}
+
+    fits = {}
+    if cache is not None:
+        for name, key in hashes.items():
+            fit = cache.get(key)
+            if fit is not None:
+                fits[name] = fit
+
+    missing = [name for name in datasets if name not in fits]
+    new_fits = fit_steinmetz_batch([datasets[name] for name in missing])
+    fits.update(zip(missing, new_fits))
+    if cache is not None and new_fits:
+        cache.update(new_fits)
+
+    return {name: fits[name] for name in datasets}
+
+
+def steinmetz_params(material, cache=default_cache):
+    """
+    Steinmetz coefficients (k, alpha, beta) fit to the loss tables of
+    `material`, in the material's units
+    """
+    return fit_materials([material], cache=cache)[material_name(material)].params
+
+
+if __name__ == "__main__":
+    from . import inductor_core_materials
+
+    for name, fit in fit_materials([inductor_core_materials.FE4491], cache=None).items():
+        print(f"{name}: k = {fit.k}, alpha = {fit.alpha}, beta = {fit.beta}, "
+              f"R^2 = {fit.r_squared:.5f}, max relative error = {fit.max_relative_error:.3%}")
@@ -26,7 +26,8 @@ class FE4491:
         https://www.samaterials.com/amorphous-inductor-filter-core.html
 
     The Steinmetz coefficients have been obtained by curve fitting experimentally obtained loss
-    data at different flux density and frequency excitations in the file fit_steinmetz_data.py
+    data at different flux density and frequency excitations, stored below. The tables can be
+    refit with invertermodel.fit_steinmetz_data
     """
     saturation_flux: float = 1.56
     relative_permeability = np.array([200, 1200])
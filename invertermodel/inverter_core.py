@@ -0,0 +1,187 @@
+import numpy as np
+
+import openmdao.api as om
+
+from .physics import operating_point, performance
+
+
+class InverterOperatingPoint(om.ExplicitComponent):
+    """
+    Fused equivalent of the Inverter's combined_inductance, phase_voltage,
+    power_factor, modulation_index, modulation_index_residual and power_out
+    ExecComps, which precede the ripple and DC link models
+    """
+
+    def initialize(self):
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("use_cs", default=False, types=bool,
+                             desc="Compute partials with complex step instead of analytically")
+
+    def setup(self):
+        nn = self.options['num_nodes']
+        ar = np.arange(nn)
+
+        self.add_input("load_inductance", shape=nn, units='H')
+        self.add_input("filter_inductance", val=np.zeros(nn), units='H')
+        self.add_input("load_phase_back_emf", shape=nn, units='V')
+        self.add_input("load_phase_resistance", shape=nn, units='ohm')
+        self.add_input("I_phase_rms", shape=nn, units='A')
+        self.add_input("electrical_frequency", shape=nn, units='Hz')
+        self.add_input("bus_voltage", shape=nn, units='V')
+        self.add_input("modulation_index_slack", shape=nn, units='unitless')
+
+        self.add_output("L", shape=nn, units='H')
+        self.add_output("phase_voltage", shape=nn, units='V')
+        self.add_output("power_factor", shape=nn, units='unitless')
+        self.add_output("modulation_index", shape=nn, units='unitless')
+        self.add_output("modulation_index_residual", shape=nn, units='unitless')
+        self.add_output("power_out", shape=nn, units='W')
+
+        if self.options['use_cs']:
+            self.declare_partials('*', '*', rows=ar, cols=ar, method='cs')
+            return
+
+        self.declare_partials('L', ['load_inductance', 'filter_inductance'],
+                              rows=ar, cols=ar, val=1.0)
+        voltage_inputs = ['load_inductance', 'filter_inductance',
+                          'load_phase_back_emf', 'load_phase_resistance',
+                          'I_phase_rms', 'electrical_frequency']
+        self.declare_partials(['phase_voltage', 'power_factor', 'power_out'],
+                              voltage_inputs, rows=ar, cols=ar)
+        self.declare_partials(['modulation_index', 'modulation_index_residual'],
+                              voltage_inputs + ['bus_voltage'], rows=ar, cols=ar)
+        self.declare_partials('modulation_index_residual', 'modulation_index_slack',
+                              rows=ar, cols=ar, val=-1.0)
+
+    def compute(self, inputs, outputs):
+        for name, value in operating_point(inputs['load_inductance'],
+                                           inputs['filter_inductance'],
+                                           inputs['load_phase_back_emf'],
+                                           inputs['load_phase_resistance'],
+                                           inputs['I_phase_rms'],
+                                           inputs['electrical_frequency'],
+                                           inputs['bus_voltage']).items():
+            outputs[name] = value
+        outputs['modulation_index_residual'] = outputs['modulation_index'] - \
+            inputs['modulation_index_slack']
+
+    def compute_partials(self, inputs, partials):
+        if self.options['use_cs']:
+            return
+
+        L = inputs['load_inductance'] + inputs['filter_inductance']
+        load_phase_back_emf = inputs['load_phase_back_emf']
+        load_phase_resistance = inputs['load_phase_resistance']
+        I_phase_rms = inputs['I_phase_rms']
+        electrical_frequency = inputs['electrical_frequency']
+        bus_voltage = inputs['bus_voltage']
+
+        # phase_voltage = sqrt(a**2 + b**2)
+        k = 2**0.5
+        a = load_phase_back_emf + load_phase_resistance * k * I_phase_rms
+        b = 2*np.pi*L*electrical_frequency*k*I_phase_rms
+        phase_voltage = np.sqrt(a**2 + b**2)
+        dV = {'load_phase_back_emf': a / phase_voltage,
+              'load_phase_resistance': a * k * I_phase_rms / phase_voltage,
+              'I_phase_rms': (a * load_phase_resistance * k +
+                              b * 2*np.pi*L*electrical_frequency*k) / phase_voltage,
+              'electrical_frequency': b * 2*np.pi*L*k*I_phase_rms / phase_voltage}
+        dV['load_inductance'] = dV['filter_inductance'] = \
+            b * 2*np.pi*electrical_frequency*k*I_phase_rms / phase_voltage
+
+        for name, dV_dx in dV.items():
+            partials['phase_voltage', name] = dV_dx
+            partials['power_factor', name] = -load_phase_back_emf / phase_voltage**2 * dV_dx
+            partials['modulation_index', name] = 2 * dV_dx / bus_voltage
+            partials['modulation_index_residual', name] = 2 * dV_dx / bus_voltage
+            partials['power_out', name] = I_phase_rms * dV_dx
+
+        partials['power_factor', 'load_phase_back_emf'] = 1 / phase_voltage - \
+            load_phase_back_emf / phase_voltage**2 * dV['load_phase_back_emf']
+        partials['power_out', 'I_phase_rms'] = phase_voltage + \
+            I_phase_rms * dV['I_phase_rms']
+        partials['modulation_index', 'bus_voltage'] = -2 * phase_voltage / bus_voltage**2
+        partials['modulation_index_residual', 'bus_voltage'] = \
+            -2 * phase_voltage / bus_voltage**2
+
+
+class InverterPerformance(om.ExplicitComponent):
+    """
+    Fused equivalent of the Inverter's ripple, total_loss, efficiency and mass
+    ExecComps, which follow the ripple and DC link models
+    """
+
+    def initialize(self):
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("use_cs", default=False, types=bool,
+                             desc="Compute partials with complex step instead of analytically")
+
+    def setup(self):
+        nn = self.options['num_nodes']
+        ar = np.arange(nn)
+
+        self.add_input("current_ripple", shape=nn, units='A')
+        self.add_input("voltage_ripple", shape=nn, units='V')
+        self.add_input("I_phase_rms", shape=nn, units='A')
+        self.add_input("bus_voltage", shape=nn, units='V')
+        self.add_input("mosfet_loss", shape=nn, units='W')
+        self.add_input("inductor_loss", val=np.zeros(nn), units='W')
+        self.add_input("capacitor_loss", shape=nn, units='W')
+        self.add_input("power_out", shape=nn, units='W')
+        self.add_input("inductor_mass", val=np.zeros(nn), units='kg')
+        self.add_input("cap_mass", shape=nn, units='kg')
+
+        self.add_output("I_ripple", shape=nn, units='unitless')
+        self.add_output("V_ripple", shape=nn, units='unitless')
+        self.add_output("total_loss", shape=nn, units='W')
+        self.add_output("efficiency", shape=nn, units='unitless')
+        self.add_output("mass", shape=nn, units='kg')
+
+        if self.options['use_cs']:
+            self.declare_partials('*', '*', rows=ar, cols=ar, method='cs')
+            return
+
+        losses = ['mosfet_loss', 'inductor_loss', 'capacitor_loss']
+        self.declare_partials('I_ripple', ['current_ripple', 'I_phase_rms'],
+                              rows=ar, cols=ar)
+        self.declare_partials('V_ripple', ['voltage_ripple', 'bus_voltage'],
+                              rows=ar, cols=ar)
+        self.declare_partials('total_loss', losses, rows=ar, cols=ar, val=1.0)
+        self.declare_partials('efficiency', losses + ['power_out'], rows=ar, cols=ar)
+        self.declare_partials('mass', ['inductor_mass', 'cap_mass'],
+                              rows=ar, cols=ar, val=1.0)
+
+    def compute(self, inputs, outputs):
+        for name, value in performance(inputs['current_ripple'],
+                                       inputs['voltage_ripple'],
+                                       inputs['I_phase_rms'],
+                                       inputs['bus_voltage'],
+                                       inputs['mosfet_loss'],
+                                       inputs['inductor_loss'],
+                                       inputs['capacitor_loss'],
+                                       inputs['power_out'],
+                                       inputs['inductor_mass'],
+                                       inputs['cap_mass']).items():
+            outputs[name] = value
+
+    def compute_partials(self, inputs, partials):
+        if self.options['use_cs']:
+            return
+
+        I_phase_rms = inputs['I_phase_rms']
+        bus_voltage = inputs['bus_voltage']
+        power_out = inputs['power_out']
+        total_loss = inputs['mosfet_loss'] + inputs['inductor_loss'] + \
+            inputs['capacitor_loss']
+
+        partials['I_ripple', 'current_ripple'] = 1 / I_phase_rms
+        partials['I_ripple', 'I_phase_rms'] = -inputs['current_ripple'] / I_phase_rms**2
+        partials['V_ripple', 'voltage_ripple'] = 1 / bus_voltage
+        partials['V_ripple', 'bus_voltage'] = -inputs['voltage_ripple'] / bus_voltage**2
+
+        deff_dloss = -power_out / (power_out + total_loss)**2
+        for name in ('mosfet_loss', 'inductor_loss', 'capacitor_loss'):
+            partials['efficiency', name] = deff_dloss
+        partials['efficiency', 'power_out'] = total_loss / (power_out + total_loss)**2
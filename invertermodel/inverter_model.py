@@ -4,25 +4,62 @@ import openmdao.api as om
 
 from .ac_filter_inductor import ACFilterInductor
 from .dc_link_cap import DCLinkCapacitor
+from .electrothermal import thermal_defaults
+from .eval_cache import EvaluationCache
+from .inverter_core import InverterOperatingPoint, InverterPerformance
+from .mosfet_devices import MOSFETDevice
 from .mosfet_loss import MOSFETLoss
+from .physics import C2M0025120D
+from .pwm import PWMWaveform
 from .ripple_current import RippleCurrent
+from .thermal import ACFilterInductorThermalNetwork, DCLinkCapacitorThermalNetwork, \
+    MOSFETThermalNetwork
 
 
 class Inverter(om.Group):
     def initialize(self):
         self.options.declare("use_filter_inductor", default=True)
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("use_cs", default=False, types=bool,
+                             desc="Compute component partials with complex step instead of analytically")
+        self.options.declare("cache", default=None, types=EvaluationCache, allow_none=True,
+                             desc="Cache of the component outputs and partials, keyed on their inputs")
+        self.options.declare("mosfet_device", default=None, types=(str, MOSFETDevice), allow_none=True,
+                             desc="Name or MOSFETDevice of tabulated switching energies and on-state "
+                                  "resistance, instead of the C2M0025120D test point and the R_ds_on input. "
+                                  "The packaged tables are synthetic, see DeviceLibrary")
+        self.options.declare("pwm", default=None, types=(str, PWMWaveform), allow_none=True,
+                             desc="PWM scheme ('spwm' or 'svpwm') or PWMWaveform of a waveform-level "
+                                  "model of the ripple and capacitor currents, instead of the closed forms")
+        self.options.declare("fused", default=False, types=bool,
+                             desc="Evaluate the equations between the component models in two fused "
+                                  "components with analytic partials instead of separate ExecComps")
+        self.options.declare("thermal", default=False, types=bool,
+                             desc="Couple the MOSFET, filter inductor and DC link capacitor losses "
+                                  "with their thermal networks, through the temperature dependence of "
+                                  "R_ds_on, the winding resistivity and the dissipation factor")
 
     def setup(self):
-        # https://assets.wolfspeed.com/uploads/2020/12/C2M0025120D.pdf
-        E_on_test = 2.18*1e-3
-        E_off_test = 0.68*1e-3
-        I_test = 63
-        V_test = 1200
+        nn = self.options['num_nodes']
+        use_cs = self.options['use_cs']
+        cache = self.options['cache']
+        fused = self.options['fused']
+        pwm = self.options['pwm']
+        thermal = self.options['thermal']
+        if isinstance(pwm, str):
+            pwm = PWMWaveform(pwm)
+        # The waveform model also depends on the ratio of the switching to the
+        # electrical frequency
+        pwm_inputs = [] if pwm is None else ['electrical_frequency']
+
         self.add_subsystem("mosfet",
-                           MOSFETLoss(E_on_test=E_on_test,
-                                      E_off_test=E_off_test,
-                                      I_test=I_test,
-                                      V_test=V_test),
+                           MOSFETLoss(**C2M0025120D,
+                                      device=self.options['mosfet_device'],
+                                      num_nodes=nn,
+                                      use_cs=use_cs,
+                                      cache=cache,
+                                      thermal=thermal),
                            promotes_inputs=['I_phase_rms',
                                             'switching_frequency',
                                             'bus_voltage',
@@ -31,36 +68,148 @@ class Inverter(om.Group):
         use_filter_inductor = self.options['use_filter_inductor']
         if use_filter_inductor:
             self.add_subsystem('ac_filter_inductor',
-                               ACFilterInductor(),
+                               ACFilterInductor(num_nodes=nn, use_cs=use_cs, cache=cache,
+                                                thermal=thermal),
                                promotes_inputs=['I_phase_rms',
                                                 'r_wire',
                                                 'n_phases',
                                                 'electrical_frequency'])
 
-            self.connect('ac_filter_inductor.inductance',
-                         'combined_inductance.filter_inductance')
-            self.connect('ac_filter_inductor.mass', 'mass.inductor_mass')
-            self.connect('ac_filter_inductor.P_loss',
-                         'total_loss.inductor_loss')
+            if fused:
+                self.connect('ac_filter_inductor.inductance',
+                             'operating_point.filter_inductance')
+                self.connect('ac_filter_inductor.mass', 'performance.inductor_mass')
+                self.connect('ac_filter_inductor.P_loss', 'performance.inductor_loss')
+            else:
+                self.connect('ac_filter_inductor.inductance',
+                             'combined_inductance.filter_inductance')
+                self.connect('ac_filter_inductor.mass', 'mass.inductor_mass')
+                self.connect('ac_filter_inductor.P_loss',
+                             'total_loss.inductor_loss')
+
+        if fused:
+            self.add_subsystem("operating_point",
+                               InverterOperatingPoint(num_nodes=nn, use_cs=use_cs),
+                               promotes_inputs=['load_inductance',
+                                                'load_phase_back_emf',
+                                                'load_phase_resistance',
+                                                'I_phase_rms',
+                                                'electrical_frequency',
+                                                'bus_voltage',
+                                                'modulation_index_slack'],
+                               promotes_outputs=['*'])
+        else:
+            self._add_operating_point_equations(nn)
+
+        self.add_subsystem("ripple_current",
+                           RippleCurrent(num_nodes=nn, use_cs=use_cs, cache=cache, pwm=pwm),
+                           promotes_inputs=[
+                               ('modulation_index',
+                                   'modulation_index_slack'),
+                               #    'modulation_index',
+                               'L',
+                               'switching_frequency',
+                               'bus_voltage'] + pwm_inputs)
+
+        self.add_subsystem("dc_link_cap",
+                           DCLinkCapacitor(num_nodes=nn, use_cs=use_cs, cache=cache, pwm=pwm,
+                                           thermal=thermal),
+                           promotes_inputs=['I_phase_rms',
+                                            # 'modulation_index',
+                                            ('modulation_index',
+                                             'modulation_index_slack'),
+                                            'power_factor',
+                                            'switching_frequency',
+                                            # 'C',
+                                            # 'dissipation_factor'
+                                            ] + pwm_inputs)
+
+        if fused:
+            self.add_subsystem("performance",
+                               InverterPerformance(num_nodes=nn, use_cs=use_cs),
+                               promotes_inputs=['I_phase_rms', 'bus_voltage', 'power_out'],
+                               promotes_outputs=['*'])
+            self.connect('ripple_current.I_ripple', 'performance.current_ripple')
+            self.connect('dc_link_cap.V_ripple', 'performance.voltage_ripple')
+            self.connect('mosfet.P_loss', 'performance.mosfet_loss')
+            self.connect('dc_link_cap.P_loss', 'performance.capacitor_loss')
+            self.connect('dc_link_cap.mass', 'performance.cap_mass')
+        else:
+            self._add_performance_equations(nn)
+
+        if thermal:
+            self._add_thermal_networks(nn)
+
+    def _add_thermal_networks(self, nn):
+        """
+        Close the loops between the losses and the temperatures of the
+        components. The losses feed their thermal network and the temperatures
+        come back into the loss models, so the whole group is converged by
+        Newton's method. The DirectSolver assembles the (block diagonal across
+        nodes) sparse Jacobian and factorizes it once per linearization; the
+        factorization serves every Newton step and total derivative solve at
+        that point.
+        """
+        use_cs = self.options['use_cs']
+        use_filter_inductor = self.options['use_filter_inductor']
+
+        self.add_subsystem('mosfet_thermal',
+                           MOSFETThermalNetwork(num_nodes=nn, use_cs=use_cs),
+                           promotes_inputs=['temperature_ambient'])
+        self.connect('mosfet.P_loss_switch', 'mosfet_thermal.P_loss')
+        self.connect('mosfet_thermal.temperature_junction', 'mosfet.T_junction')
+
+        if use_filter_inductor:
+            self.add_subsystem('inductor_thermal',
+                               ACFilterInductorThermalNetwork(num_nodes=nn, use_cs=use_cs),
+                               promotes_inputs=['temperature_ambient'])
+            self.connect('ac_filter_inductor.P_loss_core_phase', 'inductor_thermal.P_loss_core')
+            self.connect('ac_filter_inductor.P_loss_copper_phase',
+                         'inductor_thermal.P_loss_copper')
+            self.connect('inductor_thermal.temperature_windings',
+                         'ac_filter_inductor.T_windings')
+
+        # The DC link is lumped into a single capacitor
+        self.add_subsystem('dc_link_cap_thermal',
+                           DCLinkCapacitorThermalNetwork(num_nodes=nn, use_cs=use_cs),
+                           promotes_inputs=['temperature_ambient'])
+        self.connect('dc_link_cap.P_loss', 'dc_link_cap_thermal.P_loss')
+        self.connect('dc_link_cap_thermal.temperature_hotspot', 'dc_link_cap.T_hotspot')
+
+        for name, (val, units) in thermal_defaults.items():
+            if use_filter_inductor or not name.startswith('inductor_thermal.'):
+                self.set_input_defaults(name, val=np.full(nn, val), units=units)
+
+        newton = self.nonlinear_solver = om.NewtonSolver()
+        newton.options['solve_subsystems'] = True
+        newton.options['max_sub_solves'] = 1
+        newton.options['maxiter'] = 20
+        newton.options['atol'] = 1e-10
+        newton.options['rtol'] = 1e-10
+        newton.options['iprint'] = -1
+        self.linear_solver = om.DirectSolver(assemble_jac=True)
 
+    def _add_operating_point_equations(self, nn):
         self.add_subsystem("combined_inductance",
                            om.ExecComp(
                                "L = load_inductance + filter_inductance",
-                               L={"units": 'H'},
-                               load_inductance={'units': 'H'},
-                               filter_inductance={'units': 'H', 'val': 0.0}),
+                               L={"shape": (nn,), "units": 'H'},
+                               load_inductance={'shape': (nn,), 'units': 'H'},
+                               filter_inductance={'shape': (nn,), 'units': 'H', 'val': np.zeros(nn)},
+                               has_diag_partials=True),
                            promotes_inputs=['load_inductance'],
                            promotes_outputs=['*'])
 
         self.add_subsystem("phase_voltage",
                            om.ExecComp(
                                "phase_voltage = ((load_phase_back_emf + load_phase_resistance * (2**0.5)*I_phase_rms)**2 + (2*pi*L*electrical_frequency*(2**0.5)*I_phase_rms)**2)**0.5",
-                               phase_voltage={'units': 'V'},
-                               load_phase_back_emf={'units': 'V'},
-                               load_phase_resistance={'units': 'ohm'},
-                               I_phase_rms={'units': 'A'},
-                               L={'units': 'H'},
-                               electrical_frequency={'units': 'Hz'}),
+                               phase_voltage={'shape': (nn,), 'units': 'V'},
+                               load_phase_back_emf={'shape': (nn,), 'units': 'V'},
+                               load_phase_resistance={'shape': (nn,), 'units': 'ohm'},
+                               I_phase_rms={'shape': (nn,), 'units': 'A'},
+                               L={'shape': (nn,), 'units': 'H'},
+                               electrical_frequency={'shape': (nn,), 'units': 'Hz'},
+                               has_diag_partials=True),
                            promotes=['*'])
 
         # bal = om.BalanceComp()
@@ -81,16 +230,18 @@ class Inverter(om.Group):
         self.add_subsystem("power_factor",
                            om.ExecComp(
                                "power_factor = load_phase_back_emf / phase_voltage",
-                               power_factor={'units': 'unitless'},
-                               load_phase_back_emf={'units': 'V'},
-                               phase_voltage={'units': 'V'}),
+                               power_factor={'shape': (nn,), 'units': 'unitless'},
+                               load_phase_back_emf={'shape': (nn,), 'units': 'V'},
+                               phase_voltage={'shape': (nn,), 'units': 'V'},
+                               has_diag_partials=True),
                            promotes=['*'])
 
         self.add_subsystem("modulation_index",
                            om.ExecComp("modulation_index = 2 * phase_voltage / bus_voltage",
-                                       modulation_index={'units': 'unitless'},
-                                       phase_voltage={'units': 'V'},
-                                       bus_voltage={'units': 'V'}),
+                                       modulation_index={'shape': (nn,), 'units': 'unitless'},
+                                       phase_voltage={'shape': (nn,), 'units': 'V'},
+                                       bus_voltage={'shape': (nn,), 'units': 'V'},
+                                       has_diag_partials=True),
                            promotes_inputs=['bus_voltage',
                                             'phase_voltage'],
                            promotes_outputs=['modulation_index'])
@@ -98,44 +249,25 @@ class Inverter(om.Group):
         self.add_subsystem("modulation_index_residual",
                            om.ExecComp("modulation_index_residual = modulation_index - modulation_index_slack",
                                        modulation_index_residual={
-                                           'units': 'unitless'},
-                                       modulation_index={'units': 'unitless'},
-                                       modulation_index_slack={'units': 'unitless'}),
+                                           'shape': (nn,), 'units': 'unitless'},
+                                       modulation_index={'shape': (nn,), 'units': 'unitless'},
+                                       modulation_index_slack={'shape': (nn,), 'units': 'unitless'},
+                                       has_diag_partials=True),
                            promotes=['*'])
 
-        self.add_subsystem("ripple_current",
-                           RippleCurrent(),
-                           promotes_inputs=[
-                               ('modulation_index',
-                                   'modulation_index_slack'),
-                               #    'modulation_index',
-                               'L',
-                               'switching_frequency',
-                               'bus_voltage'])
-
-        self.add_subsystem("dc_link_cap",
-                           DCLinkCapacitor(),
-                           promotes_inputs=['I_phase_rms',
-                                            # 'modulation_index',
-                                            ('modulation_index',
-                                             'modulation_index_slack'),
-                                            'power_factor',
-                                            'switching_frequency',
-                                            # 'C',
-                                            # 'dissipation_factor'
-                                            ])
-
+    def _add_performance_equations(self, nn):
         self.add_subsystem("ripple",
                            om.ExecComp([
                                "I_ripple = current_ripple / I_phase_rms",
                                "V_ripple = voltage_ripple / bus_voltage"
                            ],
-                               current_ripple={'units': 'A'},
-                               I_phase_rms={'units': 'A'},
-                               I_ripple={'units': 'unitless'},
-                               voltage_ripple={'units': 'V'},
-                               bus_voltage={'units': 'V'},
-                               V_ripple={'units': 'unitless'}),
+                               current_ripple={'shape': (nn,), 'units': 'A'},
+                               I_phase_rms={'shape': (nn,), 'units': 'A'},
+                               I_ripple={'shape': (nn,), 'units': 'unitless'},
+                               voltage_ripple={'shape': (nn,), 'units': 'V'},
+                               bus_voltage={'shape': (nn,), 'units': 'V'},
+                               V_ripple={'shape': (nn,), 'units': 'unitless'},
+                               has_diag_partials=True),
                            promotes_inputs=['I_phase_rms', 'bus_voltage'],
                            promotes_outputs=['I_ripple', 'V_ripple'])
         self.connect('ripple_current.I_ripple', 'ripple.current_ripple')
@@ -143,35 +275,39 @@ class Inverter(om.Group):
 
         self.add_subsystem("total_loss",
                            om.ExecComp("total_loss = mosfet_loss + inductor_loss + capacitor_loss",
-                                       total_loss={'units': 'W'},
-                                       mosfet_loss={'units': 'W'},
+                                       total_loss={'shape': (nn,), 'units': 'W'},
+                                       mosfet_loss={'shape': (nn,), 'units': 'W'},
                                        inductor_loss={
-                                           'units': 'W', 'val': 0.0},
-                                       capacitor_loss={'units': 'W'}),
+                                           'shape': (nn,), 'units': 'W', 'val': np.zeros(nn)},
+                                       capacitor_loss={'shape': (nn,), 'units': 'W'},
+                                       has_diag_partials=True),
                            promotes_outputs=['total_loss'])
         self.connect('mosfet.P_loss', 'total_loss.mosfet_loss')
         self.connect('dc_link_cap.P_loss', 'total_loss.capacitor_loss')
 
         self.add_subsystem("power_out",
                            om.ExecComp("power_out = I_phase_rms * phase_voltage",
-                                       power_out={'units': 'W'},
-                                       I_phase_rms={'units': 'A'},
-                                       phase_voltage={'units': 'V'}),
+                                       power_out={'shape': (nn,), 'units': 'W'},
+                                       I_phase_rms={'shape': (nn,), 'units': 'A'},
+                                       phase_voltage={'shape': (nn,), 'units': 'V'},
+                                       has_diag_partials=True),
                            promotes=['*'])
 
         self.add_subsystem("efficiency",
                            om.ExecComp("efficiency = power_out / (power_out + total_loss)",
-                                       efficiency={'units': 'unitless'},
-                                       power_out={'units': 'W'},
-                                       total_loss={'units': 'W'}),
+                                       efficiency={'shape': (nn,), 'units': 'unitless'},
+                                       power_out={'shape': (nn,), 'units': 'W'},
+                                       total_loss={'shape': (nn,), 'units': 'W'},
+                                       has_diag_partials=True),
                            promotes=['*'])
 
         self.add_subsystem('mass',
                            om.ExecComp('mass = inductor_mass + cap_mass',
-                                       mass={'units': 'kg'},
+                                       mass={'shape': (nn,), 'units': 'kg'},
                                        inductor_mass={
-                                           'units': 'kg', 'val': 0.0},
-                                       cap_mass={'units': 'kg'}),
+                                           'shape': (nn,), 'units': 'kg', 'val': np.zeros(nn)},
+                                       cap_mass={'shape': (nn,), 'units': 'kg'},
+                                       has_diag_partials=True),
                            promotes_outputs=['mass'])
         self.connect('dc_link_cap.mass', 'mass.cap_mass')
 
@@ -0,0 +1,222 @@
+import csv
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from .fit_steinmetz_data import _frequency_scale
+
+
+default_catalog_path = os.path.join(os.path.dirname(__file__),
+                                    'data', 'core_materials.csv')
+
+_flux_density_scale = {'T': 1.0, 'G': 1e-4}
+
+_float_columns = ('saturation_flux', 'density', 'mu_r_min', 'mu_r_max',
+                  'steinmetz_k', 'steinmetz_alpha', 'steinmetz_beta')
+_str_columns = ('f_units', 'B_units', 'loss_units')
+
+
+@dataclass(frozen=True, slots=True)
+class CoreMaterial:
+    """
+    Immutable core material record, usable anywhere a material dataclass from
+    inductor_core_materials is (e.g. the `core_material` option of
+    ACFilterInductor)
+    """
+    name: str
+    saturation_flux: float
+    density: float
+    mu_r_min: float
+    mu_r_max: float
+    steinmetz_k: float
+    steinmetz_alpha: float
+    steinmetz_beta: float
+    f_units: str = 'kHz'
+    B_units: str = 'T'
+    loss_units: str = 'W/kg'
+
+    @property
+    def relative_permeability(self):
+        if self.mu_r_min == self.mu_r_max:
+            return self.mu_r_min
+        return np.array([self.mu_r_min, self.mu_r_max])
+
+    @property
+    def steinmetz_params(self):
+        return np.array([self.steinmetz_k, self.steinmetz_alpha, self.steinmetz_beta])
+
+    def specific_loss(self, frequency, B):
+        """
+        Core loss per unit mass at `frequency` (Hz) and peak flux density `B` (T)
+        """
+        f = np.asarray(frequency) / _frequency_scale[self.f_units.lower()]
+        B = np.asarray(B) / _flux_density_scale[self.B_units]
+        return self.steinmetz_k * f**self.steinmetz_alpha * B**self.steinmetz_beta
+
+
+class MaterialRegistry:
+    """
+    Catalog of core materials read from CSV files with the columns of
+    data/core_materials.csv.
+
+    The catalog is only read on first access, and is stored as one NumPy array
+    per column rather than one object per material. CoreMaterial records are
+    only created for the materials that are actually requested. Range queries
+    on the numeric columns go through sorted indices.
+
+    Parameters
+    ----------
+    paths : str or list of str
+        Catalog files, later files override materials of the same name
+    """
+
+    def __init__(self, paths=default_catalog_path):
+        self.paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+        self._columns = None
+        self._index = None
+        self._sorted = {}
+        self._records = {}
+        self._loss_cache = {}
+
+    def _load(self):
+        if self._columns is not None:
+            return self._columns
+
+        rows = {}
+        for path in self.paths:
+            with open(path, newline='') as file:
+                for row in csv.DictReader(file):
+                    rows[row['name']] = row
+
+        columns = {'name': np.array(list(rows), dtype=object)}
+        for column in _float_columns:
+            columns[column] = np.array([float(row[column]) for row in rows.values()])
+        for column in _str_columns:
+            columns[column] = np.array([row[column] for row in rows.values()],
+                                       dtype=object)
+
+        self._columns = columns
+        self._index = {name: i for i, name in enumerate(columns['name'])}
+        return columns
+
+    def __len__(self):
+        return len(self._load()['name'])
+
+    def __contains__(self, name):
+        self._load()
+        return name in self._index
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def names(self):
+        return list(self._load()['name'])
+
+    def get(self, name):
+        """
+        Return the CoreMaterial record for `name`
+        """
+        record = self._records.get(name)
+        if record is None:
+            columns = self._load()
+            try:
+                i = self._index[name]
+            except KeyError:
+                raise KeyError(f"Unknown core material '{name}'") from None
+            record = CoreMaterial(name=name,
+                                  **{column: float(columns[column][i])
+                                     for column in _float_columns},
+                                  **{column: columns[column][i]
+                                     for column in _str_columns})
+            self._records[name] = record
+        return record
+
+    def reference_loss(self, reference_point=(10e3, 0.1)):
+        """
+        Core loss per unit mass of every material at `reference_point`, a
+        (frequency in Hz, peak flux density in T) pair
+        """
+        loss = self._loss_cache.get(reference_point)
+        if loss is None:
+            columns = self._load()
+            frequency, B = reference_point
+            f_scale = np.array([_frequency_scale[units.lower()]
+                                for units in columns['f_units']])
+            B_scale = np.array([_flux_density_scale[units]
+                                for units in columns['B_units']])
+            loss = columns['steinmetz_k'] * \
+                (frequency / f_scale)**columns['steinmetz_alpha'] * \
+                (B / B_scale)**columns['steinmetz_beta']
+            self._loss_cache[reference_point] = loss
+        return loss
+
+    def _range(self, key, values, bounds):
+        """
+        Indices of `values` within the closed interval `bounds`, found with a
+        sorted index on the column
+        """
+        order = self._sorted.get(key)
+        if order is None:
+            order = np.argsort(values, kind='stable')
+            self._sorted[key] = order
+        lower, upper = bounds
+        lower = -np.inf if lower is None else lower
+        upper = np.inf if upper is None else upper
+        start = np.searchsorted(values[order], lower, side='left')
+        stop = np.searchsorted(values[order], upper, side='right')
+        return order[start:stop]
+
+    def select(self, saturation_flux=None, density=None, permeability=None,
+               loss=None, reference_point=(10e3, 0.1)):
+        """
+        Screen the catalog, returning the names of all materials that satisfy
+        every given criterion
+
+        Parameters
+        ----------
+        saturation_flux, density : (lower, upper), optional
+            Closed intervals, either bound may be None
+        permeability : float or (lower, upper), optional
+            Relative permeability (range) the material must be able to provide
+        loss : (lower, upper), optional
+            Bounds on the core loss per unit mass at `reference_point`
+        reference_point : (frequency in Hz, B in T)
+            Operating point at which `loss` is evaluated
+
+        Returns
+        -------
+        list of str
+        """
+        columns = self._load()
+        selected = np.ones(len(columns['name']), dtype=bool)
+
+        for key, bounds in (('saturation_flux', saturation_flux),
+                            ('density', density)):
+            if bounds is not None:
+                mask = np.zeros_like(selected)
+                mask[self._range(key, columns[key], bounds)] = True
+                selected &= mask
+
+        if permeability is not None:
+            lower, upper = np.broadcast_to(permeability, 2)
+            selected &= (columns['mu_r_min'] <= lower) & (
+                columns['mu_r_max'] >= upper)
+
+        if loss is not None:
+            mask = np.zeros_like(selected)
+            mask[self._range(('loss', reference_point),
+                             self.reference_loss(reference_point), loss)] = True
+            selected &= mask
+
+        return list(columns['name'][selected])
+
+
+default_registry = MaterialRegistry()
+
+
+def get_material(name):
+    """
+    Look up a core material by name in the packaged catalog
+    """
+    return default_registry.get(name)
@@ -0,0 +1,301 @@
+import functools
+import itertools
+import json
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+default_library_path = os.path.join(os.path.dirname(__file__),
+                                    'data', 'mosfet_devices.json')
+
+# Scale from the units of the library file to SI
+_energy_scale = {'J': 1.0, 'mJ': 1e-3, 'uJ': 1e-6}
+_resistance_scale = {'ohm': 1.0, 'mohm': 1e-3}
+
+
+def interpolate(axes, table, points, gradient=True):
+    """
+    Multilinear interpolation of `table`, gridded on `axes`, at `points`, one
+    array of coordinates per axis (broadcast against each other). Beyond the
+    grid the edge cells are extrapolated linearly. Any trailing dimensions of
+    `table` beyond the grid are interpolated together.
+
+    Returns
+    -------
+    value : ndarray
+    gradient : list of ndarray, only if `gradient` is True
+        Derivatives of the value with respect to each coordinate
+    """
+    n_axes = len(axes)
+    grid_shape = table.shape[:n_axes]
+    values = table.reshape(np.prod(grid_shape), *table.shape[n_axes:])
+    trailing = (...,) + (np.newaxis,) * (table.ndim - n_axes)
+
+    # Flat index of the lower corner of each point's cell, and the fractional
+    # position within the cell. The cells are searched before broadcasting.
+    strides = np.cumprod((1,) + grid_shape[:0:-1])[::-1]
+    base = 0
+    fractions = []
+    for axis, x, stride in zip(axes, points, strides):
+        x = np.asarray(x)
+        step = np.diff(axis)
+        if np.allclose(step, step[0]):
+            # Uniform grids are located arithmetically rather than searched
+            h = step[0]
+            i = np.floor((np.real(x) - axis[0]) / h).astype(np.intp)
+            i = np.clip(i, 0, len(axis) - 2)
+            t = (x - axis[0]) / h - i
+        else:
+            i = np.searchsorted(axis, np.real(x), side='right') - 1
+            i = np.clip(i, 0, len(axis) - 2)
+            h = step[i]
+            t = (x - axis[i]) / h
+        base = base + i * stride
+        fractions.append((t[trailing], np.asarray(1 / h)[trailing]))
+
+    # Gather the cell corners, then interpolate along one axis at a time,
+    # from the last, carrying the derivatives along
+    corners = [values[base + np.dot(corner, strides)]
+               for corner in itertools.product((0, 1), repeat=n_axes)]
+    if not gradient:
+        for t, _ in reversed(fractions):
+            corners = [a + t * (b - a) for a, b in zip(corners[0::2], corners[1::2])]
+        return corners[0]
+
+    gradients = [[] for _ in corners]
+    for t, dt in reversed(fractions):
+        lower, upper = corners[0::2], corners[1::2]
+        lower_grad, upper_grad = gradients[0::2], gradients[1::2]
+        corners = [a + t * (b - a) for a, b in zip(lower, upper)]
+        gradients = [[(b - a) * dt] + [ga + t * (gb - ga) for ga, gb in zip(grad_a, grad_b)]
+                     for a, b, grad_a, grad_b in zip(lower, upper, lower_grad, upper_grad)]
+    return corners[0], gradients[0]
+
+
+@dataclass(frozen=True, eq=False, repr=False)
+class MOSFETDevice:
+    """
+    Switching energies E_on/E_off(I, V, T) and on-state resistance
+    R_ds_on(T, I) of a MOSFET, gridded over the drain current (A), blocking
+    voltage (V) and junction temperature (degC). Energies are in J and
+    resistances in ohm. `source` records where the tables come from, e.g.
+    whether they are measured, digitized or synthetic.
+    """
+    name: str
+    I: np.ndarray
+    V: np.ndarray
+    T: np.ndarray
+    E_on: np.ndarray
+    E_off: np.ndarray
+    R_T: np.ndarray
+    R_I: np.ndarray
+    R_ds_on: np.ndarray
+    Q_rr: float = 0.0
+    V_rated: float = np.inf
+    I_rated: float = np.inf
+    description: str = field(default='')
+    source: str = field(default='')
+
+    def __repr__(self):
+        return f"MOSFETDevice('{self.name}')"
+
+    @classmethod
+    def from_test_point(cls, name, E_on_test, E_off_test, I_test, V_test,
+                        R_ds_on, Q_rr=0.0):
+        """
+        Device whose switching energies scale linearly with current and voltage
+        from a single datasheet test point, at a constant on-state resistance,
+        as in MOSFETLoss without a device
+        """
+        I = np.array([0.0, I_test])
+        V = np.array([0.0, V_test])
+        T = np.array([25.0, 175.0])
+        scale = np.outer(I / I_test, V / V_test)[:, :, np.newaxis] * np.ones(2)
+        return cls(name=name, I=I, V=V, T=T,
+                   E_on=E_on_test * scale, E_off=E_off_test * scale,
+                   R_T=T, R_I=I, R_ds_on=np.full((2, 2), R_ds_on), Q_rr=Q_rr)
+
+    def switching_energies(self, I, V, T, gradient=True):
+        """
+        Turn-on and turn-off energies, each along with its gradient
+        [d/dI, d/dV, d/dT] if `gradient` is True
+        """
+        axes = (self.I, self.V, self.T)
+        return (interpolate(axes, self.E_on, (I, V, T), gradient),
+                interpolate(axes, self.E_off, (I, V, T), gradient))
+
+    @functools.cached_property
+    def _E_switch(self):
+        return self.E_on + self.E_off
+
+    def switching_energy(self, I, V, T, gradient=True):
+        """
+        Sum of the turn-on and turn-off energies, along with its gradient
+        [d/dI, d/dV, d/dT] if `gradient` is True
+        """
+        return interpolate((self.I, self.V, self.T), self._E_switch, (I, V, T),
+                           gradient)
+
+    def on_resistance(self, T, I, gradient=True):
+        """
+        On-state resistance, along with its gradient [d/dT, d/dI] if
+        `gradient` is True
+        """
+        return interpolate((self.R_T, self.R_I), self.R_ds_on, (T, I), gradient)
+
+
+def device_loss(device, I_phase_rms, switching_frequency, bus_voltage, Q_rr,
+                T_junction, n_phases=3, switches_per_phase=2, n_quadrature=8,
+                partials=False):
+    """
+    Sum of the conduction and switching losses of all of the MOSFETs, with the
+    switching energies and on-state resistance looked up in the tables of
+    `device`.
+
+    Each switch conducts the positive half-wave of the sinusoidal phase
+    current, so the losses are averaged over the fundamental period with
+    Gauss-Legendre quadrature. For switching energies linear in current and a
+    constant on-state resistance this reduces to mosfet_loss in
+    invertermodel.physics.
+
+    Returns
+    -------
+    P_loss : ndarray
+    partials : dict, only if `partials` is True
+        Derivatives of P_loss with respect to each input, by name
+    """
+    x, w = np.polynomial.legendre.leggauss(n_quadrature)
+    theta = 0.5 * np.pi * (x + 1)
+    # Quadrature weights of the average over the period, 1/(2 pi) int_0^pi
+    w = 0.25 * w
+
+    I_phase_rms = np.asarray(I_phase_rms)[..., np.newaxis]
+    switching_frequency = np.asarray(switching_frequency)
+    bus_voltage = np.asarray(bus_voltage)
+    T = np.asarray(T_junction)[..., np.newaxis]
+    di_dI = np.sqrt(2) * np.sin(theta)
+    i = I_phase_rms * di_dI
+
+    E_switch = device.switching_energy(i, bus_voltage[..., np.newaxis], T,
+                                       gradient=partials)
+    R = device.on_resistance(T, i, gradient=partials)
+    if partials:
+        E_switch, (dE_dI, dE_dV, dE_dT) = E_switch
+        R, (dR_dT, dR_dI) = R
+
+    E_avg = E_switch @ w
+    P_cond = (R * i**2) @ w
+    P_rr = 0.25 * Q_rr * bus_voltage * switching_frequency
+
+    n_switches = n_phases * switches_per_phase
+    P_loss = n_switches * (P_cond + switching_frequency * E_avg + P_rr)
+    if not partials:
+        return P_loss
+
+    return P_loss, {
+        'I_phase_rms': n_switches *
+        ((switching_frequency[..., np.newaxis] * dE_dI +
+          dR_dI * i**2 + 2 * R * i) * di_dI) @ w,
+        'switching_frequency': n_switches * (E_avg + 0.25 * Q_rr * bus_voltage),
+        'bus_voltage': n_switches *
+        (switching_frequency * (dE_dV @ w) + 0.25 * Q_rr * switching_frequency),
+        'Q_rr': n_switches * 0.25 * bus_voltage * switching_frequency,
+        'T_junction': n_switches *
+        (switching_frequency * (dE_dT @ w) + (dR_dT * i**2) @ w),
+    }
+
+
+class DeviceLibrary:
+    """
+    Library of MOSFET devices read from JSON files with the layout of
+    data/mosfet_devices.json: per device, the switching energy tables on an
+    (I, V, T) grid and the on-state resistance table on a (T, I) grid, and
+    the `source` of the tables. The files are only read on first access.
+
+    The tables of the packaged library are synthetic: they are scaled from
+    each part's datasheet switching test point with typical current, voltage
+    and temperature dependence, not digitized from its curves, so they only
+    approximate the losses of the real parts. Measured or digitized tables can
+    be loaded from files in the same layout.
+
+    Parameters
+    ----------
+    paths : str or list of str
+        Library files, later files override devices of the same name
+    """
+
+    def __init__(self, paths=default_library_path):
+        self.paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+        self._entries = None
+        self._devices = {}
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+
+        entries = {}
+        for path in self.paths:
+            with open(path) as file:
+                library = json.load(file)
+            units = library['units']
+            for name, entry in library['devices'].items():
+                entries[name] = (entry, units)
+        self._entries = entries
+        return entries
+
+    def __len__(self):
+        return len(self._load())
+
+    def __contains__(self, name):
+        return name in self._load()
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def names(self):
+        return list(self._load())
+
+    def get(self, name):
+        """
+        Return the MOSFETDevice for `name`
+        """
+        device = self._devices.get(name)
+        if device is None:
+            try:
+                entry, units = self._load()[name]
+            except KeyError:
+                raise KeyError(f"Unknown MOSFET device '{name}'") from None
+            switching = entry['switching']
+            conduction = entry['conduction']
+            E_scale = _energy_scale[units['E_on']]
+            device = MOSFETDevice(
+                name=name,
+                I=np.array(switching['I'], dtype=float),
+                V=np.array(switching['V'], dtype=float),
+                T=np.array(switching['T'], dtype=float),
+                E_on=np.array(switching['E_on'], dtype=float) * E_scale,
+                E_off=np.array(switching['E_off'], dtype=float) *
+                _energy_scale[units['E_off']],
+                R_T=np.array(conduction['T'], dtype=float),
+                R_I=np.array(conduction['I'], dtype=float),
+                R_ds_on=np.array(conduction['R_ds_on'], dtype=float) *
+                _resistance_scale[units['R_ds_on']],
+                Q_rr=entry['Q_rr'],
+                V_rated=entry['V_rated'],
+                I_rated=entry['I_rated'],
+                description=entry['description'],
+                source=entry.get('source', ''))
+            self._devices[name] = device
+        return device
+
+
+default_library = DeviceLibrary()
+
+
+def get_device(name):
+    """
+    Look up a MOSFET device by name in the packaged library
+    """
+    return default_library.get(name)
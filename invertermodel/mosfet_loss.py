@@ -2,39 +2,157 @@ import numpy as np
 
 import openmdao.api as om
 
+from .electrothermal import TemperatureDependence
+from .eval_cache import EvaluationCache, cached_compute, cached_compute_partials
+from .mosfet_devices import MOSFETDevice, device_loss, get_device
+from .physics import mosfet_loss
+
 
 class MOSFETLoss(om.ExplicitComponent):
     def initialize(self):
         self.options.declare(
-            "E_on_test", desc="The turn-on energy loss given in the device datasheet for a specific bus voltage and load current")
+            "E_on_test", default=None, desc="The turn-on energy loss given in the device datasheet for a specific bus voltage and load current")
         self.options.declare(
-            "E_off_test", desc="The turn-off energy loss given in the device datasheet for a specific bus voltage and load current")
+            "E_off_test", default=None, desc="The turn-off energy loss given in the device datasheet for a specific bus voltage and load current")
         self.options.declare(
-            "I_test", desc="Test current given in the device datasheet for a specific bus voltage and load current")
+            "I_test", default=None, desc="Test current given in the device datasheet for a specific bus voltage and load current")
         self.options.declare(
-            "V_test", desc="Test voltage given in the device datasheet for a specific bus voltage and load current")
+            "V_test", default=None, desc="Test voltage given in the device datasheet for a specific bus voltage and load current")
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("use_cs", default=False, types=bool,
+                             desc="Compute partials with complex step instead of analytically")
+        self.options.declare("cache", default=None, types=EvaluationCache, allow_none=True,
+                             desc="Cache of the outputs and partials, keyed on the inputs")
+        self.options.declare("device", default=None, types=(str, MOSFETDevice), allow_none=True,
+                             desc="Name or MOSFETDevice whose switching energy and on-state resistance "
+                                  "tables replace the test point scaling and the R_ds_on input. The "
+                                  "packaged tables are synthetic, see DeviceLibrary")
+        self.options.declare("n_quadrature", default=8, types=int,
+                             desc="Number of points averaging the tabulated losses over the fundamental period")
+        self.options.declare("thermal", default=False, types=bool,
+                             desc="Add the junction temperature dependence of R_ds_on and the "
+                                  "loss of a single switch, coupling the losses to a thermal network")
 
     def setup(self):
-        self.add_input("I_phase_rms", units='A',
+        nn = self.options['num_nodes']
+        ar = np.arange(nn)
+
+        device = self.options['device']
+        self._device = get_device(device) if isinstance(device, str) else device
+        thermal = self.options['thermal']
+
+        # R_ds_on of the C2M0025120D rises from 25 mOhm at 25 degC to 43 mOhm
+        # at 150 degC
+        self._temperature = TemperatureDependence('R_ds_on', 'T_junction', 25.0, 5.8e-3) \
+            if thermal and self._device is None else None
+
+        self.add_input("I_phase_rms", shape=nn, units='A',
                        desc="The motor phase RMS current")
-        self.add_input("R_ds_on", units='ohm',
-                       desc="Drain-source on-state resistance")
-        self.add_input("switching_frequency", units='Hz',
+        if self._device is None:
+            self.add_input("R_ds_on", shape=nn, units='ohm',
+                           desc="Drain-source on-state resistance" +
+                                (" at 25 degC" if thermal else ""))
+            if self._temperature is not None:
+                self._temperature.add_inputs(self, desc="Junction temperature of the MOSFETs")
+        else:
+            self.add_input("T_junction", val=25.0, shape=nn, units='degC',
+                           desc="Junction temperature of the MOSFETs")
+        self.add_input("switching_frequency", shape=nn, units='Hz',
                        desc="The inverter’s switching frequency")
-        self.add_input("bus_voltage", units='V', desc="DC link voltage")
-        self.add_input("Q_rr", units='C', desc="Reverse recovery charge")
+        self.add_input("bus_voltage", shape=nn, units='V', desc="DC link voltage")
+        self.add_input("Q_rr", shape=nn, units='C', desc="Reverse recovery charge",
+                       val=1.0 if self._device is None else self._device.Q_rr)
 
         self.add_discrete_input(
             "n_phases", val=3, desc="The number of inverter phases")
         self.add_discrete_input("switches_per_phase",
                                 val=2, desc="The number of MOSFETs per phase")
 
-        self.add_output("P_loss", units='W',
+        self.add_output("P_loss", shape=nn, units='W',
                         desc="Sum of all of the conduction and switching losses")
-
-        self.declare_partials('*', '*', method='cs')
-
+        if thermal:
+            self.add_output("P_loss_switch", shape=nn, units='W',
+                            desc="The conduction and switching losses of a single switch")
+
+        if self.options['use_cs']:
+            self.declare_partials('*', '*', rows=ar, cols=ar, method='cs')
+        else:
+            self.declare_partials(['P_loss', 'P_loss_switch'] if thermal else 'P_loss',
+                                  self._loss_inputs(), rows=ar, cols=ar)
+
+    def _loss_inputs(self):
+        names = ['I_phase_rms',
+                 'R_ds_on' if self._device is None else 'T_junction',
+                 'switching_frequency',
+                 'bus_voltage',
+                 'Q_rr']
+        if self._temperature is not None:
+            names += [self._temperature.temperature, self._temperature.tempco]
+        return names
+
+    def _device_loss(self, inputs, discrete_inputs, partials=False):
+        return device_loss(self._device,
+                           inputs['I_phase_rms'],
+                           inputs['switching_frequency'],
+                           inputs['bus_voltage'],
+                           inputs['Q_rr'],
+                           inputs['T_junction'],
+                           n_phases=discrete_inputs['n_phases'],
+                           switches_per_phase=discrete_inputs['switches_per_phase'],
+                           n_quadrature=self.options['n_quadrature'],
+                           partials=partials)
+
+    @cached_compute
     def compute(self, inputs, outputs, discrete_inputs, discrete_outputs):
+        if self._device is not None:
+            outputs['P_loss'] = self._device_loss(inputs, discrete_inputs)
+        else:
+            if self._temperature is not None:
+                inputs = self._temperature.scaled(inputs)
+            outputs['P_loss'] = self._test_point_loss(inputs, discrete_inputs)
+
+        if self.options['thermal']:
+            outputs['P_loss_switch'] = outputs['P_loss'] / self._n_switches(discrete_inputs)
+
+    def _n_switches(self, discrete_inputs):
+        return discrete_inputs['n_phases'] * discrete_inputs['switches_per_phase']
+
+    def _test_point_loss(self, inputs, discrete_inputs):
+        return mosfet_loss(inputs['I_phase_rms'],
+                           inputs['R_ds_on'],
+                           inputs['switching_frequency'],
+                           inputs['bus_voltage'],
+                           inputs['Q_rr'],
+                           self.options['E_on_test'],
+                           self.options['E_off_test'],
+                           self.options['I_test'],
+                           self.options['V_test'],
+                           n_phases=discrete_inputs['n_phases'],
+                           switches_per_phase=discrete_inputs['switches_per_phase'])
+
+    @cached_compute_partials
+    def compute_partials(self, inputs, partials, discrete_inputs, discrete_outputs=None):
+        if self.options['use_cs']:
+            return
+
+        if self._device is not None:
+            _, device_partials = self._device_loss(inputs, discrete_inputs, partials=True)
+            for name, value in device_partials.items():
+                partials['P_loss', name] = value
+        elif self._temperature is not None:
+            self._test_point_partials(self._temperature.scaled(inputs), partials,
+                                      discrete_inputs)
+            self._temperature.chain_partials(inputs, partials, ['P_loss'])
+        else:
+            self._test_point_partials(inputs, partials, discrete_inputs)
+
+        if self.options['thermal']:
+            n_switches = self._n_switches(discrete_inputs)
+            for name in self._loss_inputs():
+                partials['P_loss_switch', name] = partials['P_loss', name] / n_switches
+
+    def _test_point_partials(self, inputs, partials, discrete_inputs):
         E_on_test = self.options['E_on_test']
         E_off_test = self.options['E_off_test']
         I_test = self.options['I_test']
@@ -46,21 +164,18 @@ class MOSFETLoss(om.ExplicitComponent):
         bus_voltage = inputs['bus_voltage']
         Q_rr = inputs['Q_rr']
 
-        n_phases = discrete_inputs['n_phases']
-        switches_per_phase = discrete_inputs['switches_per_phase']
-
-        P_cond = 0.5 * I_phase_rms**2 * R_ds_on
-
-        # 80000*sqrt(2)/pi*60*1000*0.002/(60*1200)
-
-        P_switch = switching_frequency * \
-            (np.sqrt(2) / np.pi * I_phase_rms) * bus_voltage
-        P_on = P_switch * E_on_test / (I_test * V_test)
-        P_off = P_switch * E_off_test / (I_test * V_test)
-
-        P_rr = 0.25 * Q_rr * bus_voltage * switching_frequency
-
-        # print(f"P_cond: {P_cond}, P_on: {P_on}, P_off: {P_off}, P_rr: {P_rr}")
-
-        outputs['P_loss'] = n_phases * switches_per_phase * \
-            (P_cond + P_on + P_off + P_rr)
+        n_switches = self._n_switches(discrete_inputs)
+
+        # P_on + P_off = k_switch * switching_frequency * I_phase_rms * bus_voltage
+        k_switch = np.sqrt(2) / np.pi * \
+            (E_on_test + E_off_test) / (I_test * V_test)
+
+        partials['P_loss', 'I_phase_rms'] = n_switches * \
+            (I_phase_rms * R_ds_on + k_switch * switching_frequency * bus_voltage)
+        partials['P_loss', 'R_ds_on'] = n_switches * 0.5 * I_phase_rms**2
+        partials['P_loss', 'switching_frequency'] = n_switches * bus_voltage * \
+            (k_switch * I_phase_rms + 0.25 * Q_rr)
+        partials['P_loss', 'bus_voltage'] = n_switches * switching_frequency * \
+            (k_switch * I_phase_rms + 0.25 * Q_rr)
+        partials['P_loss', 'Q_rr'] = n_switches * \
+            0.25 * bus_voltage * switching_frequency
@@ -0,0 +1,191 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .analysis import baseline_design, optimization_errors, optimize, quiet, set_values, \
+    setup_optimization_problem
+from .doe import latin_hypercube
+
+
+# Box the starting points are drawn from, within the bounds of the design
+# variables of analysis.add_design_problem. The variables only bounded below
+# there are given a finite span around the baseline design.
+default_start_bounds = {
+    'I_phase_rms': (20.0, 80.0),
+    'r_wire': (0.001, 0.003),
+    'switching_frequency': (20e3, 200e3),
+    'ac_filter_inductor.n_turns': (10.0, 80.0),
+    'ac_filter_inductor.R_core': (0.01, 0.05),
+    'ac_filter_inductor.r_core': (0.002, 0.009),
+    'ac_filter_inductor.mu_r': (200.0, 1200.0),
+    'dc_link_cap.C': (20e-6, 300e-6),
+    'modulation_index_slack': (0.5, 0.95),
+}
+
+
+# Per-process state of the optimization workers, so the Problem is only set up
+# once per worker rather than once per start
+_worker = {}
+
+
+def _init_worker(driver, values, max_memory, inverter_options):
+    if max_memory is not None:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+
+    prob = quiet(setup_optimization_problem(driver=None if driver is None else driver(),
+                                            values=values, **inverter_options))
+    _worker['prob'] = prob
+    _worker['values'] = baseline_design if values is None else values
+    _worker['design_vars'] = list(prob.model.get_design_vars())
+
+
+def _run_start(index, start):
+    begin = time.perf_counter()
+    prob = _worker['prob']
+    set_values(prob, _worker['values'])
+    set_values(prob, start)
+
+    result = {'index': index, 'start': start, 'pid': os.getpid()}
+    success = optimize(prob, result, errors=optimization_errors + (MemoryError,))
+
+    result.update(success=success,
+                  efficiency=float(prob.get_val('efficiency')[0]),
+                  design={name: prob.get_val(name).copy()
+                          for name in _worker['design_vars']},
+                  elapsed=time.perf_counter() - begin)
+    return result
+
+
+def _deduplicate(results, bounds, tol):
+    """
+    Group converged designs whose design variables, normalized by the span of
+    `bounds` where given, are all within `tol` of each other
+    """
+    unique = []
+    for result in sorted(results, key=lambda result: -result['efficiency']):
+        for group in unique:
+            distance = max(
+                np.max(np.abs(result['design'][name] - value)) /
+                (bounds[name][1] - bounds[name][0] if name in bounds
+                 else max(np.max(np.abs(value)), 1.0))
+                for name, value in group['design'].items())
+            if distance <= tol:
+                group['count'] += 1
+                group['starts'].append(result['index'])
+                break
+        else:
+            unique.append({'design': result['design'],
+                           'efficiency': result['efficiency'],
+                           'count': 1,
+                           'starts': [result['index']]})
+    return unique
+
+
+def multistart_optimize(n_starts, bounds=default_start_bounds, seed=None,
+                        sampler=latin_hypercube, driver=None, values=None,
+                        max_workers=None, max_memory=None, target=None,
+                        tol=1e-3, **inverter_options):
+    """
+    Run the efficiency maximization of analysis.setup_optimization_problem
+    from `n_starts` starting points concurrently on a pool of worker processes,
+    and collect the distinct local optima found.
+
+    Each worker sets up the optimization problem once and reuses it for every
+    start it runs.
+
+    Parameters
+    ----------
+    n_starts : int
+        Number of starting points
+    bounds : dict
+        {name: (lower, upper)} box of the design variables the starting points
+        are sampled in, the remaining design variables start from `values`
+    seed : int, optional
+        Seed of the sampler
+    sampler : callable
+        Sampler from invertermodel.doe, called as sampler(bounds, n, seed=seed)
+    driver : callable, optional
+        Picklable factory of the driver used by every start, e.g. one that
+        returns a pyOptSparseDriver with SNOPT. Defaults to SLSQP.
+    values : dict, optional
+        Values of the remaining inputs, defaults to `analysis.baseline_design`
+    max_workers : int, optional
+        Number of worker processes, capped at the number of CPUs and at
+        `n_starts`
+    max_memory : int, optional
+        Address space limit of each worker process in bytes (Unix only). A
+        start that exceeds it fails instead of exhausting the machine.
+    target : float, optional
+        Stop as soon as a converged start reaches this efficiency. Starts that
+        have not begun are cancelled, those already running still finish.
+    tol : float
+        Converged designs within `tol` of each other (relative to the span of
+        `bounds`) are counted as the same optimum
+    **inverter_options
+        Options passed to the Inverter group
+
+    Returns
+    -------
+    dict
+        The best converged design under 'best', the distinct optima in order
+        of decreasing efficiency under 'optima', the spread of the converged
+        efficiencies under 'spread', and every start's result under 'results'
+    """
+    begin = time.perf_counter()
+    starts = sampler(bounds, n_starts, seed=seed)
+    starts = [{name: column[i] for name, column in starts.items()}
+              for i in range(n_starts)]
+
+    max_workers = min(max_workers or os.cpu_count(), os.cpu_count(), n_starts)
+
+    results = []
+    target_reached = False
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             initializer=_init_worker,
+                             initargs=(driver, values, max_memory,
+                                       inverter_options)) as executor:
+        futures = [executor.submit(_run_start, i, start)
+                   for i, start in enumerate(starts)]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            result = future.result()
+            results.append(result)
+            if target is not None and result['success'] and \
+                    result['efficiency'] >= target:
+                target_reached = True
+                for pending in futures:
+                    pending.cancel()
+                break
+
+    # Collect the starts that were already running when the target was
+    # reached
+    collected = {result['index'] for result in results}
+    for future in futures:
+        if not future.cancelled() and future.result()['index'] not in collected:
+            results.append(future.result())
+
+    results.sort(key=lambda result: result['index'])
+    converged = [result for result in results if result['success']]
+    optima = _deduplicate(converged, bounds, tol)
+    efficiencies = np.array([result['efficiency'] for result in converged])
+
+    spread = {'n_starts': n_starts,
+              'n_run': len(results),
+              'n_converged': len(converged),
+              'n_optima': len(optima)}
+    if converged:
+        spread.update(min=float(efficiencies.min()),
+                      max=float(efficiencies.max()),
+                      mean=float(efficiencies.mean()),
+                      std=float(efficiencies.std()))
+
+    return {'best': optima[0] if optima else None,
+            'optima': optima,
+            'spread': spread,
+            'target_reached': target_reached,
+            'results': results,
+            'elapsed': time.perf_counter() - begin}
@@ -0,0 +1,223 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .analysis import optimize, quiet, set_values, setup_optimization_problem
+
+
+# Mass limit of the efficiency maximization without an active mass constraint
+_no_mass_limit = 1e30
+
+
+def _add_mass_constraint(model):
+    model.add_constraint('mass', upper=_no_mass_limit)
+
+
+def setup_epsilon_problem(driver=None, values=None, temperature_limits=None,
+                          **inverter_options):
+    """
+    Build and set up the efficiency maximization of
+    analysis.setup_optimization_problem with an additional upper limit on the
+    mass, the epsilon constraint. The limit starts out inactive, set it with
+    `set_mass_limit`.
+    """
+    return setup_optimization_problem(driver=driver, values=values,
+                                      temperature_limits=temperature_limits,
+                                      configure=_add_mass_constraint, **inverter_options)
+
+
+def set_mass_limit(prob, mass_limit):
+    """
+    Set the upper limit on the mass of a problem from `setup_epsilon_problem`,
+    scaling the constraint by the limit so it stays well conditioned across
+    the orders of magnitude the front spans
+    """
+    if mass_limit is None or not np.isfinite(mass_limit):
+        prob.model.set_constraint_options('mass', upper=_no_mass_limit, ref=1.0)
+    else:
+        prob.model.set_constraint_options('mass', upper=mass_limit, ref=mass_limit)
+
+
+def _design(prob):
+    return {name: prob.get_val(name).copy()
+            for name in prob.model.get_design_vars()}
+
+
+def mass_anchors(driver=None, values=None, temperature_limits=None, **inverter_options):
+    """
+    End points of the efficiency-versus-mass front: the design of maximum
+    efficiency, with no limit on the mass, and the design of minimum mass,
+    with no regard for the efficiency, both within the `temperature_limits`
+
+    Returns
+    -------
+    max_efficiency, min_mass : dict
+        Each with the converged 'mass', 'efficiency', 'success' and 'design'
+    """
+    anchors = []
+    for objective in ('efficiency', 'mass'):
+        prob = quiet(setup_optimization_problem(driver=None if driver is None else driver(),
+                                                values=values,
+                                                objective=objective,
+                                                temperature_limits=temperature_limits,
+                                                **inverter_options))
+        success = optimize(prob)
+        anchors.append({'mass': float(prob.get_val('mass')[0]),
+                        'efficiency': float(prob.get_val('efficiency')[0]),
+                        'success': success,
+                        'design': _design(prob)})
+    return tuple(anchors)
+
+
+def _run_chain(mass_limits, driver, values, start, temperature_limits, inverter_options):
+    """
+    Optimize for each mass limit in turn on a single problem, starting each
+    point from the last converged optimum
+    """
+    prob = quiet(setup_epsilon_problem(driver=None if driver is None else driver(),
+                                       values=values, temperature_limits=temperature_limits,
+                                       **inverter_options))
+    design_vars = list(prob.model.get_design_vars())
+    if start is not None:
+        set_values(prob, start)
+    warm = _design(prob)
+
+    points = []
+    for mass_limit in mass_limits:
+        begin = time.perf_counter()
+        set_values(prob, warm)
+        set_mass_limit(prob, mass_limit)
+        success = optimize(prob)
+        if success:
+            warm = _design(prob)
+        points.append({'mass_limit': mass_limit,
+                       'mass': prob.get_val('mass')[0],
+                       'efficiency': prob.get_val('efficiency')[0],
+                       'success': success,
+                       'design': {name: prob.get_val(name).copy()
+                                  for name in design_vars},
+                       'elapsed': time.perf_counter() - begin})
+    return points
+
+
+def nondominated(mass, efficiency, mask=None):
+    """
+    Boolean mask of the points not dominated by another point, that is no
+    other point is at least as light and as efficient and strictly better in
+    one of the two, considering only the points in `mask` if given
+    """
+    mass = np.asarray(mass)
+    efficiency = np.asarray(efficiency)
+    mask = np.ones(mass.shape, dtype=bool) if mask is None else np.asarray(mask)
+
+    result = mask.copy()
+    # Sweeping by increasing mass (decreasing efficiency for ties), a point is
+    # nondominated if it is more efficient than every lighter point
+    best = -np.inf
+    for i in np.lexsort((-efficiency, mass)):
+        if not mask[i]:
+            continue
+        if efficiency[i] <= best:
+            result[i] = False
+        else:
+            best = efficiency[i]
+    return result
+
+
+def pareto_front(n_points=10, mass_limits=None, driver=None, values=None,
+                 temperature_limits=None, n_chains=1, max_workers=None, path=None,
+                 **inverter_options):
+    """
+    Trace the efficiency-versus-mass front of the baseline design problem with
+    the epsilon-constraint method: maximize the efficiency subject to
+    mass <= mass_limit for a sequence of decreasing mass limits.
+
+    Consecutive points are warm-started from the previous optimum, which is
+    close to the next one, so each point takes a fraction of the iterations of
+    a cold start. The limits are split into `n_chains` contiguous chains that
+    run in parallel worker processes, each warm-started along its own chain.
+
+    Parameters
+    ----------
+    n_points : int
+        Number of points, with mass limits spaced geometrically between the
+        minimum mass and the mass of the maximum efficiency design (see
+        `mass_anchors`)
+    mass_limits : array_like, optional
+        Mass limits (kg) to use instead, skips computing the anchors
+    driver : callable, optional
+        Picklable factory of the driver used for every point. Defaults to
+        SLSQP.
+    values : dict, optional
+        Values of the remaining inputs, defaults to `analysis.baseline_design`
+    temperature_limits : dict, optional
+        Upper limits of the temperatures of a `thermal` Inverter, see
+        `analysis.add_thermal_constraints`
+    n_chains : int
+        Number of independent warm-started chains the points are split into
+    max_workers : int, optional
+        Number of worker processes, capped at `n_chains`. With a single chain
+        the points are computed in this process.
+    path : str, optional
+        .npz file the front is saved to
+    **inverter_options
+        Options passed to the Inverter group
+
+    Returns
+    -------
+    dict of ndarray
+        Per point, in order of decreasing mass limit: 'mass_limit', 'mass',
+        'efficiency', 'success', 'nondominated' and 'elapsed', and the value
+        of each (scalar) design variable by name
+    """
+    start = None
+    if mass_limits is None:
+        max_efficiency, min_mass = mass_anchors(driver, values, temperature_limits,
+                                                **inverter_options)
+        mass_limits = np.geomspace(min_mass['mass'], max_efficiency['mass'], n_points)
+        if max_efficiency['success']:
+            start = max_efficiency['design']
+    mass_limits = np.sort(np.asarray(mass_limits, dtype=float))[::-1]
+
+    n_chains = max(1, min(n_chains, len(mass_limits)))
+    chains = np.array_split(mass_limits, n_chains)
+    args = (driver, values, start, temperature_limits, inverter_options)
+    if n_chains == 1:
+        points = _run_chain(chains[0], *args)
+    else:
+        max_workers = min(max_workers or os.cpu_count(), n_chains)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_run_chain, chain, *args) for chain in chains]
+            points = [point for future in futures for point in future.result()]
+
+    front = {name: np.array([point[name] for point in points])
+             for name in ('mass_limit', 'mass', 'efficiency', 'success', 'elapsed')}
+    front['nondominated'] = nondominated(front['mass'], front['efficiency'],
+                                         front['success'])
+    for name in points[0]['design']:
+        front[name] = np.array([point['design'][name][0] for point in points])
+
+    if path is not None:
+        save_pareto_front(front, path)
+    return front
+
+
+def save_pareto_front(front, path):
+    """
+    Save a front from `pareto_front` to the .npz file `path`
+    """
+    # Write then rename, so that a crash never leaves a partial file behind
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **front)
+    os.replace(tmp_path, path)
+
+
+def load_pareto_front(path):
+    """
+    Load a front saved by `pareto_front` or `save_pareto_front`
+    """
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
@@ -0,0 +1,322 @@
+"""
+Vectorized NumPy kernels of the Inverter physics, free of OpenMDAO.
+
+The components of the Inverter evaluate these same functions, so
+`evaluate_inverter` reproduces the outputs of the Inverter group exactly while
+skipping the framework overhead, e.g. to screen large numbers of candidate
+designs. All quantities are in the units of the corresponding Inverter
+variables, and every array argument broadcasts against the others.
+"""
+import numpy as np
+
+from .inductor_core_materials import FE4491
+from .mosfet_devices import device_loss, get_device
+
+
+# Datasheet switching energies of the Inverter's MOSFETs
+# https://assets.wolfspeed.com/uploads/2020/12/C2M0025120D.pdf
+C2M0025120D = {'E_on_test': 2.18*1e-3,
+               'E_off_test': 0.68*1e-3,
+               'I_test': 63,
+               'V_test': 1200}
+
+
+def mosfet_loss(I_phase_rms, R_ds_on, switching_frequency, bus_voltage, Q_rr,
+                E_on_test, E_off_test, I_test, V_test,
+                n_phases=3, switches_per_phase=2):
+    """
+    Sum of the conduction and switching losses of all of the MOSFETs
+    """
+    P_cond = 0.5 * I_phase_rms**2 * R_ds_on
+
+    # 80000*sqrt(2)/pi*60*1000*0.002/(60*1200)
+
+    P_switch = switching_frequency * \
+        (np.sqrt(2) / np.pi * I_phase_rms) * bus_voltage
+    P_on = P_switch * E_on_test / (I_test * V_test)
+    P_off = P_switch * E_off_test / (I_test * V_test)
+
+    P_rr = 0.25 * Q_rr * bus_voltage * switching_frequency
+
+    return n_phases * switches_per_phase * (P_cond + P_on + P_off + P_rr)
+
+
+def ac_filter_inductor(I_phase_rms, electrical_frequency, resistivity,
+                       wire_density, n_turns, r_wire, R_core, r_core, mu_r,
+                       core_material=FE4491, n_phases=3):
+    """
+    Geometry, inductance, mass and losses of the toroidal AC filter inductors
+
+    Returns
+    -------
+    dict
+        The outputs of ACFilterInductor, by name
+    """
+    outputs = {}
+
+    wire_area = np.pi * r_wire**2
+    copper_area = n_turns * wire_area
+    available_area = np.pi * (R_core-r_core)**2
+    outputs['radius_difference'] = R_core-r_core
+
+    outputs['fill_factor'] = copper_area / available_area
+
+    core_area = np.pi * r_core**2
+    l_path = 2*np.pi*R_core
+    mu = mu_r * 4*np.pi*1e-7
+    outputs['inductance'] = mu * core_area * n_turns / l_path
+
+    wire_volume = copper_area * l_path
+    wire_mass = wire_volume * wire_density
+
+    core_volume = core_area * 2 * np.pi * R_core
+
+    core_density = core_material.density
+    core_mass = core_volume * core_density
+    outputs['mass'] = n_phases * wire_mass + core_mass
+
+    B = mu * np.sqrt(2) * \
+        I_phase_rms * n_turns / l_path
+    # I_phase_rms * l_path / (n_turns * core_area)
+
+    outputs['max_flux_density'] = B
+
+    freq_scaler = 1e-3 if core_material.f_units == 'kHz' else 1.0
+    steinmetz_params = core_material.steinmetz_params
+    steinmetz_loss = steinmetz_params[0] * \
+        (electrical_frequency *
+         freq_scaler)**steinmetz_params[1] * B**steinmetz_params[2]
+    outputs['P_loss_core'] = n_phases * steinmetz_loss * core_mass
+
+    turn_length = 2*np.pi*r_core
+    outputs['P_loss_copper'] = n_phases * n_turns * resistivity * \
+        turn_length * I_phase_rms**2 / wire_area
+
+    outputs['P_loss'] = outputs['P_loss_core'] + outputs['P_loss_copper']
+    return outputs
+
+
+def dc_link_input_currents(I_phase_rms, modulation_index, power_factor):
+    """
+    RMS and average currents drawn from the DC link
+    """
+    I_in_rms = I_phase_rms * \
+        np.sqrt(2 * np.sqrt(3) / np.pi *
+                modulation_index * (power_factor**2 + 0.25))
+    I_in_avg = 0.75 * np.sqrt(2)*I_phase_rms * \
+        modulation_index * power_factor
+    return I_in_rms, I_in_avg
+
+
+def dc_link_feasible(I_phase_rms, modulation_index, power_factor):
+    """
+    True where the bus voltage is sufficient for the load, i.e. where the
+    modulation index is low enough for the capacitor ripple current to be real
+    """
+    I_in_rms, I_in_avg = dc_link_input_currents(I_phase_rms, modulation_index,
+                                                power_factor)
+    return np.real(I_in_avg) <= np.real(I_in_rms)
+
+
+def dc_link_capacitor(I_phase_rms, modulation_index, power_factor,
+                      switching_frequency, C, dissipation_factor,
+                      specific_capacitance):
+    """
+    Voltage ripple, losses and mass of the DC link capacitors. The outputs are
+    NaN wherever `dc_link_feasible` is False.
+
+    Returns
+    -------
+    dict
+        The outputs of DCLinkCapacitor, by name
+    """
+    I_in_rms, I_in_avg = dc_link_input_currents(I_phase_rms, modulation_index,
+                                                power_factor)
+    with np.errstate(invalid='ignore'):
+        I_cap_rms = np.sqrt(I_in_rms**2 - I_in_avg**2)
+
+    R_cap_f = dissipation_factor / (2*np.pi*switching_frequency*C)
+    return {'V_ripple': I_cap_rms / (C * switching_frequency),
+            'P_loss': I_cap_rms**2 * R_cap_f,
+            'mass': C / specific_capacitance}
+
+
+def ripple_current(modulation_index, L, switching_frequency, bus_voltage):
+    """
+    Ripple current at the output of the inverter
+    """
+    return 0.5 * bus_voltage * \
+        modulation_index / (2 * np.sqrt(3) * L * switching_frequency)
+
+
+def operating_point(load_inductance, filter_inductance, load_phase_back_emf,
+                    load_phase_resistance, I_phase_rms, electrical_frequency,
+                    bus_voltage):
+    """
+    Phase voltage, power factor, modulation index and output power of the
+    inverter driving the load through the filter inductance
+
+    Returns
+    -------
+    dict
+        The combined inductance `L` and the other outputs, by name
+    """
+    L = load_inductance + filter_inductance
+    phase_voltage = ((load_phase_back_emf + load_phase_resistance * (2**0.5)*I_phase_rms)**2 +
+                     (2*np.pi*L*electrical_frequency*(2**0.5)*I_phase_rms)**2)**0.5
+    return {'L': L,
+            'phase_voltage': phase_voltage,
+            'power_factor': load_phase_back_emf / phase_voltage,
+            'modulation_index': 2 * phase_voltage / bus_voltage,
+            'power_out': I_phase_rms * phase_voltage}
+
+
+def performance(current_ripple, voltage_ripple, I_phase_rms, bus_voltage,
+                mosfet_loss, inductor_loss, capacitor_loss, power_out,
+                inductor_mass, cap_mass):
+    """
+    Relative ripples, total loss, efficiency and mass of the inverter
+
+    Returns
+    -------
+    dict
+        The outputs, by name
+    """
+    total_loss = mosfet_loss + inductor_loss + capacitor_loss
+    return {'I_ripple': current_ripple / I_phase_rms,
+            'V_ripple': voltage_ripple / bus_voltage,
+            'total_loss': total_loss,
+            'efficiency': power_out / (power_out + total_loss),
+            'mass': inductor_mass + cap_mass}
+
+
+# Inputs of the Inverter group (by promoted name) read by evaluate_inverter,
+# the discrete ones with their defaults
+_inverter_inputs = ('load_inductance', 'load_phase_back_emf',
+                    'load_phase_resistance', 'I_phase_rms',
+                    'electrical_frequency', 'bus_voltage',
+                    'switching_frequency',
+                    'dc_link_cap.C', 'dc_link_cap.dissipation_factor',
+                    'dc_link_cap.specific_capacitance')
+_mosfet_inputs = ('mosfet.R_ds_on', 'mosfet.Q_rr')
+_device_inputs = ('mosfet.T_junction', 'mosfet.Q_rr')
+_inductor_inputs = ('r_wire', 'ac_filter_inductor.wire_density',
+                    'ac_filter_inductor.resistivity',
+                    'ac_filter_inductor.n_turns', 'ac_filter_inductor.R_core',
+                    'ac_filter_inductor.r_core', 'ac_filter_inductor.mu_r')
+_discrete_inputs = {'n_phases': 3, 'mosfet.switches_per_phase': 2}
+
+
+def evaluate_inverter(use_filter_inductor=True, core_material=FE4491,
+                      mosfet=C2M0025120D, mosfet_device=None, **arrays):
+    """
+    Evaluate the full Inverter chain on `arrays`, keyed by the promoted input
+    names of the Inverter group (as in analysis.baseline_design), e.g.
+
+        evaluate_inverter(**baseline_design)
+
+    If `modulation_index_slack` is not given, the ripple and DC link models see
+    the computed modulation index, as in analysis.run_analysis. With a
+    `mosfet_device` (see the Inverter option), `mosfet.T_junction` and
+    `mosfet.Q_rr` are optional and default to 25 degC and the device's value.
+
+    Returns
+    -------
+    dict
+        Every output of the Inverter group by promoted name, along with
+        `feasible`, True where the bus voltage is sufficient for the load.
+        Infeasible nodes have NaN DC link outputs.
+    """
+    if isinstance(mosfet_device, str):
+        mosfet_device = get_device(mosfet_device)
+    if mosfet_device is not None:
+        arrays.setdefault('mosfet.T_junction', 25.0)
+        arrays.setdefault('mosfet.Q_rr', mosfet_device.Q_rr)
+
+    names = _inverter_inputs + (_inductor_inputs if use_filter_inductor else ()) + \
+        (_mosfet_inputs if mosfet_device is None else _device_inputs)
+    missing = [name for name in names if name not in arrays]
+    unknown = [name for name in arrays
+               if name not in _inverter_inputs + _inductor_inputs +
+               _mosfet_inputs + _device_inputs
+               and name not in _discrete_inputs
+               and name != 'modulation_index_slack']
+    if missing or unknown:
+        raise TypeError(f"evaluate_inverter() missing inputs {missing}, "
+                        f"unknown inputs {unknown}")
+
+    continuous = [name for name in arrays if name not in _discrete_inputs]
+    values = dict(zip(continuous, np.broadcast_arrays(
+        *(np.asarray(arrays[name], dtype=float) for name in continuous))))
+    discrete = {name: arrays.get(name, default)
+                for name, default in _discrete_inputs.items()}
+    n_phases = discrete['n_phases']
+
+    I_phase_rms = values['I_phase_rms']
+    switching_frequency = values['switching_frequency']
+    bus_voltage = values['bus_voltage']
+    electrical_frequency = values['electrical_frequency']
+
+    outputs = {}
+    if mosfet_device is None:
+        outputs['mosfet.P_loss'] = mosfet_loss(
+            I_phase_rms, values['mosfet.R_ds_on'], switching_frequency,
+            bus_voltage, values['mosfet.Q_rr'],
+            n_phases=n_phases,
+            switches_per_phase=discrete['mosfet.switches_per_phase'],
+            **mosfet)
+    else:
+        outputs['mosfet.P_loss'] = device_loss(
+            mosfet_device, I_phase_rms, switching_frequency, bus_voltage,
+            values['mosfet.Q_rr'], values['mosfet.T_junction'],
+            n_phases=n_phases,
+            switches_per_phase=discrete['mosfet.switches_per_phase'])
+
+    zeros = np.zeros_like(I_phase_rms)
+    if use_filter_inductor:
+        inductor = ac_filter_inductor(
+            I_phase_rms, electrical_frequency,
+            values['ac_filter_inductor.resistivity'],
+            values['ac_filter_inductor.wire_density'],
+            values['ac_filter_inductor.n_turns'], values['r_wire'],
+            values['ac_filter_inductor.R_core'],
+            values['ac_filter_inductor.r_core'],
+            values['ac_filter_inductor.mu_r'],
+            core_material=core_material, n_phases=n_phases)
+        outputs.update((f'ac_filter_inductor.{name}', value)
+                       for name, value in inductor.items())
+        filter_inductance = inductor['inductance']
+        inductor_mass = inductor['mass']
+        inductor_loss = inductor['P_loss']
+    else:
+        filter_inductance = inductor_mass = inductor_loss = zeros
+
+    outputs.update(operating_point(values['load_inductance'], filter_inductance,
+                                   values['load_phase_back_emf'],
+                                   values['load_phase_resistance'], I_phase_rms,
+                                   electrical_frequency, bus_voltage))
+    L = outputs['L']
+    power_factor = outputs['power_factor']
+    modulation_index = outputs['modulation_index']
+    modulation_index_slack = values.get('modulation_index_slack',
+                                        modulation_index)
+
+    outputs['ripple_current.I_ripple'] = ripple_current(
+        modulation_index_slack, L, switching_frequency, bus_voltage)
+    outputs.update((f'dc_link_cap.{name}', value)
+                   for name, value in dc_link_capacitor(
+                       I_phase_rms, modulation_index_slack, power_factor,
+                       switching_frequency, values['dc_link_cap.C'],
+                       values['dc_link_cap.dissipation_factor'],
+                       values['dc_link_cap.specific_capacitance']).items())
+
+    outputs.update(performance(outputs['ripple_current.I_ripple'],
+                               outputs['dc_link_cap.V_ripple'], I_phase_rms,
+                               bus_voltage, outputs['mosfet.P_loss'],
+                               inductor_loss, outputs['dc_link_cap.P_loss'],
+                               outputs['power_out'], inductor_mass,
+                               outputs['dc_link_cap.mass']))
+    outputs.update(modulation_index_residual=modulation_index - modulation_index_slack,
+                   feasible=dc_link_feasible(I_phase_rms, modulation_index_slack,
+                                             power_factor))
+    return outputs
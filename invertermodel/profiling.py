@@ -0,0 +1,163 @@
+import functools
+import json
+import sys
+import time
+
+import openmdao.api as om
+
+
+# Methods counted and timed on every component, by the category they are
+# reported under
+_component_methods = {
+    'compute': 'compute',
+    'apply_nonlinear': 'compute',
+    'compute_partials': 'linearize',
+    'linearize': 'linearize',
+    'solve_nonlinear': 'solve',
+    'solve_linear': 'solve',
+}
+
+_categories = ('compute', 'linearize', 'solve')
+
+
+def _new_stats():
+    stats = {category: {'calls': 0, 'cs_calls': 0, 'time': 0.0}
+             for category in _categories}
+    stats['analysis_errors'] = 0
+    return stats
+
+
+class Profiler:
+    """
+    Opt-in call counts and wall times of a system and all of its subsystems,
+    e.g. an Inverter or a whole model.
+
+    For every component, calls of compute (or apply_nonlinear), linearize (or
+    compute_partials) and solve_nonlinear/solve_linear are counted and timed,
+    with the calls made under complex step counted separately, along with the
+    AnalysisErrors they raise. For every group, the calls of its nonlinear and
+    linear solvers are counted and timed as solve, inclusive of the time spent
+    in its subsystems.
+
+    The system must be set up before the profiler is attached. Usage:
+
+        with Profiler(prob.model) as profiler:
+            prob.run_driver()
+        print(profiler.table())
+
+    Parameters
+    ----------
+    system : System
+        Root of the profiled systems
+    """
+
+    def __init__(self, system):
+        self.system = system
+        self._stats = {}
+        self._patched = []
+
+    def _wrap(self, owner, method_name, stats, category, component=None):
+        method = getattr(owner, method_name)
+        counters = stats[category]
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except om.AnalysisError:
+                stats['analysis_errors'] += 1
+                raise
+            finally:
+                counters['time'] += time.perf_counter() - start
+                if component is not None and component.under_complex_step:
+                    counters['cs_calls'] += 1
+                else:
+                    counters['calls'] += 1
+
+        # Shadow the method on the instance only, so the class is untouched
+        owner.__dict__[method_name] = wrapper
+        self._patched.append((owner, method_name))
+
+    def attach(self):
+        if self._patched:
+            return self
+
+        for system in self.system.system_iter(include_self=True, recurse=True):
+            stats = self._stats.setdefault(system.pathname, _new_stats())
+            if isinstance(system, om.Group):
+                for solver in (system.nonlinear_solver, system.linear_solver):
+                    if solver is not None:
+                        self._wrap(solver, 'solve', stats, 'solve')
+            else:
+                for method_name, category in _component_methods.items():
+                    if hasattr(system, method_name):
+                        self._wrap(system, method_name, stats, category,
+                                   component=system)
+        return self
+
+    def detach(self):
+        for owner, method_name in self._patched:
+            del owner.__dict__[method_name]
+        self._patched = []
+
+    def __enter__(self):
+        return self.attach()
+
+    def __exit__(self, *args):
+        self.detach()
+
+    def reset(self):
+        for path in self._stats:
+            self._stats[path] = _new_stats()
+
+    def stats(self):
+        """
+        Statistics of every system that was called, keyed by pathname
+        ('' for the root model)
+        """
+        return {path: stats for path, stats in self._stats.items()
+                if stats['analysis_errors'] or
+                any(stats[category]['calls'] or stats[category]['cs_calls']
+                    for category in _categories)}
+
+    def to_json(self, path=None):
+        """
+        Return the statistics as a JSON string, and write them to `path` if
+        given
+        """
+        text = json.dumps(self.stats(), indent=2)
+        if path is not None:
+            with open(path, 'w') as file:
+                file.write(text)
+        return text
+
+    def table(self, sort_by='time'):
+        """
+        Format the statistics as a text table, one row per system, sorted by
+        total time ('time') or by pathname ('path')
+        """
+        stats = self.stats()
+        total_time = {path: sum(entry[category]['time'] for category in _categories)
+                      for path, entry in stats.items()}
+        paths = sorted(stats, key=lambda path: -total_time[path]) \
+            if sort_by == 'time' else sorted(stats)
+
+        header = f"{'system':<36}"
+        for category in _categories:
+            header += f"{category:>10}{'cs':>8}{'time (s)':>11}"
+        header += f"{'errors':>8}"
+        lines = [header, '-' * len(header)]
+        for path in paths:
+            entry = stats[path]
+            line = f"{path or '<model>':<36}"
+            for category in _categories:
+                counters = entry[category]
+                line += f"{counters['calls']:>10d}{counters['cs_calls']:>8d}" \
+                        f"{counters['time']:>11.4f}"
+            line += f"{entry['analysis_errors']:>8d}"
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def print_table(self, out_stream=sys.stdout, sort_by='time'):
+        print(self.table(sort_by), file=out_stream)
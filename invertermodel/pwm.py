@@ -0,0 +1,348 @@
+import numpy as np
+
+
+# Per-unit waveform integrals tabulated by PWMWaveform. The DC link currents
+# are normalized by the phase RMS current, the phase current ripple by
+# bus_voltage / (L * switching_frequency).
+integral_names = ('I_in_ms',     # Mean square of the DC link input current
+                  'I_in_avg',    # Average of the DC link input current
+                  'I_cap_ms',    # Mean square of the DC link capacitor current
+                  'ripple_pp',   # Largest peak-to-peak phase current ripple
+                  'ripple_ms')   # Mean square of the phase current ripple
+
+schemes = ('spwm', 'svpwm')
+
+# Number of phases switched on during each of the seven segments of a
+# centre-aligned switching period, between the eight switching instants
+_n_on = np.array([0, 1, 2, 3, 2, 1, 0])
+
+
+def _references(modulation_index, theta, scheme):
+    """
+    Phase voltage references, in units of half the bus voltage, at the
+    fundamental angles `theta`
+    """
+    angle = theta[..., np.newaxis] - 2 * np.pi / 3 * np.arange(3)
+    v = modulation_index[..., np.newaxis] * np.cos(angle)
+    if scheme == 'svpwm':
+        # Min-max zero sequence injection, equivalent to space vector PWM
+        v = v - 0.5 * (v.max(axis=-1, keepdims=True) + v.min(axis=-1, keepdims=True))
+    elif scheme != 'spwm':
+        raise ValueError(f"Unknown PWM scheme '{scheme}', expected one of {schemes}")
+    return angle, v
+
+
+def switching_duties(modulation_index, power_factor, n_periods, scheme='svpwm'):
+    """
+    Duty cycles and phase currents (per unit of the phase RMS current) of the
+    three phases in each of the `n_periods` regularly sampled switching
+    periods of one fundamental period, for every operating point at once.
+
+    Returns
+    -------
+    duties, currents : ndarray
+        Shape (..., n_periods, 3), over the broadcast shape of the inputs
+    """
+    modulation_index, power_factor = np.broadcast_arrays(
+        np.real(modulation_index), np.real(power_factor))
+    theta = 2 * np.pi * (np.arange(n_periods) + 0.5) / n_periods
+    angle, v = _references(modulation_index[..., np.newaxis], theta, scheme)
+    duties = np.clip(0.5 * (1 + v), 0.0, 1.0)
+
+    phi = np.arccos(np.clip(power_factor, -1.0, 1.0))
+    currents = np.sqrt(2) * np.cos(angle - phi[..., np.newaxis, np.newaxis])
+    return duties, currents
+
+
+def waveform_integrals(modulation_index, power_factor, n_periods, scheme='svpwm'):
+    """
+    Simulate the switching waveforms of a two-level three-phase inverter over
+    one fundamental period with `n_periods` centre-aligned switching periods,
+    and integrate them exactly, segment by segment.
+
+    The phase currents are taken as constant over each switching period. All
+    of the operating points are simulated at once.
+
+    Returns
+    -------
+    dict
+        Each of `integral_names`, over the broadcast shape of the inputs
+    """
+    duties, currents = switching_duties(modulation_index, power_factor, n_periods,
+                                        scheme)
+
+    # Sort the phases by decreasing duty, the pulses are then nested with the
+    # longest outermost
+    order = np.argsort(-duties, axis=-1)
+    d = np.take_along_axis(duties, order, axis=-1)
+    i = np.take_along_axis(currents, order, axis=-1)
+
+    # DC link current: the current of the one phase on, or of the two phases
+    # on, and none with all or no phases on
+    I_in_avg = np.sum(duties * currents, axis=-1)
+    I_in_ms = (d[..., 0] - d[..., 1]) * i[..., 0]**2 + \
+        (d[..., 1] - d[..., 2]) * (i[..., 0] + i[..., 1])**2
+    I_in_avg = I_in_avg.mean(axis=-1)
+    I_in_ms = I_in_ms.mean(axis=-1)
+
+    # Phase current ripple of phase a: the integral of its switched voltage
+    # to the load neutral less the average, piecewise linear between the
+    # switching instants
+    rank = np.argmax(order == 0, axis=-1)
+    instants = np.concatenate([np.zeros(d.shape[:-1] + (1,)),
+                               0.5 * (1 - d),
+                               0.5 * (1 + d[..., ::-1]),
+                               np.ones(d.shape[:-1] + (1,))], axis=-1)
+    h = np.diff(instants, axis=-1)
+    v = (_n_on > rank[..., np.newaxis]) - _n_on / 3
+    v_avg = duties[..., 0] - duties.sum(axis=-1) / 3
+    ripple = np.cumsum((v - v_avg[..., np.newaxis]) * h, axis=-1)
+    ripple = np.concatenate([np.zeros(ripple.shape[:-1] + (1,)), ripple], axis=-1)
+
+    y0, y1 = ripple[..., :-1], ripple[..., 1:]
+    mean = np.sum(h * (y0 + y1), axis=-1) / 2
+    mean_square = np.sum(h * (y0**2 + y0 * y1 + y1**2), axis=-1) / 3
+
+    return {'I_in_ms': I_in_ms,
+            'I_in_avg': I_in_avg,
+            'I_cap_ms': I_in_ms - I_in_avg**2,
+            'ripple_pp': np.max(ripple.max(axis=-1) - ripple.min(axis=-1), axis=-1),
+            'ripple_ms': np.mean(mean_square - mean**2, axis=-1)}
+
+
+def pwm_waveforms(modulation_index, power_factor, n_periods, scheme='svpwm',
+                  samples=64):
+    """
+    Sampled switching waveforms over one fundamental period, `samples` per
+    switching period, for spectral analysis with `harmonic_spectrum`
+
+    Returns
+    -------
+    dict
+        'phase_voltage' of phase a to the load neutral per unit of the bus
+        voltage, 'dc_current' per unit of the phase RMS current and 'ripple'
+        of the phase a current per unit of bus_voltage / (L *
+        switching_frequency), each of shape (..., n_periods * samples)
+    """
+    duties, currents = switching_duties(modulation_index, power_factor, n_periods,
+                                        scheme)
+    tau = (np.arange(samples) + 0.5) / samples
+    on = np.abs(tau[:, np.newaxis] - 0.5) < 0.5 * duties[..., np.newaxis, :]
+
+    phase_voltage = on[..., 0] - on.sum(axis=-1) / 3
+    dc_current = np.sum(on * currents[..., np.newaxis, :], axis=-1)
+    ripple = np.cumsum(phase_voltage - phase_voltage.mean(axis=-1, keepdims=True),
+                       axis=-1) / samples
+
+    shape = phase_voltage.shape[:-2] + (-1,)
+    return {'phase_voltage': phase_voltage.reshape(shape),
+            'dc_current': dc_current.reshape(shape),
+            'ripple': ripple.reshape(shape)}
+
+
+def harmonic_spectrum(waveform):
+    """
+    Amplitudes of the harmonics of the fundamental of `waveform`, sampled
+    uniformly over one fundamental period along its last axis. Entry 0 is the
+    average.
+    """
+    n = waveform.shape[-1]
+    amplitude = np.abs(np.fft.rfft(waveform, axis=-1)) * 2 / n
+    amplitude[..., 0] /= 2
+    return amplitude
+
+
+class PWMWaveform:
+    """
+    Waveform-level model of the switching ripple, with the per-unit waveform
+    integrals (see `integral_names`) tabulated lazily by (modulation index,
+    power factor, frequency ratio).
+
+    The integrals are simulated on a grid of `resolution` points per unit of
+    the modulation index and of the power factor, at the nearest whole number
+    of switching periods per fundamental period, and interpolated bilinearly.
+    Grid points are only simulated the first time an operating point needs
+    them, so repeated evaluations are table lookups. One instance is normally
+    shared by the RippleCurrent and DCLinkCapacitor of an Inverter (see its
+    `pwm` option).
+
+    Parameters
+    ----------
+    scheme : str
+        'svpwm' for space vector (min-max injection) or 'spwm' for sinusoidal
+        PWM
+    resolution : int
+        Grid points per unit of the modulation index and power factor
+    """
+
+    def __init__(self, scheme='svpwm', resolution=64):
+        if scheme not in schemes:
+            raise ValueError(f"Unknown PWM scheme '{scheme}', expected one of {schemes}")
+        self.scheme = scheme
+        self.resolution = resolution
+        self._table = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"PWMWaveform('{self.scheme}', resolution={self.resolution})"
+
+    def __len__(self):
+        return len(self._table)
+
+    def clear(self):
+        self._table.clear()
+        self.hits = self.misses = 0
+
+    def _lookup(self, grid_points):
+        """
+        Table rows of the grid points, rows of (n_periods, i_m, i_pf),
+        simulating the missing ones in one batch per number of switching
+        periods
+        """
+        # Pack each grid point into a single integer, as unique is much faster
+        # on those than on rows
+        offset = 2**19
+        packed = (grid_points[:, 0] << 40) + ((grid_points[:, 1] + offset) << 20) + \
+            grid_points[:, 2] + offset
+        packed, index, inverse = np.unique(packed, return_index=True, return_inverse=True)
+        keys = list(map(tuple, grid_points[index].tolist()))
+        missing = [key for key in keys if key not in self._table]
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+
+        for n in {key[0] for key in missing}:
+            batch = np.array([key[1:] for key in missing if key[0] == n])
+            values = waveform_integrals(batch[:, 0] / self.resolution,
+                                        batch[:, 1] / self.resolution,
+                                        n, self.scheme)
+            values = np.column_stack([values[name] for name in integral_names])
+            for (i, j), row in zip(batch.tolist(), values):
+                self._table[n, i, j] = row
+
+        rows = np.array([self._table[key] for key in keys])
+        return rows[inverse.ravel()]
+
+    def integrals(self, modulation_index, power_factor, frequency_ratio,
+                  gradient=False):
+        """
+        Per-unit waveform integrals at each operating point, the frequency
+        ratio being the switching frequency over the electrical frequency
+
+        Returns
+        -------
+        values : dict
+            Each of `integral_names`, over the broadcast shape of the inputs
+        gradients : dict, only if `gradient` is True
+            Derivatives of each integral with respect to the modulation index
+            and the power factor, as a pair by name
+        """
+        power_factor = np.asarray(power_factor)
+        power_factor = np.where(np.abs(np.real(power_factor)) > 1,
+                                np.sign(np.real(power_factor)), power_factor)
+        modulation_index, power_factor, frequency_ratio = np.broadcast_arrays(
+            modulation_index, power_factor, frequency_ratio)
+        shape = modulation_index.shape
+        n_periods = np.maximum(np.rint(np.real(frequency_ratio)), 1).astype(int).ravel()
+
+        x = modulation_index.ravel() * self.resolution
+        y = power_factor.ravel() * self.resolution
+        i_m = np.floor(np.real(x)).astype(int)
+        i_pf = np.minimum(np.floor(np.real(y)).astype(int), self.resolution - 1)
+        t_m = (x - i_m)[:, np.newaxis]
+        t_pf = (y - i_pf)[:, np.newaxis]
+
+        # The four corners of each point's grid cell
+        corners = np.array([(0, 0), (1, 0), (0, 1), (1, 1)])
+        grid_points = np.stack([np.broadcast_to(n_periods, (4, n_periods.size)).astype(np.int64),
+                                i_m + corners[:, :1],
+                                i_pf + corners[:, 1:]], axis=-1)
+        v00, v10, v01, v11 = self._lookup(grid_points.reshape(-1, 3)).reshape(
+            4, n_periods.size, len(integral_names))
+
+        lower = v00 + t_m * (v10 - v00)
+        upper = v01 + t_m * (v11 - v01)
+        values = lower + t_pf * (upper - lower)
+        values = {name: values[:, k].reshape(shape)
+                  for k, name in enumerate(integral_names)}
+        if not gradient:
+            return values
+
+        d_dm = ((v10 - v00) + t_pf * ((v11 - v01) - (v10 - v00))) * self.resolution
+        d_dpf = (upper - lower) * self.resolution
+        gradients = {name: (d_dm[:, k].reshape(shape), d_dpf[:, k].reshape(shape))
+                     for k, name in enumerate(integral_names)}
+        return values, gradients
+
+
+def waveform_ripple_current(pwm, modulation_index, L, switching_frequency,
+                            bus_voltage, electrical_frequency, partials=False):
+    """
+    Largest peak-to-peak ripple of the phase current over the fundamental
+    period, the waveform-level counterpart of physics.ripple_current
+
+    Returns
+    -------
+    I_ripple : ndarray
+    partials : dict, only if `partials` is True
+        Derivatives of I_ripple with respect to each input, by name. The
+        integrals only change with the frequency ratio in whole numbers of
+        switching periods, which is neglected.
+    """
+    scale = bus_voltage / (L * switching_frequency)
+    result = pwm.integrals(modulation_index, 1.0,
+                           switching_frequency / electrical_frequency, partials)
+    if not partials:
+        return scale * result['ripple_pp']
+
+    values, gradients = result
+    I_ripple = scale * values['ripple_pp']
+    return I_ripple, {'modulation_index': scale * gradients['ripple_pp'][0],
+                      'L': -I_ripple / L,
+                      'switching_frequency': -I_ripple / switching_frequency,
+                      'bus_voltage': I_ripple / bus_voltage}
+
+
+def waveform_dc_link_capacitor(pwm, I_phase_rms, modulation_index, power_factor,
+                               switching_frequency, C, dissipation_factor,
+                               specific_capacitance, electrical_frequency,
+                               partials=False):
+    """
+    Voltage ripple, losses and mass of the DC link capacitors with the RMS
+    capacitor current from the switching waveforms, the waveform-level
+    counterpart of physics.dc_link_capacitor
+
+    Returns
+    -------
+    outputs : dict
+        The outputs of DCLinkCapacitor, by name
+    partials : dict, only if `partials` is True
+        Derivatives of V_ripple and P_loss with respect to the modulation
+        index and power factor, by (output, input)
+    """
+    result = pwm.integrals(modulation_index, power_factor,
+                           switching_frequency / electrical_frequency, partials)
+    values, gradients = result if partials else (result, None)
+
+    positive = np.real(values['I_cap_ms']) > 0
+    I_cap_ms = np.where(positive, values['I_cap_ms'], 0.0)
+    I_cap_rms = I_phase_rms * np.sqrt(I_cap_ms)
+    R_cap_f = dissipation_factor / (2*np.pi*switching_frequency*C)
+    outputs = {'V_ripple': I_cap_rms / (C * switching_frequency),
+               'P_loss': I_cap_rms**2 * R_cap_f,
+               'mass': C / specific_capacitance}
+    if not partials:
+        return outputs
+
+    derivatives = {}
+    for name, dI_cap_ms in zip(('modulation_index', 'power_factor'),
+                               gradients['I_cap_ms']):
+        # The mean square current is clipped at zero, e.g. at zero modulation
+        # index, where it has no gradient rather than an infinite one
+        dI_cap_ms = np.where(positive, dI_cap_ms, 0.0)
+        numerator = 0.5 * I_phase_rms * dI_cap_ms
+        dI_cap_rms = np.divide(numerator, np.sqrt(I_cap_ms),
+                               out=np.zeros_like(numerator), where=positive)
+        derivatives['V_ripple', name] = dI_cap_rms / (C * switching_frequency)
+        derivatives['P_loss', name] = I_phase_rms**2 * dI_cap_ms * R_cap_f
+    return outputs, derivatives
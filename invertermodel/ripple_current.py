@@ -2,30 +2,95 @@ import numpy as np
 
 import openmdao.api as om
 
+from .eval_cache import EvaluationCache, cached_compute, cached_compute_partials
+from .physics import ripple_current
+from .pwm import PWMWaveform, waveform_ripple_current
+
 
 class RippleCurrent(om.ExplicitComponent):
+    def initialize(self):
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("use_cs", default=False, types=bool,
+                             desc="Compute partials with complex step instead of analytically")
+        self.options.declare("cache", default=None, types=EvaluationCache, allow_none=True,
+                             desc="Cache of the outputs and partials, keyed on the inputs")
+        self.options.declare("pwm", default=None, types=PWMWaveform, allow_none=True,
+                             desc="Waveform-level PWM model giving the largest peak-to-peak ripple "
+                                  "over the fundamental period, instead of the closed form")
+
     def setup(self):
-        self.add_input("modulation_index", units='unitless',
+        nn = self.options['num_nodes']
+        ar = np.arange(nn)
+
+        self.add_input("modulation_index", shape=nn, units='unitless',
                        desc="Modulation index")
-        self.add_input("L", units='H',
+        self.add_input("L", shape=nn, units='H',
                        desc="Phase inductance")
-        self.add_input("switching_frequency", units='Hz',
+        self.add_input("switching_frequency", shape=nn, units='Hz',
                        desc="The inverter’s switching frequency")
-        self.add_input("bus_voltage", units='V',
+        self.add_input("bus_voltage", shape=nn, units='V',
                        desc="DC link voltage")
+        if self.options['pwm'] is not None:
+            self.add_input("electrical_frequency", shape=nn, units='Hz',
+                           desc="The inverter’s output electrical frequency")
 
-        self.add_output("I_ripple", units='A',
+        self.add_output("I_ripple", shape=nn, units='A',
                         desc="Ripple current at the output of the inverter")
 
-        self.declare_partials('*', '*', method='cs')
+        if self.options['use_cs']:
+            self.declare_partials('*', '*', rows=ar, cols=ar, method='cs')
+        else:
+            self.declare_partials('I_ripple', ['modulation_index', 'L',
+                                               'switching_frequency', 'bus_voltage'],
+                                  rows=ar, cols=ar)
 
+    @cached_compute
     def compute(self, inputs, outputs):
+        pwm = self.options['pwm']
+        if pwm is not None:
+            outputs['I_ripple'] = waveform_ripple_current(pwm,
+                                                          inputs['modulation_index'],
+                                                          inputs['L'],
+                                                          inputs['switching_frequency'],
+                                                          inputs['bus_voltage'],
+                                                          inputs['electrical_frequency'])
+            return
+
+        outputs['I_ripple'] = ripple_current(inputs['modulation_index'],
+                                             inputs['L'],
+                                             inputs['switching_frequency'],
+                                             inputs['bus_voltage'])
+
+    @cached_compute_partials
+    def compute_partials(self, inputs, partials):
+        if self.options['use_cs']:
+            return
+
+        pwm = self.options['pwm']
+        if pwm is not None:
+            _, derivatives = waveform_ripple_current(pwm,
+                                                     inputs['modulation_index'],
+                                                     inputs['L'],
+                                                     inputs['switching_frequency'],
+                                                     inputs['bus_voltage'],
+                                                     inputs['electrical_frequency'],
+                                                     partials=True)
+            for name, value in derivatives.items():
+                partials['I_ripple', name] = value
+            return
+
         modulation_index = inputs['modulation_index']
         L = inputs['L']
         switching_frequency = inputs['switching_frequency']
         bus_voltage = inputs['bus_voltage']
 
-        # print(
-        #     f"I_ripple: bus_voltage: {bus_voltage}, modulation_index: {modulation_index}, L: {L}, switching_frequency: {switching_frequency}")
-        outputs['I_ripple'] = 0.5 * bus_voltage * \
-            modulation_index / (2 * np.sqrt(3) * L * switching_frequency)
+        k = 0.5 / (2 * np.sqrt(3))
+        I_ripple = k * bus_voltage * modulation_index / (L * switching_frequency)
+
+        partials['I_ripple', 'modulation_index'] = k * \
+            bus_voltage / (L * switching_frequency)
+        partials['I_ripple', 'L'] = -I_ripple / L
+        partials['I_ripple', 'switching_frequency'] = -I_ripple / switching_frequency
+        partials['I_ripple', 'bus_voltage'] = k * \
+            modulation_index / (L * switching_frequency)
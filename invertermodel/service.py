@@ -0,0 +1,317 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from .analysis import baseline_design, run_analysis, set_values, setup_inverter_problem
+
+
+# Outputs returned for every request
+service_outputs = ('efficiency', 'total_loss', 'mass', 'I_ripple', 'V_ripple',
+                   'modulation_index')
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations in logarithmically spaced bins, from `lower` to
+    `upper` seconds with `bins_per_decade` bins per decade. Durations outside
+    of the range are counted in the first or last bin.
+    """
+
+    def __init__(self, lower=1e-6, upper=1e2, bins_per_decade=10):
+        n_bins = int(round(np.log10(upper / lower) * bins_per_decade))
+        self.edges = np.geomspace(lower, upper, n_bins + 1)
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def record(self, durations):
+        durations = np.atleast_1d(np.asarray(durations, dtype=float))
+        bins = np.clip(np.searchsorted(self.edges, durations, side='right') - 1,
+                       0, self.counts.size - 1)
+        self.counts += np.bincount(bins, minlength=self.counts.size)
+        self.total += durations.sum()
+        self.max = max(self.max, durations.max())
+
+    def percentile(self, q):
+        """
+        Upper edge of the bin holding the `q` quantile, so an upper bound
+        within one bin width
+        """
+        cumulative = np.cumsum(self.counts)
+        return float(self.edges[1:][np.searchsorted(cumulative, q * cumulative[-1])])
+
+    def summary(self):
+        count = self.count
+        if count == 0:
+            return {'count': 0}
+        nonzero = np.flatnonzero(self.counts)
+        return {'count': count,
+                'mean': self.total / count,
+                'max': self.max,
+                'p50': self.percentile(0.5),
+                'p90': self.percentile(0.9),
+                'p99': self.percentile(0.99),
+                'histogram': {'edges': self.edges[nonzero[0]:nonzero[-1] + 2].tolist(),
+                              'counts': self.counts[nonzero[0]:nonzero[-1] + 1].tolist()}}
+
+
+# Per-worker state of the service, so the Problem is only set up once per
+# worker. Thread local, so thread pools give each thread its own Problem.
+_worker = threading.local()
+
+
+def _init_worker(design, max_batch_size, outputs, inverter_options):
+    _worker.prob = setup_inverter_problem(num_nodes=max_batch_size, values=design,
+                                          **inverter_options)
+    _worker.design = design
+    _worker.outputs = outputs
+
+
+def _evaluate_batch(columns):
+    prob = _worker.prob
+    nn = prob.model.inverter.options['num_nodes']
+    n_batch = len(next(iter(columns.values())))
+
+    # Inputs that earlier batches varied go back to their design values
+    set_values(prob, _worker.design)
+    set_values(prob, {name: np.pad(np.asarray(values, dtype=float), (0, nn - n_batch), mode='edge')
+                      for name, values in columns.items()})
+    feasible = run_analysis(prob)[:n_batch]
+    return feasible, {name: prob.get_val(name)[:n_batch].copy() for name in _worker.outputs}
+
+
+class InverterService:
+    """
+    Asyncio service evaluating single operating points of an Inverter design
+    in vectorized batches.
+
+    Requests are queued and coalesced into a batch until `max_batch_size`
+    requests are waiting or `max_delay` seconds have passed since the first
+    one. Each batch is evaluated on a worker pool, whose workers each hold a
+    Problem with `num_nodes=max_batch_size`, and every request's future is
+    resolved with its own outputs.
+
+    Requests are validated when submitted, so a failing batch is an error of
+    the evaluation itself, reported to every request of the batch.
+
+    The queue holds at most `max_pending` requests and at most one batch per
+    worker is in flight, so when the workers fall behind `submit` waits for
+    room (or raises asyncio.QueueFull when told not to wait).
+
+    Use as an async context manager, or call `start` and `stop`.
+
+    Parameters
+    ----------
+    design : dict, optional
+        Values of the Inverter inputs, defaults to `analysis.baseline_design`.
+        Requests override some of them, and every input a request sets must
+        have a design value.
+    max_batch_size : int
+        Largest number of requests per batch
+    max_delay : float
+        Longest wait in seconds for a batch to fill up
+    max_pending : int
+        Largest number of queued requests
+    max_workers : int
+        Number of workers
+    executor : str
+        'process' or 'thread' pool. Threads keep everything in one process,
+        for testing, but share the GIL.
+    outputs : iterable of str
+        Outputs returned for every request
+    **inverter_options
+        Options passed to the Inverter group
+    """
+
+    def __init__(self, design=None, max_batch_size=256, max_delay=2e-3, max_pending=4096,
+                 max_workers=1, executor='process', outputs=service_outputs,
+                 **inverter_options):
+        if executor not in ('process', 'thread'):
+            raise ValueError(f"Unknown executor '{executor}', expected 'process' or 'thread'")
+        self.design = dict(baseline_design if design is None else design)
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_workers = max_workers
+        self.executor = executor
+        self.outputs = tuple(outputs)
+        self.inverter_options = inverter_options
+
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._pool = None
+        self._batcher = None
+        self._slots = None
+        self._batches = set()
+        self.latency = LatencyHistogram()
+        self.batch_latency = LatencyHistogram()
+        self.batch_sizes = np.zeros(max_batch_size + 1, dtype=np.int64)
+        self._started = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def start(self):
+        pool = ProcessPoolExecutor if self.executor == 'process' else ThreadPoolExecutor
+        self._pool = pool(max_workers=self.max_workers,
+                          initializer=_init_worker,
+                          initargs=(self.design, self.max_batch_size, self.outputs,
+                                    self.inverter_options))
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+        self._started = time.perf_counter()
+
+    async def stop(self):
+        """
+        Evaluate every queued request, then shut the workers down
+        """
+        await self._queue.put(None)
+        await self._batcher
+        if self._batches:
+            await asyncio.gather(*self._batches)
+        self._pool.shutdown()
+
+    async def submit(self, values, wait=True):
+        """
+        Queue the evaluation of the operating point `values` (a dict of
+        scalars by promoted input name) and return the future of its outputs,
+        a dict of floats by output name along with 'feasible'. Invalid values
+        are rejected here, so they never fail the other requests of a batch.
+        """
+        unknown = [name for name in values if name not in self.design]
+        if unknown:
+            raise ValueError(f"Inputs {unknown} have no design value")
+        try:
+            values = {name: float(value) for name, value in values.items()}
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"Input values must be real scalars: {error}") from None
+
+        future = asyncio.get_running_loop().create_future()
+        request = (values, future, time.perf_counter())
+        if wait:
+            await self._queue.put(request)
+        else:
+            self._queue.put_nowait(request)
+        return future
+
+    async def evaluate(self, values):
+        """
+        Evaluate the operating point `values`, see `submit`
+        """
+        return await (await self.submit(values))
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            request = await self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    request = self._queue.get_nowait()
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            await self._slots.acquire()
+            task = loop.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch):
+        begin = time.perf_counter()
+        names = {name for values, _, _ in batch for name in values}
+        columns = {name: [values.get(name, self.design[name]) for values, _, _ in batch]
+                   for name in names}
+        try:
+            feasible, outputs = await asyncio.get_running_loop().run_in_executor(
+                self._pool, _evaluate_batch, columns)
+        except Exception as error:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self._slots.release()
+
+        end = time.perf_counter()
+        for i, (_, future, _) in enumerate(batch):
+            if future.done():
+                continue
+            result = {name: float(values[i]) for name, values in outputs.items()}
+            result['feasible'] = bool(feasible[i])
+            future.set_result(result)
+
+        self.latency.record([end - submitted for _, _, submitted in batch])
+        self.batch_latency.record(end - begin)
+        self.batch_sizes[len(batch)] += 1
+
+    def stats(self):
+        """
+        Throughput since the service started, and the latency and batch size
+        histograms
+        """
+        elapsed = time.perf_counter() - self._started
+        n_requests = self.latency.count
+        n_batches = int(self.batch_sizes.sum())
+        sizes = np.flatnonzero(self.batch_sizes)
+        return {'requests': n_requests,
+                'batches': n_batches,
+                'pending': self._queue.qsize(),
+                'elapsed': elapsed,
+                'throughput': n_requests / elapsed,
+                'mean_batch_size': n_requests / n_batches if n_batches else 0.0,
+                'batch_sizes': {int(size): int(self.batch_sizes[size]) for size in sizes},
+                'latency': self.latency.summary(),
+                'batch_latency': self.batch_latency.summary()}
+
+
+def serve_requests(requests, concurrency=64, **service_options):
+    """
+    In-process harness of the InverterService: start a service (on a thread
+    pool unless `executor` is given), evaluate `requests` (dicts of input
+    values) from `concurrency` concurrent clients, and stop it
+
+    Returns
+    -------
+    results : list of dict
+        Outputs of every request, in order
+    stats : dict
+        The service's `stats` once every request was answered
+    """
+    service_options.setdefault('executor', 'thread')
+
+    async def main():
+        async with InverterService(**service_options) as service:
+            results = [None] * len(requests)
+            indices = iter(range(len(requests)))
+
+            async def client():
+                for i in indices:
+                    results[i] = await service.evaluate(requests[i])
+
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+            return results, service.stats()
+
+    return asyncio.run(main())
@@ -0,0 +1,410 @@
+import json
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.components.interp_util.interp import InterpND
+
+from .analysis import baseline_design, run_analysis, set_values, \
+    setup_inverter_problem
+from .doe import full_factorial, latin_hypercube
+
+
+# Outputs approximated by the surrogate
+surrogate_outputs = ('efficiency', 'total_loss', 'mass', 'I_ripple', 'V_ripple')
+
+
+def _promoted_units(prob, names):
+    meta = prob.model.get_io_metadata(iotypes=('input', 'output'),
+                                      metadata_keys=['units'])
+    units = {}
+    for var in meta.values():
+        units.setdefault(var['prom_name'], var['units'])
+    return {name: units[name] for name in names}
+
+
+def _promoted_inputs(prob):
+    meta = prob.model.get_io_metadata(iotypes='input')
+    return {var['prom_name'] for var in meta.values()}
+
+
+def _evaluate(prob, cases, outputs=surrogate_outputs):
+    """
+    Evaluate the full model of `prob` at every case, in batches of its number
+    of nodes
+    """
+    nn = prob.model.inverter.options['num_nodes']
+    n_cases = len(next(iter(cases.values())))
+
+    results = {name: np.empty(n_cases) for name in outputs}
+    feasible = np.empty(n_cases, dtype=bool)
+    for start in range(0, n_cases, nn):
+        n_batch = min(nn, n_cases - start)
+        batch = slice(start, start + n_batch)
+        set_values(prob, {name: np.pad(values[batch], (0, nn - n_batch), mode='edge')
+                          for name, values in cases.items()})
+        feasible[batch] = run_analysis(prob)[:n_batch]
+        for name in outputs:
+            results[name][batch] = prob.get_val(name)[:n_batch]
+    return results, feasible
+
+
+class InverterSurrogateModel:
+    """
+    Structured interpolation table of the Inverter outputs over a grid of the
+    swept inputs, with every other input fixed at its `design` value
+
+    Parameters
+    ----------
+    axes : dict
+        Grid points of each swept input
+    tables : dict
+        Output values on the grid, keyed by output name
+    design : dict
+        Values of the inputs that were not swept
+    units : dict
+        Units of every input and output
+    method : str
+        Interpolation method of openmdao's InterpND, e.g. 'cubic' or 'akima'
+    inverter_options : dict
+        Options of the Inverter group that was sampled
+    report : dict, optional
+        Accuracy report, see `accuracy_report`
+    """
+
+    def __init__(self, axes, tables, design, units, method='cubic',
+                 inverter_options=None, report=None):
+        self.axes = {name: np.asarray(points, dtype=float)
+                     for name, points in axes.items()}
+        self.tables = {name: np.asarray(values, dtype=float)
+                       for name, values in tables.items()}
+        self.design = {name: float(value) for name, value in design.items()}
+        self.units = dict(units)
+        self.method = method
+        self.inverter_options = dict(inverter_options or {})
+        self.report = report
+        self._interpolants = {}
+
+    @property
+    def inputs(self):
+        return list(self.axes) + list(self.design)
+
+    @property
+    def outputs(self):
+        return list(self.tables)
+
+    def in_domain(self, values):
+        """
+        True for every node of `values` (a dict of input arrays) that lies
+        inside the trained domain: every swept input within the bounds of its
+        grid and every other input at its design value
+        """
+        inside = True
+        for name, points in self.axes.items():
+            value = np.asarray(values[name])
+            inside = inside & (value >= points[0]) & (value <= points[-1])
+        for name, design_value in self.design.items():
+            inside = inside & np.isclose(values[name], design_value,
+                                         rtol=1e-12, atol=0.0)
+        return np.atleast_1d(inside)
+
+    def evaluate(self, values, compute_derivative=False):
+        """
+        Interpolate every output at the nodes of `values` (a dict of arrays of
+        the swept inputs)
+
+        Returns
+        -------
+        outputs : dict
+            Interpolated values keyed by output name
+        derivatives : dict
+            (n_nodes, n_swept) derivatives keyed by output name, only returned
+            if `compute_derivative` is True
+        """
+        x = np.column_stack([np.atleast_1d(values[name]) for name in self.axes])
+
+        outputs, derivatives = {}, {}
+        for name, table in self.tables.items():
+            interpolant = self._interpolants.get(name)
+            if interpolant is None:
+                interpolant = InterpND(method=self.method,
+                                       points=tuple(self.axes.values()),
+                                       values=table,
+                                       extrapolate=True)
+                self._interpolants[name] = interpolant
+            if compute_derivative:
+                outputs[name], derivatives[name] = interpolant.interpolate(
+                    x, compute_derivative=True)
+            else:
+                outputs[name] = interpolant.interpolate(x)
+
+        if compute_derivative:
+            return outputs, derivatives
+        return outputs
+
+    def save(self, path):
+        """
+        Serialize the surrogate to the .npz file `path`
+        """
+        metadata = {'inputs': list(self.axes),
+                    'outputs': list(self.tables),
+                    'design': self.design,
+                    'units': self.units,
+                    'method': self.method,
+                    'inverter_options': self.inverter_options,
+                    'report': self.report}
+        arrays = {f'axis_{i}': points for i, points in enumerate(self.axes.values())}
+        arrays.update({f'table_{i}': table
+                       for i, table in enumerate(self.tables.values())})
+        with open(path, 'wb') as file:
+            np.savez(file, metadata=np.array(json.dumps(metadata)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            axes = {name: data[f'axis_{i}']
+                    for i, name in enumerate(metadata['inputs'])}
+            tables = {name: data[f'table_{i}']
+                      for i, name in enumerate(metadata['outputs'])}
+        return cls(axes, tables, metadata['design'], metadata['units'],
+                   method=metadata['method'],
+                   inverter_options=metadata['inverter_options'],
+                   report=metadata['report'])
+
+
+def accuracy_report(surrogate, n_samples=64, seed=None, batch_size=256):
+    """
+    Compare the surrogate against the full Inverter model at `n_samples` Latin
+    hypercube samples of the trained domain
+
+    Returns
+    -------
+    dict
+        max_abs_error, max_rel_error and rms_rel_error of every output, along
+        with the number of (feasible) samples used
+    """
+    bounds = {name: (points[0], points[-1])
+              for name, points in surrogate.axes.items()}
+    cases = latin_hypercube(bounds, n_samples, seed=seed)
+
+    prob = setup_inverter_problem(num_nodes=min(batch_size, n_samples),
+                                  values=surrogate.design,
+                                  **surrogate.inverter_options)
+    reference, feasible = _evaluate(prob, cases, surrogate.outputs)
+    approximation = surrogate.evaluate({name: values[feasible]
+                                        for name, values in cases.items()})
+
+    report = {'n_samples': int(np.count_nonzero(feasible))}
+    for name in surrogate.outputs:
+        error = approximation[name] - reference[name][feasible]
+        rel_error = error / np.abs(reference[name][feasible])
+        report[name] = {'max_abs_error': float(np.max(np.abs(error))),
+                        'max_rel_error': float(np.max(np.abs(rel_error))),
+                        'rms_rel_error': float(np.sqrt(np.mean(rel_error**2)))}
+    return report
+
+
+def train_surrogate(bounds, levels=5, design=None, method='cubic',
+                    outputs=surrogate_outputs, n_validation=64, seed=None,
+                    batch_size=4096, **inverter_options):
+    """
+    Sample the Inverter on a full-factorial grid of the swept inputs and build
+    an InverterSurrogateModel from it
+
+    Parameters
+    ----------
+    bounds : dict
+        (lower, upper) bounds of each swept input, keyed by promoted name
+    levels : int or dict
+        Number of grid points per swept input
+    design : dict, optional
+        Values of every other input, defaults to `analysis.baseline_design`
+    method : str
+        Interpolation method
+    outputs : iterable of str
+        Outputs to approximate
+    n_validation : int
+        Number of samples of the accuracy report, 0 to skip it
+    seed : int, optional
+        Seed of the validation samples
+    batch_size : int
+        Maximum number of nodes per run of the full model
+    **inverter_options
+        Options passed to the Inverter group
+    """
+    design = dict(baseline_design if design is None else design)
+    for name in bounds:
+        design.pop(name, None)
+
+    cases = full_factorial(bounds, levels)
+    n_cases = len(next(iter(cases.values())))
+    prob = setup_inverter_problem(num_nodes=min(batch_size, n_cases),
+                                  values={}, **inverter_options)
+    inputs = _promoted_inputs(prob)
+    design = {name: value for name, value in design.items() if name in inputs}
+    set_values(prob, design)
+
+    results, feasible = _evaluate(prob, cases, outputs)
+    if not np.all(feasible):
+        raise ValueError(f"{np.count_nonzero(~feasible)} of the {n_cases} training points "
+                         "have a modulation index too high for the bus voltage, "
+                         "reduce the bounds of the surrogate")
+
+    axes = {name: np.unique(values) for name, values in cases.items()}
+    shape = tuple(len(points) for points in axes.values())
+    tables = {name: results[name].reshape(shape) for name in outputs}
+    units = _promoted_units(prob, list(bounds) + list(design) + list(outputs))
+
+    surrogate = InverterSurrogateModel(axes, tables, design, units,
+                                       method=method,
+                                       inverter_options=inverter_options)
+    if n_validation > 0:
+        surrogate.report = accuracy_report(surrogate, n_validation, seed=seed,
+                                           batch_size=batch_size)
+    return surrogate
+
+
+def _var(name):
+    # Component variable names cannot contain dots
+    return name.replace('.', ':')
+
+
+class InverterSurrogateComp(om.ExplicitComponent):
+    """
+    Evaluates an InverterSurrogateModel, see InverterSurrogate
+    """
+
+    def initialize(self):
+        self.options.declare("surrogate", types=InverterSurrogateModel)
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("fallback", default=True, types=bool,
+                             desc="Evaluate the full model outside of the trained domain")
+
+    def setup(self):
+        surrogate = self.options['surrogate']
+        nn = self.options['num_nodes']
+        ar = np.arange(nn)
+        for name in surrogate.axes:
+            self.add_input(_var(name), shape=nn, units=surrogate.units[name])
+        for name, value in surrogate.design.items():
+            self.add_input(_var(name), val=value, shape=nn,
+                           units=surrogate.units[name])
+        for name in surrogate.outputs:
+            self.add_output(name, shape=nn, units=surrogate.units[name])
+
+        self.declare_partials(surrogate.outputs,
+                              [_var(name) for name in surrogate.inputs],
+                              rows=ar, cols=ar)
+
+        self._full_prob = None
+        self._full_inputs = None
+        self.n_fallback = 0
+
+    def _values(self, inputs):
+        return {name: inputs[_var(name)]
+                for name in self.options['surrogate'].inputs}
+
+    def _outside(self, values):
+        if not self.options['fallback']:
+            return np.zeros(self.options['num_nodes'], dtype=bool)
+        return ~self.options['surrogate'].in_domain(values)
+
+    def _run_full_model(self, values):
+        """
+        Run the full model at every node of `values`, unless it was already
+        run there
+        """
+        if self._full_inputs is not None and all(
+                np.array_equal(value, self._full_inputs[name])
+                for name, value in values.items()):
+            return self._full_prob
+
+        if self._full_prob is None:
+            self._full_prob = setup_inverter_problem(
+                num_nodes=self.options['num_nodes'], values={},
+                **self.options['surrogate'].inverter_options)
+        set_values(self._full_prob, values)
+        infeasible = ~run_analysis(self._full_prob) & self._outside(values)
+        if np.any(infeasible):
+            raise om.AnalysisError("Modulation index too high for the bus voltage "
+                                   f"at nodes {np.flatnonzero(infeasible)}")
+        self._full_inputs = {name: value.copy() for name, value in values.items()}
+        return self._full_prob
+
+    def compute(self, inputs, outputs):
+        surrogate = self.options['surrogate']
+        values = self._values(inputs)
+        approximation = surrogate.evaluate(values)
+        for name in surrogate.outputs:
+            outputs[name] = approximation[name]
+
+        outside = self._outside(values)
+        if np.any(outside):
+            self.n_fallback += np.count_nonzero(outside)
+            prob = self._run_full_model(values)
+            for name in surrogate.outputs:
+                outputs[name][outside] = prob.get_val(name)[outside]
+
+    def compute_partials(self, inputs, partials):
+        surrogate = self.options['surrogate']
+        values = self._values(inputs)
+        _, derivatives = surrogate.evaluate(values, compute_derivative=True)
+        for name in surrogate.outputs:
+            for i, wrt in enumerate(surrogate.axes):
+                partials[name, _var(wrt)] = derivatives[name][:, i]
+            for wrt in surrogate.design:
+                partials[name, _var(wrt)] = 0.0
+
+        outside = self._outside(values)
+        if not np.any(outside):
+            return
+
+        # With the slack set to the modulation index, the total derivatives
+        # of the analysis pick up the slack's contribution through it
+        prob = self._run_full_model(values)
+        totals = prob.compute_totals(
+            of=surrogate.outputs + ['modulation_index'],
+            wrt=surrogate.inputs + ['modulation_index_slack'])
+        for wrt in surrogate.inputs:
+            dm_dx = np.diag(totals['modulation_index', wrt])
+            for name in surrogate.outputs:
+                total = np.diag(totals[name, wrt]) + \
+                    np.diag(totals[name, 'modulation_index_slack']) * dm_dx
+                partials[name, _var(wrt)][outside] = total[outside]
+
+
+class InverterSurrogate(om.Group):
+    """
+    Drop-in replacement for the Inverter group, evaluated with an
+    InverterSurrogateModel. Its inputs and outputs have the promoted names and
+    units of the Inverter's, except that the modulation index slack is
+    eliminated: the surrogate is trained on the analysis of `run_analysis`.
+
+    Nodes outside of the trained domain are evaluated with the full Inverter
+    model when `fallback` is True, and extrapolated otherwise. Inside the
+    domain, the derivatives with respect to the inputs that were not swept are
+    zero, as the surrogate holds no information about them.
+    """
+
+    def initialize(self):
+        self.options.declare("surrogate", types=(InverterSurrogateModel, str),
+                             desc="InverterSurrogateModel, or the path of a saved one")
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("fallback", default=True, types=bool,
+                             desc="Evaluate the full model outside of the trained domain")
+
+    def setup(self):
+        surrogate = self.options['surrogate']
+        if isinstance(surrogate, str):
+            surrogate = InverterSurrogateModel.load(surrogate)
+
+        self.add_subsystem("surrogate",
+                           InverterSurrogateComp(surrogate=surrogate,
+                                                 num_nodes=self.options['num_nodes'],
+                                                 fallback=self.options['fallback']),
+                           promotes_inputs=[(_var(name), name)
+                                            for name in surrogate.inputs],
+                           promotes_outputs=surrogate.outputs)
@@ -0,0 +1,47 @@
+import unittest
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from invertermodel.ac_filter_inductor import ACFilterInductor
+
+
+def _inductor_problem(**options):
+    prob = om.Problem()
+
+    prob.model.add_subsystem("ac_filter_inductor",
+                             ACFilterInductor(**options),
+                             promotes=["*"])
+
+    prob.setup(force_alloc_complex=True)
+
+    prob.set_val('I_phase_rms', 49.81200136)
+    prob.set_val('electrical_frequency', 1727.18721061)
+    prob.set_val('resistivity', 1.77e-8)
+    prob.set_val('wire_density', 8960)
+    prob.set_val('n_turns', 45.74874813)
+    prob.set_val('r_wire', 0.00104543)
+    prob.set_val('R_core', 0.02)
+    prob.set_val('r_core', 0.01)
+    prob.set_val('mu_r', 1200)
+    return prob
+
+
+class TestACFilterInductor(unittest.TestCase):
+    def test_ac_filter_inductor_partials(self):
+        prob = _inductor_problem()
+        prob.run_model()
+
+        data = prob.check_partials(method="cs", out_stream=None)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_ac_filter_inductor_use_cs(self):
+        prob = _inductor_problem(use_cs=True)
+        prob.run_model()
+
+        data = prob.check_partials(form="central", out_stream=None)
+        assert_check_partials(data, atol=1e-6, rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
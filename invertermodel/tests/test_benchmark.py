@@ -0,0 +1,57 @@
+import copy
+import os
+import tempfile
+import unittest
+
+from invertermodel.benchmark import find_regressions, load_baseline, \
+    run_benchmarks, save_baseline
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_benchmarks_and_regression_check(self):
+        results = run_benchmarks(batch_sizes=(1, 32), repeat=1,
+                                 names=['run_model', 'check_partials'],
+                                 out_stream=None)
+
+        self.assertEqual(set(results['results']['run_model']), {'1', '32'})
+        # check_partials is only run on small batches
+        self.assertEqual(set(results['results']['check_partials']), {'1'})
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, 'baseline.json')
+        save_baseline(results, path)
+        baseline = load_baseline(path)
+        self.assertEqual(find_regressions(results, baseline), [])
+
+        slower = copy.deepcopy(results)
+        slower['results']['run_model']['32']['throughput'] *= 0.5
+        regressions = find_regressions(slower, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0]['benchmark'], 'run_model')
+        self.assertEqual(regressions[0]['num_nodes'], 32)
+        self.assertAlmostEqual(regressions[0]['ratio'], 0.5)
+
+    def test_optimization_benchmark(self):
+        results = run_benchmarks(batch_sizes=(1, 16), repeat=1,
+                                 names=['optimization'], out_stream=None)
+        self.assertEqual(set(results['results']['optimization']), {'1'})
+
+    def test_import_benchmarks(self):
+        results = run_benchmarks(batch_sizes=(1, 16), repeat=1,
+                                 names=['import_physics', 'import_inverter'],
+                                 out_stream=None)
+        physics = results['results']['import_physics']
+        inverter = results['results']['import_inverter']
+        self.assertEqual(set(physics), {'1'})
+        # The physics core does not import OpenMDAO
+        self.assertLess(physics['1']['time'], inverter['1']['time'])
+
+    def test_map_lookup_benchmark(self):
+        results = run_benchmarks(batch_sizes=(1, 4096), repeat=1,
+                                 names=['map_lookup'], out_stream=None)
+        self.assertEqual(set(results['results']['map_lookup']), {'1', '4096'})
+
+
+if __name__ == "__main__":
+    unittest.main()
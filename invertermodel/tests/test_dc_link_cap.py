@@ -1,4 +1,7 @@
 import unittest
+import warnings
+
+import numpy as np
 
 import openmdao.api as om
 from openmdao.utils.assert_utils import assert_check_partials
@@ -33,6 +36,28 @@ class TestDCLinkCapacitor(unittest.TestCase):
         data = prob.check_partials(form="central")
         assert_check_partials(data)
 
+    def test_dc_link_cap_partials_zero_modulation_index(self):
+        prob = om.Problem()
+
+        prob.model.add_subsystem("dc_link_cap",
+                                 DCLinkCapacitor(),
+                                 promotes=["*"])
+
+        prob.setup(force_alloc_complex=True)
+        prob.set_val('modulation_index', 0.0)
+        prob.run_model()
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            data = prob.check_partials(method='cs', out_stream=None)
+
+        # The ripple's slope in the modulation index is infinite at zero, and
+        # is taken as zero instead
+        partials = data['dc_link_cap'].pop(('V_ripple', 'modulation_index'))
+        np.testing.assert_array_equal(partials['J_fwd'], 0.0)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+        self.assertGreater(data['dc_link_cap']['P_loss', 'modulation_index']['J_fwd'][0, 0], 0.0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from invertermodel.analysis import baseline_design, run_analysis, set_values, \
+    setup_inverter_problem
+from invertermodel.doe import full_factorial, latin_hypercube, sobol, \
+    run_sweep, load_sweep
+
+
+_bounds = {'switching_frequency': (20e3, 100e3),
+           'ac_filter_inductor.n_turns': (20.0, 60.0),
+           'dc_link_cap.C': (50e-6, 200e-6)}
+
+
+class TestDOE(unittest.TestCase):
+    def test_samplers(self):
+        cases = full_factorial(_bounds, 3)
+        self.assertEqual(cases['switching_frequency'].size, 27)
+        self.assertEqual(np.unique(cases['dc_link_cap.C']).size, 3)
+
+        for sampler in (latin_hypercube, sobol):
+            cases = sampler(_bounds, 16, seed=0)
+            for name, (lower, upper) in _bounds.items():
+                self.assertEqual(cases[name].size, 16)
+                self.assertTrue(np.all(cases[name] >= lower))
+                self.assertTrue(np.all(cases[name] <= upper))
+
+    def test_sweep_and_resume(self):
+        cases = sobol(_bounds, 64, seed=1)
+
+        with tempfile.TemporaryDirectory() as store_path:
+            report = run_sweep(cases, store_path, shard_size=16, max_workers=2)
+            self.assertEqual(report['n_evaluated'], 64)
+            self.assertEqual(sum(stats['n_cases']
+                                 for stats in report['workers'].values()), 64)
+
+            results = load_sweep(store_path)
+            prob = setup_inverter_problem(num_nodes=64)
+            set_values(prob, cases)
+            run_analysis(prob)
+            np.testing.assert_allclose(results['efficiency'],
+                                       prob.get_val('efficiency'), rtol=1e-12)
+            np.testing.assert_allclose(results['dc_link_cap.C'],
+                                       cases['dc_link_cap.C'])
+
+            # Simulate a crash that lost the last shard
+            os.remove(os.path.join(store_path, 'shard_000003.npz'))
+            report = run_sweep(cases, store_path, shard_size=16, max_workers=2)
+            self.assertEqual(report['n_shards_skipped'], 3)
+            self.assertEqual(report['n_evaluated'], 16)
+            resumed = load_sweep(store_path, columns=['efficiency'])
+            np.testing.assert_array_equal(resumed['efficiency'],
+                                          results['efficiency'])
+            # Columns read from every shard, whatever the iterable
+            resumed = load_sweep(store_path, columns=(name for name in ['efficiency']))
+            np.testing.assert_array_equal(resumed['efficiency'],
+                                          results['efficiency'])
+
+    def test_resume_with_changed_values(self):
+        cases = sobol(_bounds, 32, seed=1)
+
+        with tempfile.TemporaryDirectory() as store_path:
+            run_sweep(cases, store_path, shard_size=16, max_workers=1)
+            os.remove(os.path.join(store_path, 'shard_000001.npz'))
+
+            # Other case values, design or Inverter options are another sweep
+            design = dict(baseline_design, bus_voltage=1800.0)
+            for changed in ({'cases': sobol(_bounds, 32, seed=2)},
+                            {'design': design},
+                            {'use_filter_inductor': False}):
+                arguments = dict({'cases': cases}, **changed)
+                with self.assertRaises(ValueError):
+                    run_sweep(store_path=store_path, shard_size=16, max_workers=1,
+                              **arguments)
+            self.assertFalse(os.path.exists(os.path.join(store_path, 'shard_000001.npz')))
+
+            # The default design is the baseline one
+            report = run_sweep(cases, store_path, design=baseline_design, shard_size=16,
+                               max_workers=1)
+            self.assertEqual(report['n_shards_skipped'], 1)
+
+    def test_sweep_without_filter_inductor(self):
+        cases = sobol(_bounds, 16, seed=1)
+        del cases['ac_filter_inductor.n_turns']
+        design = {name: value for name, value in baseline_design.items()
+                  if name != 'r_wire' and not name.startswith('ac_filter_inductor.')}
+
+        with tempfile.TemporaryDirectory() as store_path:
+            report = run_sweep(cases, store_path, design=design, shard_size=16, max_workers=1,
+                               use_filter_inductor=False)
+            self.assertEqual(report['n_evaluated'], 16)
+            results = load_sweep(store_path)
+            self.assertIn('efficiency', results)
+            self.assertFalse(any(name.startswith('ac_filter_inductor.') for name in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from invertermodel.analysis import baseline_design, run_analysis, \
+    setup_inverter_problem
+from invertermodel.drive_cycle import DriveCycleRunner, iter_profile, profile_inputs
+
+
+def _profile(n_samples):
+    t = np.linspace(0.0, 1.0, n_samples)
+    return np.column_stack([10.0 + 40.0 * t,
+                            200.0 + 1500.0 * t,
+                            np.full(n_samples, 2000.0)])
+
+
+class TestDriveCycle(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _reference(self, profile):
+        prob = setup_inverter_problem(num_nodes=profile.shape[0])
+        for name, column in zip(profile_inputs, profile.T):
+            prob.set_val(name, column)
+        run_analysis(prob)
+        return prob
+
+    def test_drive_cycle_sources(self):
+        profile = _profile(250)
+        reference = self._reference(profile)
+
+        npy_path = os.path.join(self.tmpdir.name, 'profile.npy')
+        np.save(npy_path, profile)
+
+        csv_path = os.path.join(self.tmpdir.name, 'profile.csv')
+        np.savetxt(csv_path, profile[:, [2, 0, 1]], delimiter=',',
+                   header='bus_voltage,I_phase_rms,electrical_frequency',
+                   comments='')
+
+        headerless_path = os.path.join(self.tmpdir.name, 'headerless.csv')
+        np.savetxt(headerless_path, profile, delimiter=',')
+        # The first line of a headerless file is read with the first chunk
+        chunks = list(iter_profile(headerless_path, 64))
+        self.assertEqual([chunk.shape[0] for chunk in chunks], [64, 64, 64, 58])
+        np.testing.assert_allclose(np.concatenate(chunks), profile)
+
+        sources = {'array': profile,
+                   'npy': npy_path,
+                   'csv': csv_path,
+                   'headerless_csv': headerless_path,
+                   'generator': (row for row in profile)}
+
+        runner = DriveCycleRunner(chunk_size=64)
+        for label, source in sources.items():
+            output_path = os.path.join(self.tmpdir.name, f'{label}_out.npy')
+            results = runner.run(source, output_path)
+
+            self.assertIsInstance(results, np.memmap)
+            self.assertEqual(results.shape, (250,))
+            self.assertTrue(np.all(results['feasible']))
+            np.testing.assert_allclose(results['efficiency'],
+                                       reference.get_val('efficiency'),
+                                       rtol=1e-12)
+            np.testing.assert_allclose(results['total_loss'],
+                                       reference.get_val('total_loss'),
+                                       rtol=1e-12)
+            np.testing.assert_allclose(results['V_ripple'],
+                                       reference.get_val('V_ripple'),
+                                       rtol=1e-12)
+
+    def test_drive_cycle_missing_columns(self):
+        csv_path = os.path.join(self.tmpdir.name, 'profile.csv')
+        np.savetxt(csv_path, _profile(10)[:, :2], delimiter=',',
+                   header='I_phase_rms,frequency', comments='')
+        with self.assertRaisesRegex(ValueError, "electrical_frequency.*bus_voltage"):
+            list(iter_profile(csv_path, 4))
+
+    def test_drive_cycle_infeasible_samples(self):
+        profile = _profile(10)
+        profile[3, 2] = 0.5 * baseline_design['load_phase_back_emf']
+
+        runner = DriveCycleRunner(chunk_size=4)
+        results = runner.run(profile,
+                             os.path.join(self.tmpdir.name, 'out.npy'))
+
+        self.assertFalse(results['feasible'][3])
+        self.assertTrue(np.isnan(results['efficiency'][3]))
+        self.assertEqual(np.count_nonzero(results['feasible']), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
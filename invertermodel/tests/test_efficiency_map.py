@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from invertermodel.analysis import run_analysis, setup_inverter_problem
+from invertermodel.efficiency_map import EfficiencyMap, efficiency_map_outputs, \
+    generate_efficiency_map
+
+
+class TestEfficiencyMap(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_generate(self):
+        I_phase_rms = np.linspace(20.0, 60.0, 5)
+        electrical_frequency = np.array([200.0, 800.0, 1700.0])
+        # The lowest bus voltage is too low for the back EMF
+        bus_voltage = np.array([1000.0, 2000.0])
+        path = os.path.join(self.tmpdir.name, 'map.npy')
+        efficiency_map = generate_efficiency_map(path, I_phase_rms, electrical_frequency,
+                                                 bus_voltage, batch_size=16, dtype=np.float64)
+        self.assertIsInstance(efficiency_map.maps, np.memmap)
+        self.assertEqual(efficiency_map.maps.shape, (5, 3, 2, len(efficiency_map_outputs)))
+
+        grid = np.meshgrid(I_phase_rms, electrical_frequency, bus_voltage, indexing='ij')
+        prob = setup_inverter_problem(num_nodes=grid[0].size)
+        for name, values in zip(('I_phase_rms', 'electrical_frequency', 'bus_voltage'), grid):
+            prob.set_val(name, values.ravel())
+        feasible = run_analysis(prob).reshape(grid[0].shape)
+        self.assertFalse(np.any(feasible[:, :, 0]))
+        self.assertTrue(np.all(feasible[:, :, 1]))
+
+        values = efficiency_map(*grid)
+        for name, output in efficiency_map_outputs.items():
+            np.testing.assert_allclose(values[name][feasible],
+                                       prob.get_val(output).reshape(grid[0].shape)[feasible])
+            self.assertTrue(np.all(np.isnan(values[name][~feasible])))
+
+        losses = sum(values[name] for name in ('mosfet_loss', 'inductor_core_loss',
+                                               'inductor_copper_loss', 'capacitor_loss'))
+        np.testing.assert_allclose(losses[feasible], values['total_loss'][feasible])
+
+        loaded = EfficiencyMap.load(path, mmap=False)
+        self.assertEqual(loaded.names, efficiency_map.names)
+        np.testing.assert_array_equal(loaded.maps, efficiency_map.maps)
+
+    def test_single_point_axis(self):
+        # A map at a fixed bus voltage
+        I_phase_rms = np.array([20.0, 40.0, 60.0])
+        electrical_frequency = np.array([500.0, 1000.0])
+        path = os.path.join(self.tmpdir.name, 'map.npy')
+        efficiency_map = generate_efficiency_map(path, I_phase_rms, electrical_frequency, [2000.0],
+                                                 dtype=np.float64)
+        self.assertEqual(efficiency_map.maps.shape, (3, 2, 1, len(efficiency_map_outputs)))
+
+        prob = setup_inverter_problem(num_nodes=2)
+        prob.set_val('I_phase_rms', [30.0, 60.0])
+        prob.set_val('electrical_frequency', [500.0, 1000.0])
+        prob.set_val('bus_voltage', 2000.0)
+        self.assertTrue(np.all(run_analysis(prob)))
+        # Exact at the grid points, whatever the queried bus voltage
+        values = efficiency_map([60.0, 60.0], [1000.0, 1000.0], [2000.0, 1500.0])
+        np.testing.assert_allclose(values['total_loss'], prob.get_val('total_loss')[1])
+        # and between them along the other axes
+        values = efficiency_map(30.0, 500.0, 2000.0)
+        self.assertTrue(np.isfinite(values['efficiency']))
+        self.assertTrue(np.min(efficiency_map.maps[:2, 0, 0, 0]) <= values['efficiency'] <=
+                        np.max(efficiency_map.maps[:2, 0, 0, 0]))
+
+        # A single point grid is a constant
+        lookup = EfficiencyMap({'x': [1.0]}, ['f'], np.array([[3.0]]))
+        np.testing.assert_array_equal(lookup.interpolate([0.0, 1.0, 2.0])[:, 0], 3.0)
+
+        with self.assertRaises(ValueError):
+            generate_efficiency_map(path, I_phase_rms, electrical_frequency, [])
+
+    def test_interpolation(self):
+        # Multilinear interpolation is exact for multilinear functions, on
+        # even and uneven axes
+        axes = {'x': np.linspace(0.0, 1.0, 5),
+                'y': np.array([0.0, 0.1, 0.5, 2.0]),
+                'z': np.array([-1.0, 1.0])}
+        def f(x, y, z):
+            return 1.0 + 2.0 * x - y + 0.5 * z + 3.0 * x * y * z
+        grid = np.meshgrid(*axes.values(), indexing='ij')
+        maps = np.stack([f(*grid), -f(*grid)], axis=-1)
+        lookup = EfficiencyMap(axes, ['f', 'g'], maps, chunk_size=7)
+
+        rng = np.random.default_rng(0)
+        x, y, z = rng.uniform(0.0, 1.0, 100), rng.uniform(0.0, 2.0, 100), rng.uniform(-1.0, 1.0, 100)
+        values = lookup.interpolate(x, y, z)
+        np.testing.assert_allclose(values[:, 0], f(x, y, z))
+        np.testing.assert_allclose(values[:, 1], -f(x, y, z))
+
+        # Queries outside of the grid are clamped to it
+        np.testing.assert_allclose(lookup.interpolate([-1.0, 2.0], [3.0, -1.0], [0.0, 5.0])[:, 0],
+                                   [f(0.0, 2.0, 0.0), f(1.0, 0.0, 1.0)])
+
+        with self.assertRaises(ValueError):
+            EfficiencyMap(axes, ['f'], maps)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_check_totals
+
+from invertermodel.ac_filter_inductor import ACFilterInductor
+from invertermodel.analysis import setup_inverter_problem, setup_optimization_problem
+from invertermodel.dc_link_cap import DCLinkCapacitor
+from invertermodel.electrothermal import thermal_defaults
+from invertermodel.mosfet_loss import MOSFETLoss
+from invertermodel.physics import C2M0025120D
+
+
+class TestElectrothermal(unittest.TestCase):
+    def test_partials(self):
+        nn = 3
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem('mosfet', MOSFETLoss(**C2M0025120D, num_nodes=nn, thermal=True),
+                                 promotes_inputs=['*'])
+        prob.model.add_subsystem('device', MOSFETLoss(device='C2M0025120D', num_nodes=nn,
+                                                      thermal=True),
+                                 promotes_inputs=['*'])
+        prob.model.add_subsystem('ac_filter_inductor', ACFilterInductor(num_nodes=nn, thermal=True),
+                                 promotes_inputs=['*'])
+        prob.model.add_subsystem('dc_link_cap', DCLinkCapacitor(num_nodes=nn, thermal=True),
+                                 promotes_inputs=['*'])
+        prob.model.set_input_defaults('Q_rr', np.full(nn, 487e-9), units='C')
+        prob.setup(force_alloc_complex=True)
+
+        prob.set_val('I_phase_rms', [30.0, 50.0, 70.0])
+        prob.set_val('R_ds_on', 0.025)
+        prob.set_val('T_junction', [60.0, 110.0, 150.0])
+        prob.set_val('switching_frequency', 80e3)
+        prob.set_val('bus_voltage', 2000.0)
+        prob.set_val('electrical_frequency', 1727.0)
+        prob.set_val('resistivity', 1.77e-8)
+        prob.set_val('T_windings', [40.0, 80.0, 120.0])
+        prob.set_val('wire_density', 8960.0)
+        prob.set_val('n_turns', 45.7)
+        prob.set_val('r_wire', 0.001)
+        prob.set_val('R_core', 0.02)
+        prob.set_val('r_core', 0.01)
+        prob.set_val('mu_r', 1200.0)
+        prob.set_val('modulation_index', 0.9)
+        prob.set_val('power_factor', 0.95)
+        prob.set_val('C', 1e-4)
+        prob.set_val('dissipation_factor', 0.014)
+        prob.set_val('T_hotspot', [30.0, 60.0, 90.0])
+        prob.set_val('specific_capacitance', 6.4e-4)
+        prob.run_model()
+
+        data = prob.check_partials(method='cs', out_stream=None)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+        np.testing.assert_allclose(prob.get_val('mosfet.P_loss_switch') * 6,
+                                   prob.get_val('mosfet.P_loss'))
+        np.testing.assert_allclose(prob.get_val('ac_filter_inductor.P_loss_copper_phase') * 3,
+                                   prob.get_val('ac_filter_inductor.P_loss_copper'))
+
+    def test_coupled_solve(self):
+        uncoupled = setup_inverter_problem()
+        coupled = setup_inverter_problem(thermal=True)
+        for prob in (uncoupled, coupled):
+            prob.set_val('modulation_index_slack', 0.9)
+            prob.run_model()
+
+        # Every loss rises with the temperatures above their references
+        for name in ('mosfet.P_loss', 'ac_filter_inductor.P_loss', 'dc_link_cap.P_loss'):
+            self.assertTrue(np.all(coupled.get_val(name) > uncoupled.get_val(name)))
+        self.assertTrue(np.all(coupled.get_val('efficiency') < uncoupled.get_val('efficiency')))
+
+        # The junction temperature is that of the network at the converged
+        # switch losses, and the losses are those at that temperature
+        R_total = sum(thermal_defaults[f'mosfet_thermal.{name}'][0]
+                      for name in ('resistance_junction_to_case', 'resistance_case_to_sink',
+                                   'resistance_sink_to_air'))
+        T_junction = coupled.get_val('mosfet_thermal.temperature_junction', units='degC')
+        np.testing.assert_allclose(T_junction,
+                                   40.0 + R_total * coupled.get_val('mosfet.P_loss_switch'))
+        R_ds_on = 0.025 * (1 + 5.8e-3 * (T_junction - 25.0))
+        np.testing.assert_allclose(coupled.get_val('mosfet.P_loss') -
+                                   uncoupled.get_val('mosfet.P_loss'),
+                                   6 * 0.5 * 49.81200136**2 * (R_ds_on - 0.025))
+
+        # Without temperature dependence the losses are those of the uncoupled
+        # model
+        for name in ('mosfet.R_ds_on_tempco', 'ac_filter_inductor.resistivity_tempco',
+                     'dc_link_cap.dissipation_factor_tempco'):
+            coupled.set_val(name, 0.0)
+        coupled.run_model()
+        np.testing.assert_allclose(coupled.get_val('total_loss'),
+                                   uncoupled.get_val('total_loss'))
+
+    def test_batch(self):
+        ambient = np.array([0.0, 20.0, 40.0, 60.0])
+        batch = setup_inverter_problem(num_nodes=4, thermal=True)
+        batch.set_val('temperature_ambient', ambient, units='degC')
+        batch.set_val('modulation_index_slack', 0.9)
+        batch.run_model()
+
+        single = setup_inverter_problem(thermal=True)
+        single.set_val('modulation_index_slack', 0.9)
+        for i, T in enumerate(ambient):
+            single.set_val('temperature_ambient', T, units='degC')
+            single.run_model()
+            for name in ('total_loss', 'mosfet_thermal.temperature_junction',
+                         'inductor_thermal.temperature_windings',
+                         'dc_link_cap_thermal.temperature_hotspot'):
+                np.testing.assert_allclose(batch.get_val(name)[i], single.get_val(name)[0])
+
+    def test_totals(self):
+        prob = setup_optimization_problem(thermal=True,
+                                          temperature_limits={'mosfet_thermal.temperature_junction': 400.0})
+        prob.run_model()
+        data = prob.check_totals(of=['efficiency', 'mosfet_thermal.temperature_junction',
+                                     'inductor_thermal.temperature_windings'],
+                                 method='fd', out_stream=None)
+        assert_check_totals(data, atol=1e-4, rtol=1e-4)
+
+    def test_junction_temperature_constraint(self):
+        prob = setup_optimization_problem(thermal=True,
+                                          temperature_limits={'mosfet_thermal.temperature_junction': 400.0})
+        prob.driver.options['disp'] = False
+        self.assertTrue(prob.run_driver().success)
+        self.assertAlmostEqual(prob.get_val('mosfet_thermal.temperature_junction', units='degC')[0],
+                               400.0, places=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from invertermodel.analysis import baseline_design, setup_inverter_problem
+from invertermodel.eval_cache import EvaluationCache
+
+
+_of = ['efficiency', 'total_loss', 'mass', 'I_ripple', 'V_ripple']
+_wrt = ['I_phase_rms', 'switching_frequency', 'ac_filter_inductor.n_turns',
+        'dc_link_cap.C', 'modulation_index_slack']
+
+
+def _setup(cache=None):
+    prob = setup_inverter_problem(cache=cache)
+    prob.set_val('modulation_index_slack', 0.9)
+    return prob
+
+
+class TestEvaluationCache(unittest.TestCase):
+    def test_repeated_evaluations(self):
+        cache = EvaluationCache()
+        prob = _setup(cache)
+        reference = _setup()
+
+        # Visit two points, then come back to the first (as in a line search)
+        for I_phase_rms in (49.8, 60.0, 49.8):
+            for p in (prob, reference):
+                p.set_val('I_phase_rms', I_phase_rms)
+                p.run_model()
+            totals = prob.compute_totals(_of, _wrt)
+            expected = reference.compute_totals(_of, _wrt)
+            for key, value in expected.items():
+                np.testing.assert_array_equal(totals[key], value)
+            for name in _of:
+                np.testing.assert_array_equal(prob.get_val(name),
+                                              reference.get_val(name))
+
+        # Four cached components, the last point is entirely cached, and
+        # RippleCurrent does not depend on I_phase_rms
+        stats = cache.stats()
+        for kind in ('compute', 'partials'):
+            self.assertEqual(stats[kind]['misses'], 7)
+            self.assertEqual(stats[kind]['hits'], 5)
+        self.assertEqual(stats['n_entries'], 14)
+
+    def test_shared_across_problems(self):
+        cache = EvaluationCache()
+        _setup(cache).run_model()
+        _setup(cache).run_model()
+        self.assertEqual(cache.stats()['compute']['hits'], 4)
+
+    def test_memory_budget(self):
+        cache = EvaluationCache()
+        prob = _setup(cache)
+        prob.run_model()
+        entry_bytes = cache.nbytes
+
+        # Room for about two evaluations of the model
+        cache.max_bytes = 2 * entry_bytes + 1
+        for I_phase_rms in np.linspace(40.0, 50.0, 5):
+            prob.set_val('I_phase_rms', I_phase_rms)
+            prob.run_model()
+
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+        self.assertGreater(cache.stats()['evictions'], 0)
+
+        # The most recent point is still cached, the first one is not (apart
+        # from RippleCurrent, which does not depend on I_phase_rms)
+        cache.reset_stats()
+        prob.run_model()
+        self.assertEqual(cache.stats()['compute']['hits'], 4)
+        prob.set_val('I_phase_rms', baseline_design['I_phase_rms'])
+        prob.run_model()
+        self.assertEqual(cache.stats()['compute']['misses'], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
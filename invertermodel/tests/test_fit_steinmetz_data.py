@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from invertermodel.fit_steinmetz_data import fit_steinmetz, fit_materials, \
+    loss_tables, SteinmetzCache
+from invertermodel.inductor_core_materials import FE4491
+
+
+class _Synthetic:
+    f_units = 'kHz'
+    B_units = 'T'
+    _loss_vs_gauss_10khz = np.array([[gauss, 2.0 * 10**1.5 * (gauss*1e-4)**2.1]
+                                     for gauss in (1000, 3000, 9000)])
+    _loss_vs_gauss_40khz = np.array([[gauss, 2.0 * 40**1.5 * (gauss*1e-4)**2.1]
+                                     for gauss in (1000, 3000, 9000)])
+
+
+class TestFitSteinmetzData(unittest.TestCase):
+    def test_fit_exact_data(self):
+        fit = fit_materials([_Synthetic], cache=None)['_Synthetic']
+        np.testing.assert_allclose(fit.params, [2.0, 1.5, 2.1])
+        self.assertAlmostEqual(fit.r_squared, 1.0)
+        self.assertLess(fit.max_relative_error, 1e-10)
+        self.assertEqual(fit.n_points, 6)
+
+    def test_batched_fit_matches_single(self):
+        fits = fit_materials([FE4491, _Synthetic], cache=None)
+
+        single = fit_steinmetz(*loss_tables(FE4491))
+        np.testing.assert_allclose(fits['FE4491'].params, single.params)
+        np.testing.assert_allclose(fits['_Synthetic'].params, [2.0, 1.5, 2.1])
+
+        # Close to the hard-coded coefficients, which came from a fit of the same data
+        np.testing.assert_allclose(fits['FE4491'].params,
+                                   FE4491.steinmetz_params, rtol=0.1)
+        self.assertGreater(fits['FE4491'].r_squared, 0.99)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'fits.json')
+            fits = fit_materials([FE4491], cache=SteinmetzCache(path))
+            self.assertTrue(os.path.exists(path))
+
+            cache = SteinmetzCache(path)
+            self.assertEqual(cache.get(fits['FE4491'].table_hash),
+                             fits['FE4491'])
+            self.assertEqual(fit_materials([FE4491], cache=cache), fits)
+
+
+if __name__ == "__main__":
+    unittest.main()
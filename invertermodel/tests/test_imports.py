@@ -0,0 +1,26 @@
+import subprocess
+import sys
+import unittest
+
+
+class TestImports(unittest.TestCase):
+    def test_physics_core_does_not_import_openmdao(self):
+        code = ("import sys\n"
+                "import invertermodel\n"
+                "from invertermodel import evaluate_inverter, inductor_core_materials, "
+                "material_registry, mosfet_devices, physics, pwm\n"
+                "assert 'openmdao' not in sys.modules, 'openmdao imported'\n"
+                "from invertermodel import Inverter\n"
+                "assert 'openmdao' in sys.modules\n"
+                "assert Inverter is sys.modules['invertermodel.inverter_model'].Inverter\n")
+        subprocess.run([sys.executable, '-c', code], check=True)
+
+    def test_unknown_attribute(self):
+        import invertermodel
+        with self.assertRaises(AttributeError):
+            invertermodel.NotAnAttribute
+        self.assertIn('Inverter', dir(invertermodel))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,11 +3,42 @@ import unittest
 import numpy as np
 
 import openmdao.api as om
-from openmdao.utils.assert_utils import assert_check_partials
+from openmdao.utils.assert_utils import assert_check_partials, assert_check_totals
 
 from invertermodel import Inverter
 
 
+_design = {
+    'load_inductance': 5.88007877e-5,
+    'load_phase_back_emf': 946.36734443,
+    'load_phase_resistance': 0.28172998,
+
+    'I_phase_rms': 49.81200136,
+    'r_wire': 0.00104543,
+
+    'electrical_frequency': 1727.18721061,
+
+    'bus_voltage': 2000,
+    'switching_frequency': 80000,
+
+    'ac_filter_inductor.wire_density': 8960,
+    'ac_filter_inductor.resistivity': 1.77e-8,
+    'ac_filter_inductor.n_turns': 45.74874813,
+    'ac_filter_inductor.R_core': 0.02,
+    'ac_filter_inductor.r_core': 0.01,
+    'ac_filter_inductor.mu_r': 1200,
+
+    'dc_link_cap.C': 100e-6,
+    'dc_link_cap.dissipation_factor': 140*1e-4,
+    'dc_link_cap.specific_capacitance': 0.0006372145185838208,
+
+    'mosfet.R_ds_on': 0.025,
+    'mosfet.Q_rr': 487e-9,
+
+    'modulation_index_slack': 0.9
+}
+
+
 class TestInverter(unittest.TestCase):
     def test_inverter(self):
         prob = om.Problem()
@@ -114,6 +145,44 @@ class TestInverter(unittest.TestCase):
         prob.model.list_inputs(units=True, prom_name=True)
         prob.model.list_outputs(residuals=True, units=True, prom_name=True)
 
+    def test_inverter_num_nodes(self):
+        I_phase_rms = np.array([20.0, 35.0, 49.81200136, 60.0])
+        nn = I_phase_rms.size
+
+        prob = om.Problem()
+        prob.model.add_subsystem("inverter",
+                                 Inverter(num_nodes=nn),
+                                 promotes=["*"])
+        prob.setup(force_alloc_complex=True)
+        for key, value in _design.items():
+            prob.set_val(key, value)
+        prob.set_val('I_phase_rms', I_phase_rms)
+        prob.run_model()
+
+        for i in range(nn):
+            scalar_prob = om.Problem()
+            scalar_prob.model.add_subsystem("inverter",
+                                            Inverter(),
+                                            promotes=["*"])
+            scalar_prob.setup()
+            for key, value in _design.items():
+                scalar_prob.set_val(key, value)
+            scalar_prob.set_val('I_phase_rms', I_phase_rms[i])
+            scalar_prob.run_model()
+
+            for name in ('efficiency', 'total_loss', 'mass', 'I_ripple', 'V_ripple'):
+                self.assertAlmostEqual(prob.get_val(name)[i],
+                                       scalar_prob.get_val(name)[0])
+
+        data = prob.check_partials(method='cs', out_stream=None)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+        totals = prob.check_totals(of=['efficiency', 'mass', 'I_ripple', 'V_ripple'],
+                                   wrt=['I_phase_rms', 'switching_frequency',
+                                        'ac_filter_inductor.n_turns', 'dc_link_cap.C'],
+                                   method='cs', out_stream=None)
+        assert_check_totals(totals, atol=1e-8, rtol=1e-8)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from invertermodel.analysis import baseline_design, setup_inverter_problem
+from invertermodel.inverter_core import InverterOperatingPoint, \
+    InverterPerformance
+
+
+_of = ['efficiency', 'total_loss', 'mass', 'I_ripple', 'V_ripple',
+       'modulation_index', 'modulation_index_residual', 'power_factor']
+_wrt = ['I_phase_rms', 'switching_frequency', 'bus_voltage',
+        'load_inductance', 'ac_filter_inductor.n_turns', 'dc_link_cap.C',
+        'modulation_index_slack']
+
+
+class TestInverterCore(unittest.TestCase):
+    def test_partials(self):
+        nn = 3
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem('operating_point',
+                                 InverterOperatingPoint(num_nodes=nn),
+                                 promotes=['*'])
+        prob.model.add_subsystem('performance',
+                                 InverterPerformance(num_nodes=nn),
+                                 promotes=['*'])
+        prob.setup(force_alloc_complex=True)
+
+        prob.set_val('load_inductance', baseline_design['load_inductance'])
+        prob.set_val('filter_inductance', [1e-4, 2e-4, 3e-4])
+        prob.set_val('load_phase_back_emf', baseline_design['load_phase_back_emf'])
+        prob.set_val('load_phase_resistance', baseline_design['load_phase_resistance'])
+        prob.set_val('I_phase_rms', [20.0, 40.0, 60.0])
+        prob.set_val('electrical_frequency', baseline_design['electrical_frequency'])
+        prob.set_val('bus_voltage', 2000.0)
+        prob.set_val('modulation_index_slack', 0.9)
+        prob.set_val('current_ripple', [5.0, 10.0, 15.0])
+        prob.set_val('voltage_ripple', [2.0, 3.0, 4.0])
+        prob.set_val('mosfet_loss', [1000.0, 2000.0, 3000.0])
+        prob.set_val('inductor_loss', 500.0)
+        prob.set_val('capacitor_loss', 10.0)
+        prob.set_val('inductor_mass', 0.6)
+        prob.set_val('cap_mass', 0.2)
+        prob.run_model()
+
+        data = prob.check_partials(method='cs', out_stream=None)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_matches_exec_comps(self):
+        nn = 4
+        values = dict(baseline_design,
+                      I_phase_rms=np.linspace(30.0, 60.0, nn),
+                      load_inductance=np.linspace(4e-5, 8e-5, nn))
+        probs = [setup_inverter_problem(num_nodes=nn, values=values, fused=fused)
+                 for fused in (False, True)]
+        for prob in probs:
+            prob.set_val('modulation_index_slack', 0.9)
+            prob.run_model()
+
+        reference, fused = probs
+        for name in _of + ['L', 'phase_voltage', 'power_out']:
+            np.testing.assert_allclose(fused.get_val(name), reference.get_val(name),
+                                       rtol=1e-14, err_msg=name)
+
+        expected = reference.compute_totals(_of, _wrt)
+        totals = fused.compute_totals(_of, _wrt)
+        for key, value in expected.items():
+            np.testing.assert_allclose(totals[key], value, rtol=1e-10, atol=1e-14,
+                                       err_msg=str(key))
+
+    def test_fewer_systems(self):
+        counts = []
+        for fused in (False, True):
+            prob = setup_inverter_problem(fused=fused)
+            counts.append(len(list(prob.model.system_iter(recurse=True))))
+        self.assertEqual(counts[0] - counts[1], 10 - 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+
+from invertermodel.ac_filter_inductor import ACFilterInductor
+from invertermodel.inductor_core_materials import FE4491
+from invertermodel.material_registry import MaterialRegistry, get_material
+
+
+class TestMaterialRegistry(unittest.TestCase):
+    def test_packaged_catalog(self):
+        material = get_material('FE4491')
+        self.assertEqual(material.saturation_flux, FE4491.saturation_flux)
+        self.assertEqual(material.density, FE4491.density)
+        np.testing.assert_array_equal(material.relative_permeability,
+                                      FE4491.relative_permeability)
+        np.testing.assert_array_equal(material.steinmetz_params,
+                                      FE4491.steinmetz_params)
+
+        with self.assertRaises(AttributeError):
+            material.density = 1.0
+        self.assertFalse(hasattr(material, '__dict__'))
+
+    def test_select(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'extra.csv')
+            with open(path, 'w') as file:
+                file.write("name,saturation_flux,density,mu_r_min,mu_r_max,"
+                           "steinmetz_k,steinmetz_alpha,steinmetz_beta,"
+                           "f_units,B_units,loss_units\n"
+                           "Ferrite,0.47,4800,2000,2500,1.5,1.4,2.6,kHz,T,W/kg\n"
+                           "PowderedIron,1.0,6000,60,90,30.0,1.1,2.0,kHz,T,W/kg\n")
+
+            registry = MaterialRegistry([MaterialRegistry().paths[0], path])
+            self.assertEqual(len(registry), 4)
+            self.assertIn('Ferrite', registry)
+
+            self.assertEqual(sorted(registry.select(saturation_flux=(1.0, None))),
+                             ['Air', 'FE4491', 'PowderedIron'])
+            self.assertEqual(registry.select(density=(4000, 6500)),
+                             ['Ferrite', 'PowderedIron'])
+            self.assertEqual(registry.select(permeability=(300, 1000)),
+                             ['FE4491'])
+            self.assertEqual(registry.select(saturation_flux=(1.0, None),
+                                             density=(100, None),
+                                             loss=(None, 10.0),
+                                             reference_point=(20e3, 0.2)),
+                             ['FE4491'])
+
+            np.testing.assert_allclose(
+                registry.reference_loss((20e3, 0.2))[3],
+                registry['PowderedIron'].specific_loss(20e3, 0.2))
+
+    def test_registry_material_in_inductor(self):
+        results = []
+        for material in (FE4491, get_material('FE4491')):
+            prob = om.Problem()
+            prob.model.add_subsystem("ac_filter_inductor",
+                                     ACFilterInductor(core_material=material),
+                                     promotes=["*"])
+            prob.setup()
+            prob.set_val('R_core', 0.02)
+            prob.set_val('r_core', 0.01)
+            prob.run_model()
+            results.append(prob.get_val('P_loss'))
+
+        np.testing.assert_array_equal(*results)
+
+
+if __name__ == "__main__":
+    unittest.main()
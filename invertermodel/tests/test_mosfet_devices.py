@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from invertermodel.analysis import baseline_design, setup_inverter_problem
+from invertermodel.mosfet_devices import MOSFETDevice, default_library, \
+    get_device, interpolate
+from invertermodel.mosfet_loss import MOSFETLoss
+from invertermodel.physics import C2M0025120D, evaluate_inverter
+
+
+def _setup_mosfet(nn, **options):
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem('mosfet', MOSFETLoss(num_nodes=nn, **options),
+                             promotes=['*'])
+    prob.setup(force_alloc_complex=True)
+    prob.set_val('I_phase_rms', np.linspace(10.0, 150.0, nn))
+    prob.set_val('switching_frequency', np.linspace(20e3, 100e3, nn))
+    prob.set_val('bus_voltage', np.linspace(400.0, 1400.0, nn))
+    prob.set_val('Q_rr', 487e-9)
+    return prob
+
+
+class TestMOSFETDevices(unittest.TestCase):
+    def test_library(self):
+        self.assertEqual(sorted(default_library.names()),
+                         ['C2M0025120D', 'C3M0016120K', 'C3M0032120K'])
+        device = get_device('C2M0025120D')
+        self.assertIs(device, default_library['C2M0025120D'])
+        self.assertEqual(device.Q_rr, 487e-9)
+        # The packaged tables are not datasheet curves, and say so
+        for name in default_library.names():
+            self.assertTrue(default_library[name].source.startswith('synthetic'))
+            self.assertIn('synthetic', default_library[name].description)
+        with self.assertRaises(KeyError):
+            get_device('IRF540')
+
+        # Tables are reproduced at the grid points, in SI units
+        E_on, _ = interpolate((device.I, device.V, device.T), device.E_on,
+                              (device.I[4], device.V[3], device.T[0]))
+        self.assertAlmostEqual(E_on, 2.18e-3, places=8)
+        R, (dR_dT, _) = device.on_resistance(np.array([25.0, 150.0]), 0.0)
+        np.testing.assert_allclose(R, [25e-3, 43e-3], rtol=0.02)
+        self.assertTrue(np.all(dR_dT > 0))
+
+    def test_interpolate_linear(self):
+        # Multilinear tables are exact for multilinear functions, including
+        # when extrapolated
+        axes = (np.array([0.0, 1.0, 3.0]), np.array([-1.0, 2.0]))
+        grid = np.meshgrid(*axes, indexing='ij')
+        table = 2.0 + 3.0 * grid[0] - grid[1] + 0.5 * grid[0] * grid[1]
+        x, y = np.array([0.5, 2.0, 4.0]), np.array([0.0, 1.0, 3.0])
+        value, (dx, dy) = interpolate(axes, table, (x, y))
+        np.testing.assert_allclose(value, 2.0 + 3.0 * x - y + 0.5 * x * y)
+        np.testing.assert_allclose(dx, 3.0 + 0.5 * y)
+        np.testing.assert_allclose(dy, -1.0 + 0.5 * x)
+
+    def test_matches_test_point_scaling(self):
+        nn = 5
+        reference = _setup_mosfet(nn, **C2M0025120D)
+        reference.set_val('R_ds_on', 0.025)
+        device = MOSFETDevice.from_test_point('linear', R_ds_on=0.025,
+                                              Q_rr=487e-9, **C2M0025120D)
+        prob = _setup_mosfet(nn, device=device)
+        for p in (prob, reference):
+            p.run_model()
+        np.testing.assert_allclose(prob.get_val('P_loss'),
+                                   reference.get_val('P_loss'), rtol=1e-10)
+
+    def test_partials(self):
+        prob = _setup_mosfet(6, device='C3M0016120K')
+        prob.set_val('T_junction', [20.0, 60.0, 100.0, 120.0, 150.0, 190.0])
+        prob.run_model()
+        data = prob.check_partials(method='cs', out_stream=None)
+        assert_check_partials(data, atol=1e-6, rtol=1e-8)
+
+    def test_inverter(self):
+        values = {name: value for name, value in baseline_design.items()
+                  if name != 'mosfet.R_ds_on'}
+        values['bus_voltage'] = 800.0
+        values['I_phase_rms'] = 80.0
+        losses = []
+        for T_junction in (25.0, 150.0):
+            prob = setup_inverter_problem(values=dict(values, **{'mosfet.T_junction': T_junction}),
+                                          mosfet_device='C2M0025120D', fused=True)
+            prob.set_val('modulation_index_slack', 0.5)
+            prob.run_model()
+            outputs = evaluate_inverter(mosfet_device='C2M0025120D',
+                                        modulation_index_slack=0.5,
+                                        **{'mosfet.T_junction': T_junction}, **values)
+            np.testing.assert_array_equal(outputs['mosfet.P_loss'],
+                                          prob.get_val('mosfet.P_loss'))
+            np.testing.assert_array_equal(outputs['efficiency'],
+                                          prob.get_val('efficiency'))
+            losses.append(prob.get_val('mosfet.P_loss')[0])
+
+        # Conduction losses grow with the junction temperature
+        self.assertGreater(losses[1], losses[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from invertermodel.multistart import _deduplicate, default_start_bounds, \
+    multistart_optimize
+
+
+class TestMultistart(unittest.TestCase):
+    def test_multistart_optimize(self):
+        result = multistart_optimize(4, seed=0, max_workers=2)
+
+        spread = result['spread']
+        self.assertEqual(spread['n_starts'], 4)
+        self.assertEqual(spread['n_run'], 4)
+        self.assertEqual(len(result['results']), 4)
+        self.assertGreater(spread['n_converged'], 0)
+        self.assertEqual(spread['n_optima'], len(result['optima']))
+        self.assertEqual(sum(optimum['count'] for optimum in result['optima']),
+                         spread['n_converged'])
+
+        best = result['best']
+        self.assertEqual(best['efficiency'], spread['max'])
+        self.assertGreater(best['efficiency'], 0.9)
+        for optimum in result['optima']:
+            self.assertLessEqual(optimum['efficiency'], best['efficiency'])
+
+        # The starts are drawn within the bounds
+        for start in result['results']:
+            for name, (lower, upper) in default_start_bounds.items():
+                self.assertTrue(lower <= start['start'][name] <= upper)
+
+    def test_target(self):
+        result = multistart_optimize(6, seed=0, max_workers=1, target=0.0)
+        self.assertTrue(result['target_reached'])
+        self.assertLess(result['spread']['n_run'], 6)
+
+    def test_deduplicate(self):
+        bounds = {'x': (0.0, 10.0)}
+        results = [{'index': 0, 'efficiency': 0.9, 'design': {'x': np.array([1.0])}},
+                   {'index': 1, 'efficiency': 0.95, 'design': {'x': np.array([5.0])}},
+                   {'index': 2, 'efficiency': 0.9, 'design': {'x': np.array([1.001])}}]
+        optima = _deduplicate(results, bounds, tol=1e-3)
+        self.assertEqual(len(optima), 2)
+        self.assertEqual(optima[0]['starts'], [1])
+        self.assertEqual(optima[1]['count'], 2)
+        self.assertEqual(sorted(optima[1]['starts']), [0, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from invertermodel.analysis import run_analysis, set_values, \
+    setup_inverter_problem
+from invertermodel.pareto import load_pareto_front, nondominated, pareto_front, \
+    setup_epsilon_problem
+
+
+_mass_limits = [100.0, 30.0, 10.0, 3.0]
+_point_columns = ('mass_limit', 'mass', 'efficiency', 'success', 'nondominated',
+                  'elapsed')
+
+
+class TestPareto(unittest.TestCase):
+    def test_pareto_front(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'front.npz')
+            front = pareto_front(mass_limits=_mass_limits[::-1], path=path)
+
+            np.testing.assert_array_equal(front['mass_limit'], _mass_limits)
+            self.assertTrue(np.all(front['success']))
+            self.assertTrue(np.all(front['mass'] <= front['mass_limit'] * (1 + 1e-6)))
+            # Tightening the mass limit costs efficiency
+            self.assertTrue(np.all(np.diff(front['efficiency']) < 0))
+            self.assertTrue(np.all(front['nondominated']))
+
+            saved = load_pareto_front(path)
+            self.assertEqual(set(saved), set(front))
+            for name, value in front.items():
+                np.testing.assert_array_equal(saved[name], value)
+
+        # The recorded design reproduces the recorded efficiency and mass
+        prob = setup_inverter_problem()
+        set_values(prob, {name: value[-1] for name, value in front.items()
+                          if name not in _point_columns})
+        run_analysis(prob)
+        self.assertAlmostEqual(prob.get_val('mass')[0], front['mass'][-1], places=6)
+        self.assertAlmostEqual(prob.get_val('efficiency')[0], front['efficiency'][-1],
+                               places=4)
+
+    def test_parallel_chains(self):
+        front = pareto_front(mass_limits=_mass_limits, n_chains=2, max_workers=2)
+        np.testing.assert_array_equal(front['mass_limit'], _mass_limits)
+        self.assertTrue(np.all(front['success']))
+        self.assertTrue(np.all(front['mass'] <= front['mass_limit'] * (1 + 1e-6)))
+
+    def test_temperature_limits(self):
+        limits = {'mosfet_thermal.temperature_junction': 400.0}
+        prob = setup_epsilon_problem(thermal=True, temperature_limits=limits)
+        prob.final_setup()
+        constraints = prob.model.get_constraints()
+        self.assertIn('mass', constraints)
+        self.assertIn('mosfet_thermal.temperature_junction', constraints)
+
+        front = pareto_front(mass_limits=[30.0], thermal=True, temperature_limits=limits)
+        self.assertTrue(front['success'][0])
+        self.assertLessEqual(front['mass'][0], 30.0 * (1 + 1e-6))
+        prob = setup_inverter_problem(thermal=True)
+        set_values(prob, {name: value[0] for name, value in front.items()
+                          if name not in _point_columns})
+        run_analysis(prob)
+        self.assertLessEqual(prob.get_val('mosfet_thermal.temperature_junction', units='degC')[0],
+                             400.0 + 1e-3)
+
+    def test_nondominated(self):
+        mass = np.array([1.0, 2.0, 3.0, 2.5, 4.0])
+        efficiency = np.array([0.80, 0.85, 0.90, 0.84, 0.89])
+        np.testing.assert_array_equal(nondominated(mass, efficiency),
+                                      [True, True, True, False, False])
+        np.testing.assert_array_equal(
+            nondominated(mass, efficiency, mask=[True, False, True, True, True]),
+            [True, False, True, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
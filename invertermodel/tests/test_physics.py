@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from invertermodel.analysis import baseline_design, run_analysis, \
+    setup_inverter_problem
+from invertermodel.physics import evaluate_inverter
+
+
+def _outputs(prob):
+    return {meta['prom_name']: prob.get_val(meta['prom_name'])
+            for path, meta in prob.model.get_io_metadata(iotypes='output').items()
+            if not path.startswith('_auto_ivc')}
+
+
+class TestEvaluateInverter(unittest.TestCase):
+    def _assert_matches(self, prob, outputs):
+        expected = _outputs(prob)
+        for name, value in expected.items():
+            if prob.model.inverter.options['fused']:
+                np.testing.assert_array_equal(outputs[name], value, err_msg=name)
+            else:
+                # The ExecComps evaluate in complex arithmetic, whose division
+                # may differ from the real one in the last bit
+                np.testing.assert_allclose(outputs[name], value, rtol=1e-14,
+                                           atol=0, err_msg=name)
+
+    def test_matches_inverter(self):
+        nn = 5
+        values = dict(baseline_design)
+        values['I_phase_rms'] = np.linspace(20.0, 60.0, nn)
+        values['ac_filter_inductor.n_turns'] = np.linspace(30.0, 50.0, nn)
+        values['dc_link_cap.C'] = np.linspace(50e-6, 200e-6, nn)
+
+        outputs = evaluate_inverter(modulation_index_slack=0.9, **values)
+        self.assertTrue(np.all(outputs['feasible']))
+        for fused in (False, True):
+            prob = setup_inverter_problem(num_nodes=nn, values=values, fused=fused)
+            prob.set_val('modulation_index_slack', 0.9)
+            prob.run_model()
+            self._assert_matches(prob, outputs)
+
+    def test_matches_analysis(self):
+        values = {name: value for name, value in baseline_design.items()
+                  if name != 'r_wire' and not name.startswith('ac_filter_inductor')}
+        prob = setup_inverter_problem(values=values, use_filter_inductor=False,
+                                      fused=True)
+        feasible = run_analysis(prob)
+        outputs = evaluate_inverter(use_filter_inductor=False, **values)
+
+        self._assert_matches(prob, outputs)
+        np.testing.assert_array_equal(outputs['feasible'], feasible)
+
+    def test_infeasible(self):
+        outputs = evaluate_inverter(**dict(baseline_design, bus_voltage=[2000, 500]))
+        np.testing.assert_array_equal(outputs['feasible'], [True, False])
+        self.assertTrue(np.isnan(outputs['V_ripple'][1]))
+        self.assertTrue(np.isfinite(outputs['mosfet.P_loss']).all())
+
+    def test_missing_inputs(self):
+        values = dict(baseline_design)
+        del values['dc_link_cap.C']
+        with self.assertRaisesRegex(TypeError, 'dc_link_cap.C'):
+            evaluate_inverter(**values)
+
+
+if __name__ == "__main__":
+    unittest.main()
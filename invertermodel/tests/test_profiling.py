@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+
+import openmdao.api as om
+
+from invertermodel.analysis import baseline_design, set_values, \
+    setup_inverter_problem
+from invertermodel.inverter_model import Inverter
+from invertermodel.profiling import Profiler
+
+
+def _setup(**kwargs):
+    prob = setup_inverter_problem(**kwargs)
+    prob.set_val('modulation_index_slack', 0.9)
+    return prob
+
+
+class TestProfiler(unittest.TestCase):
+    def test_call_counts(self):
+        prob = _setup()
+        with Profiler(prob.model) as profiler:
+            prob.run_model()
+            prob.run_model()
+            prob.compute_totals(['efficiency', 'mass'],
+                                ['I_phase_rms', 'dc_link_cap.C'])
+
+        stats = profiler.stats()
+        for path in ('inverter.mosfet', 'inverter.dc_link_cap',
+                     'inverter.ac_filter_inductor'):
+            self.assertEqual(stats[path]['compute']['calls'], 2)
+            self.assertEqual(stats[path]['compute']['cs_calls'], 0)
+            self.assertEqual(stats[path]['linearize']['calls'], 1)
+            self.assertGreater(stats[path]['compute']['time'], 0.0)
+        # Two nonlinear solves, and at least one linear solve for the totals
+        self.assertGreater(stats['']['solve']['calls'], 2)
+
+        # Detaching restores the original methods
+        prob.run_model()
+        self.assertEqual(
+            profiler.stats()['inverter.mosfet']['compute']['calls'], 2)
+        self.assertNotIn('compute', vars(prob.model.inverter.mosfet))
+
+    def test_complex_step_calls(self):
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("inverter", Inverter(), promotes=["*"])
+        prob.setup(force_alloc_complex=True)
+        set_values(prob, baseline_design)
+        prob.set_val('modulation_index_slack', 0.9)
+        prob.run_model()
+
+        with Profiler(prob.model) as profiler:
+            prob.check_partials(method='cs', out_stream=None)
+
+        stats = profiler.stats()['inverter.dc_link_cap']
+        self.assertGreater(stats['compute']['cs_calls'], 0)
+        self.assertGreater(stats['linearize']['calls'], 0)
+
+    def test_analysis_errors(self):
+        prob = _setup()
+        prob.set_val('modulation_index_slack', 10.0)
+        with Profiler(prob.model) as profiler:
+            with self.assertRaises(om.AnalysisError):
+                prob.run_model()
+
+        stats = profiler.stats()
+        self.assertEqual(stats['inverter.dc_link_cap']['analysis_errors'], 1)
+        self.assertNotIn('inverter.mosfet', [
+            path for path, entry in stats.items() if entry['analysis_errors']])
+
+    def test_export(self):
+        prob = _setup()
+        with Profiler(prob.model.inverter) as profiler:
+            prob.run_model()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            profiler.to_json(path)
+            with open(path) as file:
+                self.assertEqual(json.load(file), profiler.stats())
+
+        table = profiler.table()
+        self.assertIn('inverter.ripple_current', table)
+        self.assertEqual(len(table.splitlines()), 2 + len(profiler.stats()))
+
+        profiler.reset()
+        self.assertEqual(profiler.stats(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
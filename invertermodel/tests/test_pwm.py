@@ -0,0 +1,148 @@
+import unittest
+import warnings
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from invertermodel.analysis import run_analysis, setup_inverter_problem
+from invertermodel.dc_link_cap import DCLinkCapacitor
+from invertermodel.physics import dc_link_input_currents, ripple_current
+from invertermodel.pwm import PWMWaveform, harmonic_spectrum, integral_names, \
+    pwm_waveforms, waveform_integrals
+from invertermodel.ripple_current import RippleCurrent
+
+
+_modulation_index = np.array([0.3, 0.7, 0.95])
+_power_factor = np.array([0.95, 0.8, 0.99])
+
+
+class TestPWM(unittest.TestCase):
+    def test_waveform_integrals(self):
+        # At a high frequency ratio the DC link currents tend to the closed
+        # forms for either scheme
+        I_in_rms, I_in_avg = dc_link_input_currents(1.0, _modulation_index, _power_factor)
+        for scheme in ('spwm', 'svpwm'):
+            integrals = waveform_integrals(_modulation_index, _power_factor, 200, scheme)
+            np.testing.assert_allclose(integrals['I_in_ms'], I_in_rms**2, rtol=1e-3)
+            np.testing.assert_allclose(integrals['I_in_avg'], I_in_avg, rtol=1e-3)
+
+        # The closed form ripple is the largest peak-to-peak ripple of SPWM
+        # above m = 0.75
+        integrals = waveform_integrals(0.9, 1.0, 200, 'spwm')
+        self.assertAlmostEqual(integrals['ripple_pp'], ripple_current(0.9, 1.0, 1.0, 1.0),
+                               places=3)
+
+        # Space vector PWM lowers the ripple
+        self.assertTrue(np.all(
+            waveform_integrals(_modulation_index, 1.0, 48, 'svpwm')['ripple_ms'] <
+            waveform_integrals(_modulation_index, 1.0, 48, 'spwm')['ripple_ms']))
+
+    def test_sampled_waveforms(self):
+        integrals = waveform_integrals(_modulation_index, _power_factor, 24)
+        waveforms = pwm_waveforms(_modulation_index, _power_factor, 24, samples=1024)
+        np.testing.assert_allclose(np.mean(waveforms['dc_current']**2, axis=-1),
+                                   integrals['I_in_ms'], rtol=5e-3)
+        np.testing.assert_allclose(np.mean(waveforms['dc_current'], axis=-1),
+                                   integrals['I_in_avg'], rtol=5e-3)
+        np.testing.assert_allclose(np.mean(waveforms['ripple']**2, axis=-1),
+                                   integrals['ripple_ms'], rtol=2e-2)
+
+        # The fundamental of the phase voltage is half the modulation index,
+        # the first sideband sits around the frequency ratio
+        spectrum = harmonic_spectrum(waveforms['phase_voltage'])
+        np.testing.assert_allclose(spectrum[:, 1], _modulation_index / 2, rtol=1e-2)
+        self.assertTrue(np.all(np.argmax(spectrum[:, 2:], axis=-1) + 2 >= 20))
+
+    def test_table(self):
+        pwm = PWMWaveform(resolution=64)
+        values, gradients = pwm.integrals(_modulation_index, _power_factor, 46.3,
+                                          gradient=True)
+        exact = waveform_integrals(_modulation_index, _power_factor, 46)
+        for name in integral_names:
+            np.testing.assert_allclose(values[name], exact[name], rtol=1e-3)
+
+        # Repeated evaluations are looked up
+        n_simulated = len(pwm)
+        misses = pwm.misses
+        pwm.integrals(_modulation_index, _power_factor, 45.8)
+        self.assertEqual(len(pwm), n_simulated)
+        self.assertEqual(pwm.misses, misses)
+        self.assertGreater(pwm.hits, 0)
+
+        h = 1e-7
+        for k, (dm, dpf) in ((0, (h, 0.0)), (1, (0.0, h))):
+            shifted = pwm.integrals(_modulation_index + dm, _power_factor + dpf, 46.3)
+            np.testing.assert_allclose((shifted['I_cap_ms'] - values['I_cap_ms']) / h,
+                                       gradients['I_cap_ms'][k], rtol=1e-5)
+
+    def test_partials(self):
+        nn = 3
+        pwm = PWMWaveform('spwm')
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem('ripple_current',
+                                 RippleCurrent(num_nodes=nn, pwm=pwm),
+                                 promotes=['*'])
+        prob.model.add_subsystem('dc_link_cap',
+                                 DCLinkCapacitor(num_nodes=nn, pwm=pwm),
+                                 promotes=['*'])
+        prob.setup(force_alloc_complex=True)
+
+        prob.set_val('modulation_index', _modulation_index)
+        prob.set_val('power_factor', _power_factor)
+        prob.set_val('I_phase_rms', 50.0)
+        prob.set_val('L', 1e-4)
+        prob.set_val('bus_voltage', 2000.0)
+        prob.set_val('switching_frequency', 80e3)
+        prob.set_val('electrical_frequency', 1727.0)
+        prob.set_val('C', 1e-4)
+        prob.set_val('dissipation_factor', 0.014)
+        prob.set_val('specific_capacitance', 6.4e-4)
+        prob.run_model()
+
+        data = prob.check_partials(method='cs', out_stream=None)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_inverter(self):
+        closed_form = setup_inverter_problem()
+        waveform = setup_inverter_problem(pwm='svpwm')
+        for prob in (closed_form, waveform):
+            prob.set_val('modulation_index_slack', 0.9)
+            prob.run_model()
+
+        # Close to the closed forms at the baseline operating point
+        for name in ('I_ripple', 'V_ripple', 'efficiency'):
+            np.testing.assert_allclose(waveform.get_val(name), closed_form.get_val(name),
+                                       rtol=1e-3)
+
+    def test_zero_modulation_index(self):
+        # run_analysis first runs at zero modulation index, where the capacitor
+        # current vanishes, and the thermal Inverter's Newton solve needs
+        # finite partials there
+        prob = setup_inverter_problem(pwm='svpwm', thermal=True)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.assertTrue(np.all(run_analysis(prob)))
+
+        dc_link_cap = DCLinkCapacitor(num_nodes=2, pwm=PWMWaveform('svpwm'))
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem('dc_link_cap', dc_link_cap, promotes=['*'])
+        prob.setup()
+        prob.set_val('modulation_index', [0.0, 0.9])
+        prob.set_val('power_factor', 0.95)
+        prob.set_val('I_phase_rms', 50.0)
+        prob.set_val('switching_frequency', 80e3)
+        prob.set_val('electrical_frequency', 1727.0)
+        prob.set_val('C', 1e-4)
+        prob.run_model()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            J = prob.compute_totals(of=['V_ripple', 'P_loss'],
+                                    wrt=['modulation_index', 'power_factor'])
+        for value in J.values():
+            self.assertTrue(np.all(np.isfinite(value)))
+
+
+if __name__ == '__main__':
+    unittest.main()
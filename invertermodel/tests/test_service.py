@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+
+import numpy as np
+
+from invertermodel.analysis import baseline_design, run_analysis, setup_inverter_problem
+from invertermodel.service import InverterService, LatencyHistogram, serve_requests, \
+    service_outputs
+
+
+class TestService(unittest.TestCase):
+    def test_matches_batch_evaluation(self):
+        rng = np.random.default_rng(0)
+        n = 200
+        I_phase_rms = rng.uniform(20.0, 80.0, n)
+        bus_voltage = rng.uniform(300.0, 2000.0, n)
+        # Requests override different inputs
+        requests = [{'I_phase_rms': I} if i % 2 else {'I_phase_rms': I, 'bus_voltage': V}
+                    for i, (I, V) in enumerate(zip(I_phase_rms, bus_voltage))]
+
+        results, stats = serve_requests(requests, concurrency=50, max_batch_size=32,
+                                        max_workers=2)
+
+        prob = setup_inverter_problem(num_nodes=n)
+        prob.set_val('I_phase_rms', I_phase_rms)
+        prob.set_val('bus_voltage', np.where(np.arange(n) % 2, baseline_design['bus_voltage'],
+                                             bus_voltage))
+        feasible = run_analysis(prob)
+        self.assertTrue(np.any(feasible) and not np.all(feasible))
+        np.testing.assert_array_equal([result['feasible'] for result in results], feasible)
+        for name in service_outputs:
+            np.testing.assert_allclose([result[name] for result in results], prob.get_val(name),
+                                       rtol=1e-10)
+
+        # Concurrent requests are coalesced into batches
+        self.assertEqual(stats['requests'], n)
+        self.assertLess(stats['batches'], n / 4)
+        self.assertLessEqual(max(stats['batch_sizes']), 32)
+        self.assertEqual(sum(size * count for size, count in stats['batch_sizes'].items()), n)
+        self.assertEqual(stats['latency']['count'], n)
+        self.assertEqual(sum(stats['latency']['histogram']['counts']), n)
+        self.assertLessEqual(stats['latency']['p50'], stats['latency']['p99'])
+
+    def test_flush_on_delay(self):
+        async def main():
+            async with InverterService(executor='thread', max_batch_size=64,
+                                       max_delay=0.01) as service:
+                first = await service.evaluate({'I_phase_rms': 30.0})
+                second = await service.evaluate({'I_phase_rms': 30.0})
+                return first, second, service.stats()
+
+        first, second, stats = asyncio.run(main())
+        self.assertEqual(first, second)
+        self.assertEqual(stats['batch_sizes'], {1: 2})
+
+    def test_backpressure(self):
+        async def main():
+            service = InverterService(executor='thread', max_pending=3, max_batch_size=2)
+            futures = [await service.submit({'I_phase_rms': 30.0 + i}, wait=False)
+                       for i in range(3)]
+            with self.assertRaises(asyncio.QueueFull):
+                await service.submit({'I_phase_rms': 40.0}, wait=False)
+            # A waiting submit resumes once the service takes requests off the
+            # queue
+            waiting = asyncio.ensure_future(service.submit({'I_phase_rms': 40.0}))
+            await asyncio.sleep(0)
+            self.assertFalse(waiting.done())
+            await service.start()
+            futures.append(await waiting)
+            results = await asyncio.gather(*futures)
+            await service.stop()
+            return results
+
+        results = asyncio.run(main())
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result['feasible'] for result in results))
+
+    def test_invalid_values(self):
+        async def main():
+            service = InverterService(executor='thread')
+            await service.submit({'not_an_input': 1.0})
+
+        with self.assertRaises(ValueError):
+            asyncio.run(main())
+
+        # A bad request is rejected on its own, not with the requests it would
+        # have been batched with
+        async def batch():
+            async with InverterService(executor='thread', max_batch_size=8,
+                                       max_delay=0.05) as service:
+                requests = [{'I_phase_rms': 30.0}, {'I_phase_rms': 'thirty'},
+                            {'I_phase_rms': [30.0, 40.0]}, {'I_phase_rms': 40.0}]
+                results = await asyncio.gather(*(service.evaluate(request)
+                                                 for request in requests),
+                                               return_exceptions=True)
+                return results, service.stats()
+
+        results, stats = asyncio.run(batch())
+        self.assertIsInstance(results[1], ValueError)
+        self.assertIsInstance(results[2], ValueError)
+        self.assertTrue(results[0]['feasible'] and results[3]['feasible'])
+        self.assertEqual(stats['batch_sizes'], {2: 1})
+
+    def test_process_pool(self):
+        requests = [{'I_phase_rms': I} for I in np.linspace(20.0, 60.0, 16)]
+        results, stats = serve_requests(requests, executor='process', max_batch_size=8)
+        threaded, _ = serve_requests(requests, max_batch_size=8)
+        self.assertEqual(results, threaded)
+        self.assertEqual(stats['requests'], 16)
+
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram(lower=1e-3, upper=1.0, bins_per_decade=10)
+        histogram.record(np.full(90, 2e-3))
+        histogram.record(np.full(10, 0.5))
+        histogram.record(10.0)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 101)
+        self.assertEqual(summary['max'], 10.0)
+        self.assertTrue(2e-3 < summary['p50'] <= 2e-3 * 10**0.1)
+        self.assertTrue(0.5 < summary['p99'] <= 1.0)
+        self.assertEqual(sum(summary['histogram']['counts']), 101)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+
+from invertermodel.analysis import run_analysis, setup_inverter_problem
+from invertermodel.surrogate import InverterSurrogate, InverterSurrogateModel, \
+    surrogate_outputs, train_surrogate
+
+
+_bounds = {'I_phase_rms': (30.0, 60.0),
+           'switching_frequency': (40e3, 100e3)}
+
+
+class TestSurrogate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.surrogate = train_surrogate(_bounds, levels=9, n_validation=32, seed=0)
+
+    def test_accuracy_report(self):
+        report = self.surrogate.report
+        self.assertEqual(report['n_samples'], 32)
+        for name in surrogate_outputs:
+            self.assertLess(report[name]['max_rel_error'], 1e-2)
+
+    def test_save_load(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, 'surrogate.npz')
+        self.surrogate.save(path)
+        loaded = InverterSurrogateModel.load(path)
+
+        self.assertEqual(loaded.inputs, self.surrogate.inputs)
+        self.assertEqual(loaded.report, self.surrogate.report)
+        values = {'I_phase_rms': np.array([33.0, 51.0]),
+                  'switching_frequency': np.array([45e3, 97e3])}
+        expected = self.surrogate.evaluate(values)
+        for name, value in loaded.evaluate(values).items():
+            np.testing.assert_array_equal(value, expected[name])
+
+    def test_drop_in_with_fallback(self):
+        I_phase_rms = np.array([35.0, 50.0, 70.0])
+        switching_frequency = np.array([50e3, 80e3, 90e3])
+
+        prob = om.Problem()
+        prob.model.add_subsystem("inverter",
+                                 InverterSurrogate(surrogate=self.surrogate,
+                                                   num_nodes=3),
+                                 promotes=["*"])
+        prob.setup()
+        prob.set_val('I_phase_rms', I_phase_rms)
+        prob.set_val('switching_frequency', switching_frequency)
+        prob.run_model()
+
+        # Only the last node is outside of the trained domain
+        self.assertEqual(prob.model.inverter.surrogate.n_fallback, 1)
+
+        full = setup_inverter_problem(num_nodes=3)
+        full.set_val('I_phase_rms', I_phase_rms)
+        full.set_val('switching_frequency', switching_frequency)
+        run_analysis(full)
+        for name in surrogate_outputs:
+            np.testing.assert_allclose(prob.get_val(name)[:2],
+                                       full.get_val(name)[:2], rtol=1e-2)
+            np.testing.assert_allclose(prob.get_val(name)[2],
+                                       full.get_val(name)[2], rtol=1e-12)
+
+        data = prob.check_partials(method='fd', form='central', step=1e-6,
+                                   step_calc='rel', out_stream=None)
+        for (of, wrt), values in data['inverter.surrogate'].items():
+            if wrt in _bounds:
+                np.testing.assert_allclose(values['J_fwd'], values['J_fd'],
+                                           rtol=1e-5, atol=1e-10)
+
+
+if __name__ == "__main__":
+    unittest.main()
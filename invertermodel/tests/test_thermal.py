@@ -0,0 +1,174 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, \
+    assert_check_totals
+
+from invertermodel.thermal import MOSFETThermalNetwork, \
+    DCLinkCapacitorThermalNetwork, ACFilterInductorThermalNetwork, _ThermalLadder
+
+
+def _check_network_partials(network, values):
+    prob = om.Problem()
+    prob.model.add_subsystem("network", network, promotes=["*"])
+    prob.setup(force_alloc_complex=True)
+
+    for key, value in values.items():
+        prob.set_val(key, value)
+
+    prob.run_model()
+    return prob.check_partials(method="cs", out_stream=None)
+
+
+class TestThermalNetworks(unittest.TestCase):
+    def test_mosfet_thermal_network_partials(self):
+        data = _check_network_partials(MOSFETThermalNetwork(),
+                                       {'P_loss': 40.0,
+                                        'resistance_junction_to_case': 0.24,
+                                        'resistance_case_to_sink': 0.1,
+                                        'resistance_sink_to_air': 0.5,
+                                        'temperature_ambient': 300.0,
+                                        'temperature_junction': 340.0,
+                                        'temperature_case': 330.0,
+                                        'temperature_sink': 320.0})
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_dc_link_cap_thermal_network_partials(self):
+        for heatsink in (True, False):
+            values = {'P_loss': 2.0,
+                      'resistance_hotspot_to_case': 3.0,
+                      'temperature_ambient': 300.0,
+                      'temperature_hotspot': 320.0,
+                      'temperature_case': 310.0}
+            if heatsink:
+                values.update({'resistance_case_to_sink': 1.0,
+                               'resistance_sink_to_air': 0.5,
+                               'temperature_sink': 305.0})
+            else:
+                values['resistance_case_to_air'] = 8.0
+
+            data = _check_network_partials(
+                DCLinkCapacitorThermalNetwork(heatsink=heatsink), values)
+            assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_ac_filter_inductor_thermal_network_partials(self):
+        data = _check_network_partials(ACFilterInductorThermalNetwork(),
+                                       {'P_loss_core': 5.0,
+                                        'P_loss_copper': 12.0,
+                                        'resistance_core_to_windings': 1.5,
+                                        'resistance_windings_to_sink': 0.8,
+                                        'resistance_sink_to_air': 0.5,
+                                        'temperature_ambient': 300.0,
+                                        'temperature_core': 340.0,
+                                        'temperature_windings': 330.0,
+                                        'temperature_sink': 315.0})
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_mosfet_thermal_network_direct_solve(self):
+        nn = 4
+        P_loss = np.array([10.0, 20.0, 40.0, 80.0])
+
+        prob = om.Problem()
+        prob.model.add_subsystem("network",
+                                 MOSFETThermalNetwork(num_nodes=nn),
+                                 promotes=["*"])
+        prob.model.linear_solver = om.DirectSolver()
+        prob.setup(force_alloc_complex=True)
+        prob.set_val('P_loss', P_loss)
+        prob.set_val('resistance_junction_to_case', 0.24)
+        prob.set_val('resistance_case_to_sink', 0.1)
+        prob.set_val('resistance_sink_to_air', 0.5)
+        prob.set_val('temperature_ambient', 300.0)
+
+        # No nonlinear solver: solve_nonlinear converges in a single pass
+        prob.run_model()
+
+        np.testing.assert_allclose(prob.get_val('temperature_sink'),
+                                   300.0 + 0.5 * P_loss)
+        np.testing.assert_allclose(prob.get_val('temperature_case'),
+                                   300.0 + 0.6 * P_loss)
+        np.testing.assert_allclose(prob.get_val('temperature_junction'),
+                                   300.0 + 0.84 * P_loss)
+
+        prob.model.run_apply_nonlinear()
+        for name in ('temperature_junction', 'temperature_case', 'temperature_sink'):
+            np.testing.assert_allclose(prob.model._residuals[name], 0.0,
+                                       atol=1e-10)
+
+        for mode in ('fwd', 'rev'):
+            prob.setup(mode=mode, force_alloc_complex=True)
+            prob.set_val('P_loss', P_loss)
+            prob.set_val('resistance_junction_to_case', 0.24)
+            prob.set_val('resistance_case_to_sink', 0.1)
+            prob.set_val('resistance_sink_to_air', 0.5)
+            prob.set_val('temperature_ambient', 300.0)
+            prob.run_model()
+
+            totals = prob.compute_totals('temperature_junction',
+                                         ['P_loss', 'resistance_case_to_sink'])
+            np.testing.assert_allclose(totals['temperature_junction', 'P_loss'],
+                                       np.diag(np.full(nn, 0.84)))
+            np.testing.assert_allclose(totals['temperature_junction', 'resistance_case_to_sink'],
+                                       np.diag(P_loss))
+
+    def test_inductor_thermal_network_totals(self):
+        prob = om.Problem()
+        prob.model.add_subsystem("network",
+                                 ACFilterInductorThermalNetwork(num_nodes=3),
+                                 promotes=["*"])
+        prob.model.linear_solver = om.DirectSolver()
+        prob.setup(force_alloc_complex=True)
+        prob.set_val('P_loss_core', [5.0, 6.0, 7.0])
+        prob.set_val('P_loss_copper', [12.0, 10.0, 8.0])
+        prob.set_val('resistance_core_to_windings', 1.5)
+        prob.set_val('resistance_windings_to_sink', 0.8)
+        prob.set_val('resistance_sink_to_air', 0.5)
+        prob.set_val('temperature_ambient', 300.0)
+        prob.run_model()
+
+        np.testing.assert_allclose(prob.get_val('temperature_core'),
+                                   300.0 + 1.3 * np.array([17.0, 16.0, 15.0]) +
+                                   1.5 * np.array([5.0, 6.0, 7.0]))
+
+        data = prob.check_totals(of=['temperature_core', 'temperature_windings'],
+                                 wrt=['P_loss_core', 'P_loss_copper',
+                                      'resistance_core_to_windings',
+                                      'temperature_ambient'],
+                                 method='cs', out_stream=None)
+        assert_check_totals(data, atol=1e-8, rtol=1e-8)
+
+    def test_solve_linear_totals(self):
+        # With the default LinearRunOnce the derivatives come from the
+        # network's own direct linear solve
+        for mode in ('fwd', 'rev'):
+            prob = om.Problem()
+            prob.model.add_subsystem("network",
+                                     ACFilterInductorThermalNetwork(num_nodes=3),
+                                     promotes=["*"])
+            prob.setup(mode=mode, force_alloc_complex=True)
+            prob.set_val('P_loss_core', [5.0, 6.0, 7.0])
+            prob.set_val('P_loss_copper', [12.0, 10.0, 8.0])
+            prob.set_val('resistance_core_to_windings', 1.5)
+            prob.set_val('resistance_windings_to_sink', 0.8)
+            prob.set_val('resistance_sink_to_air', 0.5)
+            prob.set_val('temperature_ambient', 300.0)
+            prob.run_model()
+
+            with mock.patch.object(_ThermalLadder, 'solve_linear', autospec=True,
+                                   side_effect=_ThermalLadder.solve_linear) as solve_linear:
+                data = prob.check_totals(of=['temperature_core', 'temperature_windings',
+                                             'temperature_sink'],
+                                         wrt=['P_loss_core', 'P_loss_copper',
+                                              'resistance_core_to_windings',
+                                              'resistance_sink_to_air',
+                                              'temperature_ambient'],
+                                         method='cs', out_stream=None)
+            self.assertGreater(solve_linear.call_count, 0)
+            assert_check_totals(data, atol=1e-8, rtol=1e-8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+from scipy.stats import qmc
+
+from invertermodel.analysis import baseline_design, run_analysis, setup_inverter_problem
+from invertermodel.tolerance import StreamingStatistics, ToleranceAnalysis, \
+    default_tolerances, perturb, tolerance_outputs
+
+
+class TestTolerance(unittest.TestCase):
+    def test_streaming_statistics(self):
+        rng = np.random.default_rng(0)
+        data = {'a': rng.lognormal(size=20000), 'b': rng.normal(5.0, 2.0, size=20000)}
+        statistics = StreamingStatistics(['a', 'b'], sketch_size=500)
+        for batch in np.array_split(np.arange(20000), [7, 1000, 1001, 12000]):
+            statistics.update({name: values[batch] for name, values in data.items()})
+
+        self.assertEqual(statistics.count, 20000)
+        for name, values in data.items():
+            self.assertAlmostEqual(statistics.mean(name), values.mean(), places=12)
+            self.assertAlmostEqual(statistics.variance(name), values.var(ddof=1), places=10)
+            # The rank error of the sketch is about 1 / sketch_size
+            q = np.array([0.01, 0.25, 0.5, 0.75, 0.99])
+            estimate = statistics.quantile(name, q)
+            ranks = np.searchsorted(np.sort(values), estimate) / values.size
+            np.testing.assert_allclose(ranks, q, atol=2e-3)
+
+    def test_perturb(self):
+        unit = qmc.Sobol(d=len(default_tolerances), seed=1).random(4096)
+        samples = perturb(baseline_design, default_tolerances, unit)
+        C = samples['dc_link_cap.C'] / baseline_design['dc_link_cap.C']
+        self.assertTrue(np.all((C >= 0.9) & (C <= 1.1)))
+        R_ds_on = samples['mosfet.R_ds_on'] / baseline_design['mosfet.R_ds_on']
+        self.assertAlmostEqual(np.mean(R_ds_on), 1.0, places=4)
+        self.assertAlmostEqual(np.std(R_ds_on), 0.05, places=3)
+
+        with self.assertRaises(ValueError):
+            perturb(baseline_design, {'dc_link_cap.C': ('triangular', 0.1)}, unit)
+
+    def test_analysis(self):
+        # Never converges with rtol=0, so exactly two batches are evaluated
+        analysis = ToleranceAnalysis(batch_size=64)
+        results = analysis.run(max_samples=128, rtol=0.0, seed=0)
+        self.assertEqual(results['n_samples'], 128)
+        self.assertFalse(results['converged'])
+
+        prob = setup_inverter_problem(num_nodes=128)
+        unit = qmc.Sobol(d=len(default_tolerances), seed=0).random(128)
+        for name, values in perturb(baseline_design, default_tolerances, unit).items():
+            prob.set_val(name, values)
+        self.assertTrue(np.all(run_analysis(prob)))
+
+        for name in tolerance_outputs:
+            values = prob.get_val(name)
+            statistics = results['statistics'][name]
+            self.assertAlmostEqual(statistics['mean'], values.mean(), places=12)
+            self.assertAlmostEqual(statistics['std'], values.std(ddof=1), places=12)
+            # Below the sketch size the quantiles are exact
+            np.testing.assert_allclose(list(statistics['quantiles'].values()),
+                                       np.quantile(values, [0.01, 0.5, 0.99], method='hazen'))
+
+    def test_convergence(self):
+        analysis = ToleranceAnalysis(batch_size=256, thermal=True)
+        results = analysis.run(max_samples=2**14, rtol=1e-2, seed=0)
+        self.assertTrue(results['converged'])
+        self.assertLess(results['n_samples'], 2**14)
+        self.assertIn('mosfet_thermal.temperature_junction', results['statistics'])
+
+        # A tighter tolerance needs more samples
+        tighter = analysis.run(max_samples=2**14, rtol=1e-3, seed=0)
+        self.assertGreater(tighter['n_samples'], results['n_samples'])
+
+
+if __name__ == '__main__':
+    unittest.main()
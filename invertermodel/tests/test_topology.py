@@ -0,0 +1,61 @@
+import unittest
+
+import openmdao.api as om
+
+from invertermodel.topology import configurations, dominates, enumerate_topologies
+
+
+class _FailingDriver(om.ScipyOptimizeDriver):
+    def run(self):
+        raise RuntimeError('failed to converge')
+
+
+class TestTopology(unittest.TestCase):
+    def test_configurations(self):
+        configs = configurations((3, 4), (1, 2))
+        self.assertEqual(len(configs), 4)
+        self.assertEqual(configs[0], {'n_phases': 3, 'mosfet.switches_per_phase': 1})
+        self.assertTrue(dominates(configs[0], configs[-1]))
+        self.assertFalse(dominates(configs[-1], configs[0]))
+        self.assertFalse(dominates(configs[0], configs[0]))
+        self.assertFalse(dominates({'n_phases': 4, 'mosfet.switches_per_phase': 1},
+                                   {'n_phases': 3, 'mosfet.switches_per_phase': 2}))
+
+    def test_analysis(self):
+        ranking = enumerate_topologies((3, 4, 5), (1, 2), optimize=False, prune=False,
+                                       max_workers=2)
+        self.assertEqual(len(ranking), 6)
+        self.assertEqual([entry['rank'] for entry in ranking], list(range(1, 7)))
+        self.assertTrue(all(entry['status'] == 'evaluated' for entry in ranking))
+        efficiencies = [entry['efficiency'] for entry in ranking]
+        self.assertEqual(efficiencies, sorted(efficiencies, reverse=True))
+
+        # Pruning would have been safe, dominated configurations are never
+        # more efficient
+        for entry in ranking:
+            for other in ranking:
+                if dominates(entry['config'], other['config']):
+                    self.assertLessEqual(other['efficiency'], entry['efficiency'])
+                    self.assertGreaterEqual(other['total_loss'], entry['total_loss'])
+
+    def test_optimization_pruning(self):
+        ranking = enumerate_topologies((3, 4), (1, 2), max_workers=1)
+        self.assertEqual([entry['status'] for entry in ranking],
+                         ['evaluated', 'pruned', 'pruned', 'pruned'])
+        best = ranking[0]
+        self.assertEqual(best['config'], {'n_phases': 3, 'mosfet.switches_per_phase': 1})
+        self.assertTrue(best['success'])
+        self.assertIn('dc_link_cap.C', best['design'])
+        for entry in ranking[1:]:
+            self.assertEqual(entry['dominated_by'], best['config'])
+
+    def test_failed_optimization(self):
+        ranking = enumerate_topologies((3,), (1, 2), driver=_FailingDriver, max_workers=1)
+        self.assertEqual([entry['status'] for entry in ranking], ['failed', 'failed'])
+        for entry in ranking:
+            self.assertFalse(entry['success'])
+            self.assertIn('failed to converge', entry['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_check_totals
+
+from invertermodel.thermal import MOSFETThermalNetwork
+from invertermodel.transient_thermal import ExponentialIntegrator, \
+    FosterThermalNetwork, MOSFETTransientThermalNetwork, \
+    ACFilterInductorTransientThermalNetwork, foster_system, iter_losses
+
+
+_mosfet_design = {'resistance_junction_to_case': 0.24,
+                  'resistance_case_to_sink': 0.1,
+                  'resistance_sink_to_air': 0.5,
+                  'capacitance_junction': 0.01,
+                  'capacitance_case': 0.5,
+                  'capacitance_sink': 20.0,
+                  'temperature_ambient': 300.0}
+
+
+def _run_network(network, values):
+    prob = om.Problem()
+    prob.model.add_subsystem("network", network, promotes=["*"])
+    prob.setup()
+    for key, value in values.items():
+        prob.set_val(key, value)
+    prob.run_model()
+    return prob
+
+
+class TestTransientThermal(unittest.TestCase):
+    def test_foster_step_response(self):
+        R = np.array([0.05, 0.1, 0.2])
+        tau = np.array([1e-3, 1e-2, 0.5])
+        dt = 1e-3
+        n_steps = 2000
+
+        t = dt * np.arange(1, n_steps + 1)
+        Z = np.sum(R * (1 - np.exp(-t[:, None] / tau)), axis=1)
+
+        integrator = ExponentialIntegrator(lambda p: foster_system(p[:3], p[3:]),
+                                           np.concatenate([R, tau]), dt,
+                                           output_matrix=np.ones((1, 3)))
+        rise = np.concatenate([integrator.step(losses)[0][:, 0]
+                               for losses in iter_losses(np.full(n_steps, 50.0), 300)])
+        np.testing.assert_allclose(rise, 50.0 * Z, rtol=1e-12)
+
+    def test_chunk_size_independence(self):
+        losses = 50.0 + 40.0 * np.sin(2e-3 * np.arange(100000))
+        results = []
+        for chunk_size in (1000, 65536, 100000):
+            integrator = ExponentialIntegrator(
+                lambda p: foster_system(p[:2], p[2:]),
+                [0.1, 0.2, 1e-2, 0.5], 1e-3,
+                output_matrix=np.ones((1, 2)), gradients=True)
+            results.append(integrator.peaks(iter_losses(losses, chunk_size)))
+
+        for peak, index, gradient in results[1:]:
+            np.testing.assert_allclose(peak, results[0][0], rtol=1e-12)
+            np.testing.assert_array_equal(index, results[0][1])
+            np.testing.assert_allclose(gradient, results[0][2], rtol=1e-10)
+
+    def test_mosfet_steady_state_limit(self):
+        # Long enough for the heatsink to settle, so the peak matches the
+        # steady state network
+        prob = _run_network(MOSFETTransientThermalNetwork(losses=np.full(20000, 40.0),
+                                                          dt=0.1),
+                            _mosfet_design)
+
+        steady = om.Problem()
+        steady.model.add_subsystem("network", MOSFETThermalNetwork(),
+                                   promotes=["*"])
+        steady.setup()
+        steady.set_val('P_loss', 40.0)
+        for key in ('resistance_junction_to_case', 'resistance_case_to_sink',
+                    'resistance_sink_to_air', 'temperature_ambient'):
+            steady.set_val(key, _mosfet_design[key])
+        steady.run_model()
+
+        for name in ('temperature_junction', 'temperature_case', 'temperature_sink'):
+            np.testing.assert_allclose(prob.get_val(f'{name}_peak'),
+                                       steady.get_val(name), rtol=1e-10)
+
+    def test_mosfet_peak_partials(self):
+        t = 1e-3 * np.arange(20000)
+        losses = 50.0 + 40.0 * np.sin(20.0 * t)
+        prob = _run_network(MOSFETTransientThermalNetwork(losses=losses, dt=1e-3,
+                                                          chunk_size=4096),
+                            _mosfet_design)
+        self.assertTrue(np.all(prob.get_val('temperature_junction_peak') >
+                               prob.get_val('temperature_case_peak')))
+
+        data = prob.check_partials(method='fd', form='central', step=1e-6,
+                                   step_calc='rel', out_stream=None)
+        assert_check_partials(data, atol=1e-4, rtol=1e-4)
+
+    def test_loss_scale(self):
+        t = 1e-3 * np.arange(20000)
+        losses = 50.0 + 40.0 * np.sin(20.0 * t)
+        scaled = _run_network(MOSFETTransientThermalNetwork(losses=losses, dt=1e-3),
+                              dict(_mosfet_design, P_loss_scale=1.5))
+        reference = _run_network(MOSFETTransientThermalNetwork(losses=1.5 * losses, dt=1e-3),
+                                 _mosfet_design)
+        for name in ('temperature_junction', 'temperature_case', 'temperature_sink'):
+            np.testing.assert_allclose(scaled.get_val(f'{name}_peak'),
+                                       reference.get_val(f'{name}_peak'), rtol=1e-12)
+
+        # Gradients of the peaks with respect to a design variable that sets
+        # the losses, here a switching frequency the losses are proportional to
+        prob = om.Problem()
+        prob.model.add_subsystem('loss_ratio',
+                                 om.ExecComp('P_loss_scale = switching_frequency / 80e3',
+                                             switching_frequency={'val': 80e3, 'units': 'Hz'}),
+                                 promotes=['*'])
+        prob.model.add_subsystem('network',
+                                 MOSFETTransientThermalNetwork(losses=losses, dt=1e-3),
+                                 promotes=['*'])
+        prob.model.add_design_var('switching_frequency')
+        prob.model.add_objective('temperature_junction_peak')
+        prob.setup()
+        for key, value in _mosfet_design.items():
+            prob.set_val(key, value)
+        prob.set_val('switching_frequency', 100e3)
+        prob.run_model()
+        data = prob.check_totals(method='fd', form='central', step=1e-2, out_stream=None)
+        assert_check_totals(data, atol=1e-8, rtol=1e-6)
+        totals = prob.compute_totals()
+        self.assertTrue(totals['temperature_junction_peak', 'switching_frequency'][0, 0] > 0)
+
+    def test_inductor_profile_file(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+
+        losses = np.zeros(5000, dtype=[('core', float), ('copper', float)])
+        losses['core'] = 5.0
+        losses['copper'] = np.linspace(0.0, 20.0, 5000)
+        path = os.path.join(tmpdir.name, 'losses.npy')
+        np.save(path, losses)
+
+        values = {'resistance_core_to_windings': 1.5,
+                  'resistance_windings_to_sink': 0.8,
+                  'resistance_sink_to_air': 0.5,
+                  'capacitance_core': 2.0,
+                  'capacitance_windings': 1.0,
+                  'capacitance_sink': 50.0,
+                  'temperature_ambient': 300.0}
+        from_file = _run_network(ACFilterInductorTransientThermalNetwork(
+            losses=path, dt=0.01, columns=['core', 'copper'], chunk_size=1024),
+            values)
+        from_array = _run_network(ACFilterInductorTransientThermalNetwork(
+            losses=np.column_stack([losses['core'], losses['copper']]), dt=0.01),
+            values)
+
+        for name in ('temperature_core', 'temperature_windings', 'temperature_sink'):
+            np.testing.assert_allclose(from_file.get_val(f'{name}_peak'),
+                                       from_array.get_val(f'{name}_peak'),
+                                       rtol=1e-12)
+
+    def test_foster_partials(self):
+        t = 1e-4 * np.arange(10000)
+        losses = np.where(np.sin(200.0 * t) > 0, 80.0, 10.0)
+        prob = _run_network(FosterThermalNetwork(n_terms=3, losses=losses, dt=1e-4),
+                            {'resistance': [0.05, 0.1, 0.2],
+                             'time_constant': [1e-3, 1e-2, 0.5],
+                             'temperature_ambient': 300.0})
+
+        data = prob.check_partials(method='fd', form='central', step=1e-6,
+                                   step_calc='rel', out_stream=None)
+        assert_check_partials(data, atol=1e-4, rtol=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+
+from invertermodel.analysis import baseline_design
+from invertermodel.warm_start import WarmStartDatabase, default_keys, \
+    warm_started_optimize
+
+
+def _driver():
+    return om.ScipyOptimizeDriver(optimizer='SLSQP', tol=1e-6, maxiter=200, disp=False)
+
+
+class TestWarmStart(unittest.TestCase):
+    def test_database(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'designs.npz')
+            database = WarmStartDatabase(path)
+            self.assertEqual(len(database), 0)
+            self.assertEqual(database.query(baseline_design), [])
+
+            keys = {name: baseline_design[name] for name in default_keys}
+            for scale in (1.0, 2.0, 4.0):
+                database.add(dict(keys, load_inductance=scale * keys['load_inductance']),
+                             {'r_wire': np.array([scale])}, efficiency=0.9)
+            self.assertTrue(os.path.exists(path))
+
+            # Reloaded from disk, nearest by relative distance
+            database = WarmStartDatabase(path)
+            self.assertEqual(len(database), 3)
+            self.assertEqual(database.design_names(), ['r_wire'])
+            nearest = database.query(dict(keys, load_inductance=2.5 * keys['load_inductance']),
+                                     k=2)
+            self.assertEqual([design['r_wire'] for _, design, _ in nearest], [2.0, 4.0])
+            self.assertAlmostEqual(nearest[0][0], np.log10(2.5 / 2.0))
+
+            with self.assertRaises(ValueError):
+                database.add(keys, {'C': np.array([1.0])})
+            with self.assertRaises(ValueError):
+                WarmStartDatabase(path, keys=default_keys[:3]).query(keys)
+
+    def test_warm_started_optimize(self):
+        database = WarmStartDatabase()
+        cold = warm_started_optimize(database, driver=_driver())
+        self.assertTrue(cold['success'])
+        self.assertIsNone(cold['distance'])
+        self.assertEqual(len(database), 1)
+
+        # A slightly different motor starts from the stored optimum
+        values = dict(baseline_design,
+                      load_inductance=1.01 * baseline_design['load_inductance'],
+                      load_phase_resistance=0.99 * baseline_design['load_phase_resistance'])
+        reference = warm_started_optimize(WarmStartDatabase(), values, driver=_driver())
+        warm = warm_started_optimize(database, values, driver=_driver())
+        self.assertTrue(warm['success'])
+        self.assertGreater(warm['distance'], 0.0)
+        self.assertLess(warm['iterations'], reference['iterations'])
+        self.assertAlmostEqual(warm['efficiency'], reference['efficiency'], places=4)
+        self.assertEqual(len(database), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,158 +1,256 @@
+from abc import ABC, abstractmethod
+
 import numpy as np
 
 import openmdao.api as om
 
 
-class MOSFETThermalNetwork(om.ImplicitComponent):
+class _ThermalLadder(om.ImplicitComponent, ABC):
+    """
+    Base class for steady-state thermal networks made of a chain of thermal
+    resistances from the hottest node down to the ambient air, with losses
+    injected at some of the nodes.
+
+    Subclasses add the variables in setup, call `_declare_ladder_partials`, and
+    define `_ladder`, which returns the output temperatures ordered from the
+    hottest node towards ambient, the resistance below each of those nodes, and
+    the loss injected at each node (or None).
+
+    The residual of node i is its heat balance,
+        Q_i + (T_{i-1} - T_i) / R_{i-1} - (T_i - T_{i+1}) / R_i,
+    with T_n being the ambient temperature. The network is linear in
+    temperature, so it is solved directly: the heat flowing through R_i is the
+    sum of the losses injected above it, and each temperature is the ambient
+    temperature plus the drops across every resistance below it.
+
+    OpenMDAO's relevance graph does not see the coupling between the outputs of
+    a single component, so derivatives through a network need a linear solver
+    that does not prune on relevance (e.g. DirectSolver) in the enclosing group.
+    """
+
+    def initialize(self):
+        self.options.declare("num_nodes", default=1, types=int,
+                             desc="Number of operating points evaluated at once")
+        self.options.declare("use_cs", default=False, types=bool,
+                             desc="Compute partials with complex step instead of analytically")
+
+    @abstractmethod
+    def _ladder(self):
+        pass
+
+    def _declare_ladder_partials(self):
+        ar = np.arange(self.options['num_nodes'])
+        if self.options['use_cs']:
+            self.declare_partials('*', '*', rows=ar, cols=ar, method='cs')
+            return
+
+        temperatures, resistances, losses = self._ladder()
+        n = len(temperatures)
+        for i, T in enumerate(temperatures):
+            if losses[i] is not None:
+                self.declare_partials(T, losses[i], rows=ar, cols=ar, val=1.0)
+
+            wrt = [T, resistances[i]]
+            if i > 0:
+                wrt += [temperatures[i-1], resistances[i-1]]
+            wrt.append(temperatures[i+1] if i < n-1 else 'temperature_ambient')
+            self.declare_partials(T, wrt, rows=ar, cols=ar)
+
+    def _solve_ladder(self, resistances, injections):
+        """
+        Temperature rise of every node above ambient, given the heat
+        `injections` at each node
+        """
+        flows = np.cumsum(injections, axis=0)
+        drops = resistances * flows
+        return np.cumsum(drops[::-1], axis=0)[::-1]
+
+    def _gather(self, inputs):
+        temperatures, resistances, losses = self._ladder()
+        R = np.array([inputs[name] for name in resistances])
+        Q = np.array([np.zeros_like(inputs['temperature_ambient']) if name is None
+                      else inputs[name] for name in losses])
+        return temperatures, R, Q
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        temperatures, R, Q = self._gather(inputs)
+        T = np.array([outputs[name] for name in temperatures] +
+                     [inputs['temperature_ambient']])
+
+        flows = (T[:-1] - T[1:]) / R
+        for i, name in enumerate(temperatures):
+            residuals[name] = Q[i] - flows[i]
+            if i > 0:
+                residuals[name] += flows[i-1]
+
+    def solve_nonlinear(self, inputs, outputs):
+        temperatures, R, Q = self._gather(inputs)
+        rise = self._solve_ladder(R, Q)
+        for i, name in enumerate(temperatures):
+            outputs[name] = inputs['temperature_ambient'] + rise[i]
+
+    def guess_nonlinear(self, inputs, outputs, residuals):
+        self.solve_nonlinear(inputs, outputs)
+
+    def linearize(self, inputs, outputs, partials):
+        temperatures, resistances, _ = self._ladder()
+        R = np.array([inputs[name] for name in resistances])
+        self._resistances = R
+        if self.options['use_cs']:
+            return
+
+        T = np.array([outputs[name] for name in temperatures] +
+                     [inputs['temperature_ambient']])
+        n = len(temperatures)
+        for i, name in enumerate(temperatures):
+            below = temperatures[i+1] if i < n-1 else 'temperature_ambient'
+            partials[name, below] = 1 / R[i]
+            partials[name, resistances[i]] = (T[i] - T[i+1]) / R[i]**2
+            if i > 0:
+                partials[name, name] = -1 / R[i-1] - 1 / R[i]
+                partials[name, temperatures[i-1]] = 1 / R[i-1]
+                partials[name, resistances[i-1]] = -(T[i-1] - T[i]) / R[i-1]**2
+            else:
+                partials[name, name] = -1 / R[i]
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        # The Jacobian with respect to the temperatures is the negative of the
+        # (symmetric) conductance matrix of the ladder, so the same direct solve
+        # is used in both modes
+        temperatures, _, _ = self._ladder()
+        if mode == 'fwd':
+            rhs = np.array([d_residuals[name] for name in temperatures])
+            solution = -self._solve_ladder(self._resistances, rhs)
+            for i, name in enumerate(temperatures):
+                d_outputs[name] = solution[i]
+        else:
+            rhs = np.array([d_outputs[name] for name in temperatures])
+            solution = -self._solve_ladder(self._resistances, rhs)
+            for i, name in enumerate(temperatures):
+                d_residuals[name] = solution[i]
+
+
+class MOSFETThermalNetwork(_ThermalLadder):
     def setup(self):
-        self.add_input("P_loss", units='W',
+        nn = self.options['num_nodes']
+
+        self.add_input("P_loss", shape=nn, units='W',
                        desc="The conduction and switching losses for a single switch")
 
-        self.add_input("resistance_junction_to_case", units='K/W',
+        self.add_input("resistance_junction_to_case", shape=nn, units='K/W',
                        desc="Thermal resistance between the MOSFET junction and case")
 
-        self.add_input("resistance_case_to_sink", units='K/W',
+        self.add_input("resistance_case_to_sink", shape=nn, units='K/W',
                        desc="Thermal resistance between the MOSFET case and heatsink")
 
-        self.add_input("resistance_sink_to_air", units='K/W',
+        self.add_input("resistance_sink_to_air", shape=nn, units='K/W',
                        desc="Thermal resistance between the heatsink and ambient air")
 
-        self.add_input("temperature_ambient", units='K',
+        self.add_input("temperature_ambient", shape=nn, units='K',
                        desc="Temperature of the ambient air at the heatsink")
 
-        self.add_output("temperature_junction", units='K',
+        self.add_output("temperature_junction", shape=nn, units='K',
                         desc="Temperature at the MOSFET junction")
-        self.add_output("temperature_case", units='K',
+        self.add_output("temperature_case", shape=nn, units='K',
                         desc="Temperature at the MOSFET case")
-        self.add_output("temperature_sink", units='K',
+        self.add_output("temperature_sink", shape=nn, units='K',
                         desc="Temperature at the heatsink")
 
-        self.declare_partials('*', '*', method='cs')
-
-    def apply_nonlinear(self, inputs, outputs, residuals):
-        Q = inputs['P_loss']
-        R_jc = inputs['resistance_junction_to_case']
-        R_cs = inputs['resistance_case_to_sink']
-        R_sa = inputs['resistance_sink_to_air']
-
-        T_j = outputs['temperature_junction']
-        T_c = outputs['temperature_case']
-        T_s = outputs['temperature_sink']
-        T_a = inputs['temperature_ambient']
+        self._declare_ladder_partials()
 
-        residuals['temperature_junction'] = Q - (T_j - T_c) / R_jc
-        residuals['temperature_case'] = (T_c - T_j) / R_jc - (T_c - T_s) / R_cs
-        residuals['temperature_sink'] = (T_s - T_c) / R_cs - (T_s - T_a) / R_sa
+    def _ladder(self):
+        return (['temperature_junction', 'temperature_case', 'temperature_sink'],
+                ['resistance_junction_to_case',
+                 'resistance_case_to_sink',
+                 'resistance_sink_to_air'],
+                ['P_loss', None, None])
 
 
-class DCLinkCapacitorThermalNetwork(om.ImplicitComponent):
+class DCLinkCapacitorThermalNetwork(_ThermalLadder):
     def initialize(self):
+        super().initialize()
         self.options.declare("heatsink", default=False, types=bool,
                              desc="Indicates if the DC Capacitor is connected to a heatsink")
 
     def setup(self):
-        self.add_input("P_loss", units='W',
+        nn = self.options['num_nodes']
+
+        self.add_input("P_loss", shape=nn, units='W',
                        desc="Losses in a single capacitor due to the current ripple it experiences")
 
-        self.add_input("resistance_hotspot_to_case", units='K/W',
+        self.add_input("resistance_hotspot_to_case", shape=nn, units='K/W',
                        desc="Thermal resistance between the capacitor hotspot and case")
 
         heatsink = self.options['heatsink']
         if heatsink:
-            self.add_input("resistance_case_to_sink", units='K/W',
+            self.add_input("resistance_case_to_sink", shape=nn, units='K/W',
                            desc="Thermal resistance between the capacitor case and heatsink")
 
-            self.add_input("resistance_sink_to_air", units='K/W',
+            self.add_input("resistance_sink_to_air", shape=nn, units='K/W',
                            desc="Thermal resistance between the heatsink and ambient air")
         else:
-            self.add_input("resistance_case_to_air", units='K/W',
+            self.add_input("resistance_case_to_air", shape=nn, units='K/W',
                            desc="Thermal resistance between the capacitor case and heatsink")
 
-        self.add_input("temperature_ambient", units='K',
+        self.add_input("temperature_ambient", shape=nn, units='K',
                        desc="Temperature of the ambient air at the heatsink")
 
-        self.add_output("temperature_hotspot", units='K',
+        self.add_output("temperature_hotspot", shape=nn, units='K',
                         desc="Temperature at the capacitor junction")
-        self.add_output("temperature_case", units='K',
+        self.add_output("temperature_case", shape=nn, units='K',
                         desc="Temperature at the capacitor case")
 
         if heatsink:
-            self.add_output("temperature_sink", units='K',
+            self.add_output("temperature_sink", shape=nn, units='K',
                             desc="Temperature at the heatsink")
 
-        self.declare_partials('*', '*', method='cs')
-
-    def apply_nonlinear(self, inputs, outputs, residuals):
-        heatsink = self.options['heatsink']
-        Q = inputs['P_loss']
-        R_hc = inputs['resistance_hotspot_to_case']
-        if heatsink:
-            R_cs = inputs['resistance_case_to_sink']
-            R_sa = inputs['resistance_sink_to_air']
-        else:
-            R_ca = inputs['resistance_case_to_air']
-
-        T_h = outputs['temperature_hotspot']
-        T_c = outputs['temperature_case']
+        self._declare_ladder_partials()
 
-        if heatsink:
-            T_s = outputs['temperature_sink']
-        T_a = inputs['temperature_ambient']
-
-        residuals['temperature_hotspot'] = Q - (T_h - T_c) / R_hc
+    def _ladder(self):
+        if self.options['heatsink']:
+            return (['temperature_hotspot', 'temperature_case', 'temperature_sink'],
+                    ['resistance_hotspot_to_case',
+                     'resistance_case_to_sink',
+                     'resistance_sink_to_air'],
+                    ['P_loss', None, None])
+        return (['temperature_hotspot', 'temperature_case'],
+                ['resistance_hotspot_to_case', 'resistance_case_to_air'],
+                ['P_loss', None])
 
-        if heatsink:
-            residuals['temperature_case'] = (
-                T_c - T_h) / R_hc - (T_c - T_s) / R_cs
-            residuals['temperature_sink'] = (
-                T_s - T_c) / R_cs - (T_s - T_a) / R_sa
-        else:
-            residuals['temperature_case'] = (
-                T_c - T_h) / R_hc - (T_c - T_a) / R_ca
 
-
-class ACFilterInductorThermalNetwork(om.ImplicitComponent):
+class ACFilterInductorThermalNetwork(_ThermalLadder):
     def setup(self):
-        self.add_input("P_loss_core", units='W',
+        nn = self.options['num_nodes']
+
+        self.add_input("P_loss_core", shape=nn, units='W',
                        desc="The core losses in a single inductor")
-        self.add_input("P_loss_copper", units='W',
+        self.add_input("P_loss_copper", shape=nn, units='W',
                        desc="The copper losses in a single inductor")
 
-        self.add_input("resistance_core_to_windings", units='K/W',
+        self.add_input("resistance_core_to_windings", shape=nn, units='K/W',
                        desc="Thermal resistance between the inductor core and windings")
 
-        self.add_input("resistance_windings_to_sink", units='K/W',
+        self.add_input("resistance_windings_to_sink", shape=nn, units='K/W',
                        desc="Thermal resistance between the inductor windings and heatsink")
 
-        self.add_input("resistance_sink_to_air", units='K/W',
+        self.add_input("resistance_sink_to_air", shape=nn, units='K/W',
                        desc="Thermal resistance between the heatsink and ambient air")
 
-        self.add_input("temperature_ambient", units='K',
+        self.add_input("temperature_ambient", shape=nn, units='K',
                        desc="Temperature of the ambient air at the heatsink")
 
-        self.add_output("temperature_core", units='K',
+        self.add_output("temperature_core", shape=nn, units='K',
                         desc="Temperature at the inductor core")
-        self.add_output("temperature_windings", units='K',
+        self.add_output("temperature_windings", shape=nn, units='K',
                         desc="Temperature at the inductor windings")
-        self.add_output("temperature_sink", units='K',
+        self.add_output("temperature_sink", shape=nn, units='K',
                         desc="Temperature at the heatsink")
 
-        self.declare_partials('*', '*', method='cs')
+        self._declare_ladder_partials()
 
-    def apply_nonlinear(self, inputs, outputs, residuals):
-        Q_core = inputs['P_loss_core']
-        Q_copper = inputs['P_loss_copper']
-        R_cw = inputs['resistance_core_to_windings']
-        R_ws = inputs['resistance_windings_to_sink']
-        R_sa = inputs['resistance_sink_to_air']
-
-        T_c = outputs['temperature_core']
-        T_w = outputs['temperature_windings']
-        T_s = outputs['temperature_sink']
-        T_a = inputs['temperature_ambient']
-
-        residuals['temperature_core'] = Q_core - (T_c - T_w) / R_cw
-        residuals['temperature_windings'] = Q_copper - \
-            (T_c - T_w) / R_cw - (T_w - T_s) / R_ws
-        residuals['temperature_sink'] = - \
-            (T_w - T_s) / R_ws - (T_s - T_a) / R_sa
+    def _ladder(self):
+        return (['temperature_core', 'temperature_windings', 'temperature_sink'],
+                ['resistance_core_to_windings',
+                 'resistance_windings_to_sink',
+                 'resistance_sink_to_air'],
+                ['P_loss_core', 'P_loss_copper', None])
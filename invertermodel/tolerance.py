@@ -0,0 +1,289 @@
+import time
+
+import numpy as np
+from scipy.stats import norm, qmc
+
+from .analysis import baseline_design, run_analysis, set_values, setup_inverter_problem
+
+
+# Manufacturing and datasheet tolerances of the baseline design, as
+# (distribution, relative spread) by promoted input name. The spread is the
+# half width of a 'uniform' distribution and the standard deviation of a
+# 'normal' one, both relative to the nominal value.
+default_tolerances = {
+    'dc_link_cap.C': ('uniform', 0.1),
+    'mosfet.R_ds_on': ('normal', 0.05),
+    'mosfet.Q_rr': ('normal', 0.1),
+    'ac_filter_inductor.mu_r': ('uniform', 0.08),
+    'ac_filter_inductor.resistivity': ('uniform', 0.02),
+}
+
+# Outputs whose statistics are tracked, the temperatures only exist with the
+# Inverter's `thermal` option
+tolerance_outputs = ('efficiency', 'V_ripple', 'I_ripple')
+temperature_outputs = ('mosfet_thermal.temperature_junction',
+                       'inductor_thermal.temperature_windings',
+                       'dc_link_cap_thermal.temperature_hotspot')
+
+
+def perturb(nominal, tolerances, unit_samples):
+    """
+    Map samples of the unit hypercube, one column per entry of `tolerances`,
+    to values of the toleranced inputs around their `nominal` values
+
+    Returns
+    -------
+    dict
+        Columns of sampled values keyed by input name
+    """
+    # Keep the normal quantiles finite at the edges of the hypercube
+    unit_samples = np.clip(unit_samples, 1e-12, 1 - 1e-12)
+
+    samples = {}
+    for i, (name, (distribution, spread)) in enumerate(tolerances.items()):
+        if distribution == 'uniform':
+            deviation = spread * (2 * unit_samples[:, i] - 1)
+        elif distribution == 'normal':
+            deviation = spread * norm.ppf(unit_samples[:, i])
+        else:
+            raise ValueError(f"Unknown distribution '{distribution}' of '{name}', "
+                             "expected 'uniform' or 'normal'")
+        samples[name] = np.asarray(nominal[name], dtype=float) * (1 + deviation)
+    return samples
+
+
+class _QuantileSketch:
+    """
+    Fixed-size summary of a stream of values, for approximate quantiles.
+
+    The stream is held as at most `size` weighted centroids. Each update merges
+    the new values into the sorted centroids and, if there are too many,
+    groups neighbours into `size` buckets of equal total weight, so the rank
+    error of a quantile is of the order of 1 / size.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        values = np.concatenate([self.values, values])
+        weights = np.concatenate([self.weights, np.ones(values.size - self.values.size)])
+        order = np.argsort(values, kind='stable')
+        values = values[order]
+        weights = weights[order]
+
+        if values.size > self.size:
+            cumulative = np.cumsum(weights)
+            bucket = ((cumulative - weights) / cumulative[-1] * self.size).astype(int)
+            bucket = np.minimum(bucket, self.size - 1)
+            weights_sum = np.bincount(bucket, weights, minlength=self.size)
+            values_sum = np.bincount(bucket, weights * values, minlength=self.size)
+            kept = weights_sum > 0
+            values = values_sum[kept] / weights_sum[kept]
+            weights = weights_sum[kept]
+
+        self.values = values
+        self.weights = weights
+
+    def quantile(self, q):
+        cumulative = np.cumsum(self.weights)
+        total = cumulative[-1]
+        # Each centroid sits at the middle of the ranks it stands for, the
+        # extremes at the ends
+        ranks = np.concatenate([[0.0], cumulative - 0.5 * self.weights, [total]])
+        values = np.concatenate([[self.min], self.values, [self.max]])
+        return np.interp(np.asarray(q) * total, ranks, values)
+
+
+class StreamingStatistics:
+    """
+    Mean, variance, extremes and quantiles of several streams of values,
+    updated batch by batch without storing the values.
+
+    The mean and variance are merged across batches with Chan et al.'s
+    parallel form of Welford's algorithm, and the quantiles come from a
+    `sketch_size` quantile sketch per stream.
+
+    Parameters
+    ----------
+    names : iterable of str
+        Names of the streams
+    quantiles : iterable of float
+        Probabilities of the quantiles reported by `summary`
+    sketch_size : int
+        Number of centroids kept per stream for the quantiles
+    """
+
+    def __init__(self, names, quantiles=(0.01, 0.5, 0.99), sketch_size=1000):
+        self.names = tuple(names)
+        self.quantiles = tuple(quantiles)
+        self.count = 0
+        self._mean = {name: 0.0 for name in self.names}
+        self._m2 = {name: 0.0 for name in self.names}
+        self._sketches = {name: _QuantileSketch(sketch_size) for name in self.names}
+
+    def update(self, batch):
+        """
+        Add a batch of values, a dict of equally sized arrays by stream name
+        """
+        n_batch = len(batch[self.names[0]])
+        if n_batch == 0:
+            return
+        n = self.count + n_batch
+        for name in self.names:
+            values = np.asarray(batch[name], dtype=float)
+            batch_mean = values.mean()
+            batch_m2 = np.sum((values - batch_mean)**2)
+            delta = batch_mean - self._mean[name]
+            self._mean[name] += delta * n_batch / n
+            self._m2[name] += batch_m2 + delta**2 * self.count * n_batch / n
+            self._sketches[name].update(values)
+        self.count = n
+
+    def mean(self, name):
+        return self._mean[name]
+
+    def variance(self, name):
+        """
+        Unbiased sample variance
+        """
+        return self._m2[name] / (self.count - 1) if self.count > 1 else np.nan
+
+    def std(self, name):
+        return np.sqrt(self.variance(name))
+
+    def quantile(self, name, q):
+        return self._sketches[name].quantile(q)
+
+    def summary(self):
+        """
+        Statistics of every stream, as a dict of dicts by stream name
+        """
+        return {name: {'mean': self.mean(name),
+                       'std': self.std(name),
+                       'min': self._sketches[name].min,
+                       'max': self._sketches[name].max,
+                       'quantiles': dict(zip(self.quantiles,
+                                             self.quantile(name, self.quantiles)))}
+                for name in self.names}
+
+
+class ToleranceAnalysis:
+    """
+    Monte Carlo propagation of manufacturing and datasheet tolerances through
+    an Inverter design.
+
+    The toleranced inputs are sampled with a scrambled Sobol sequence and
+    evaluated `batch_size` samples at a time by a single Problem with
+    `num_nodes=batch_size`, set up once and reused for every batch and every
+    design. Only the running statistics of the outputs are kept.
+
+    Parameters
+    ----------
+    design : dict, optional
+        Nominal values of the Inverter inputs, defaults to
+        `analysis.baseline_design`
+    tolerances : dict
+        (distribution, relative spread) by toleranced input, see
+        `default_tolerances`
+    outputs : iterable of str, optional
+        Outputs whose statistics are tracked, defaults to `tolerance_outputs`
+        along with the `temperature_outputs` of a `thermal` Inverter
+    batch_size : int
+        Number of samples evaluated per run of the model, a power of two keeps
+        the Sobol sequence balanced
+    **inverter_options
+        Options passed to the Inverter group
+    """
+
+    def __init__(self, design=None, tolerances=default_tolerances, outputs=None,
+                 batch_size=1024, **inverter_options):
+        self.design = baseline_design if design is None else design
+        self.tolerances = tolerances
+        if outputs is None:
+            outputs = tolerance_outputs
+            if inverter_options.get('thermal', False):
+                outputs += tuple(name for name in temperature_outputs
+                                 if inverter_options.get('use_filter_inductor', True)
+                                 or not name.startswith('inductor_thermal.'))
+        self.outputs = tuple(outputs)
+        self.batch_size = batch_size
+        self.prob = setup_inverter_problem(num_nodes=batch_size, values=self.design,
+                                           **inverter_options)
+
+    def run(self, design=None, max_samples=2**16, min_samples=None, rtol=1e-3, atol=0.0,
+            z=3.0, quantiles=(0.01, 0.5, 0.99), sketch_size=1000, seed=None):
+        """
+        Sample the tolerances around `design` (defaults to the design of the
+        analysis) batch by batch, until the statistics have converged or
+        `max_samples` have been evaluated.
+
+        The run has converged once, for every output, the half width of the
+        `z` standard error confidence interval of the mean is within
+        `atol + rtol * |mean|`, and no quantile moved by more than that
+        tolerance over the last batch. The standard error is that of plain
+        Monte Carlo, which overestimates the error of the Sobol sequence.
+
+        Parameters
+        ----------
+        min_samples : int, optional
+            Number of samples evaluated before checking convergence, defaults
+            to two batches
+
+        Returns
+        -------
+        dict
+            'statistics' of every output (see `StreamingStatistics.summary`),
+            'n_samples' evaluated, 'n_infeasible' samples excluded from the
+            statistics, whether the run 'converged', and the 'elapsed' time
+        """
+        begin = time.perf_counter()
+        design = self.design if design is None else design
+        min_samples = 2 * self.batch_size if min_samples is None else min_samples
+
+        set_values(self.prob, design)
+        sampler = qmc.Sobol(d=len(self.tolerances), seed=seed)
+        statistics = StreamingStatistics(self.outputs, quantiles=quantiles,
+                                         sketch_size=sketch_size)
+
+        n_samples = 0
+        n_infeasible = 0
+        converged = False
+        previous = None
+        while n_samples < max_samples and not converged:
+            samples = perturb(design, self.tolerances, sampler.random(self.batch_size))
+            set_values(self.prob, samples)
+            feasible = run_analysis(self.prob)
+
+            statistics.update({name: self.prob.get_val(name)[feasible]
+                               for name in self.outputs})
+            n_samples += self.batch_size
+            n_infeasible += np.count_nonzero(~feasible)
+
+            if statistics.count == 0:
+                continue
+            current = {name: statistics.quantile(name, quantiles) for name in self.outputs}
+            if n_samples >= min_samples and previous is not None:
+                converged = all(self._converged(statistics, name, previous[name], current[name],
+                                                rtol, atol, z)
+                                for name in self.outputs)
+            previous = current
+
+        return {'statistics': statistics.summary(),
+                'n_samples': n_samples,
+                'n_infeasible': n_infeasible,
+                'converged': converged,
+                'elapsed': time.perf_counter() - begin}
+
+    @staticmethod
+    def _converged(statistics, name, previous, current, rtol, atol, z):
+        tol = atol + rtol * abs(statistics.mean(name))
+        half_width = z * statistics.std(name) / np.sqrt(statistics.count)
+        return half_width <= tol and np.all(np.abs(current - previous) <= tol)
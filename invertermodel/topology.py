@@ -0,0 +1,163 @@
+import itertools
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .analysis import baseline_design, optimization_errors, optimize, quiet, run_analysis, \
+    set_values, setup_inverter_problem, setup_optimization_problem
+
+
+# Outputs recorded for every configuration
+topology_outputs = ('efficiency', 'total_loss', 'mass', 'mosfet.P_loss', 'power_out')
+
+
+def configurations(n_phases=(3,), switches_per_phase=(2,)):
+    """
+    Every combination of the discrete Inverter inputs, as dicts of their
+    promoted names, in order of increasing number of switches
+    """
+    configs = [{'n_phases': n, 'mosfet.switches_per_phase': s}
+               for n, s in itertools.product(n_phases, switches_per_phase)]
+    return sorted(configs, key=lambda config: (_n_switches(config), config['n_phases']))
+
+
+def _n_switches(config):
+    return config['n_phases'] * config['mosfet.switches_per_phase']
+
+
+def dominates(config, other):
+    """
+    True if the losses and mass of `other` are at least those of `config` at
+    every design, so that the best design of `other` can be no better.
+
+    The MOSFET losses of the Inverter scale with the number of switches and
+    the filter inductor losses with the number of phases, while the rest of
+    the model is independent of both, so a configuration with at least as
+    many phases and switches per phase is bounded below by `config`.
+    """
+    return config is not other and \
+        other['n_phases'] >= config['n_phases'] and \
+        other['mosfet.switches_per_phase'] >= config['mosfet.switches_per_phase']
+
+
+# Per-process state of the topology workers, so the Problem is only set up
+# once per worker rather than once per configuration
+_worker = {}
+
+
+def _init_worker(optimizing, driver, values, inverter_options):
+    values = baseline_design if values is None else values
+    if optimizing:
+        prob = quiet(setup_optimization_problem(driver=None if driver is None else driver(),
+                                                values=values, **inverter_options))
+    else:
+        prob = setup_inverter_problem(values=values, **inverter_options)
+    _worker.update(prob=prob, optimize=optimizing, values=values)
+
+
+def _evaluate(config):
+    begin = time.perf_counter()
+    prob = _worker['prob']
+    set_values(prob, _worker['values'])
+    set_values(prob, config)
+
+    result = {'config': config, 'pid': os.getpid()}
+    if _worker['optimize']:
+        prob.set_val('modulation_index_slack', 0.9)
+        success = optimize(prob, result)
+    else:
+        try:
+            success = run_analysis(prob)[0]
+        except optimization_errors as error:
+            success = False
+            result['error'] = repr(error)
+
+    result['success'] = bool(success)
+    for name in topology_outputs:
+        result[name] = float(prob.get_val(name)[0])
+    if _worker['optimize']:
+        result['design'] = {name: prob.get_val(name).copy()
+                            for name in prob.model.get_design_vars()}
+    result['elapsed'] = time.perf_counter() - begin
+    return result
+
+
+def enumerate_topologies(n_phases=(3,), switches_per_phase=(2,), optimize=True,
+                         driver=None, values=None, max_workers=None, prune=True,
+                         **inverter_options):
+    """
+    Evaluate, or optimize, the Inverter for every combination of `n_phases`
+    and `switches_per_phase` concurrently on a pool of worker processes, and
+    rank them by efficiency.
+
+    Configurations are dispatched in order of increasing number of switches.
+    Once a configuration has been evaluated successfully, every pending
+    configuration it `dominates` is pruned without being run, since its
+    efficiency can be no higher.
+
+    Parameters
+    ----------
+    n_phases, switches_per_phase : iterable of int
+        Values of the discrete inputs to combine
+    optimize : bool
+        Run the efficiency maximization of
+        analysis.setup_optimization_problem for each configuration, rather
+        than analyze the design in `values`
+    driver : callable, optional
+        Picklable factory of the driver of the optimizations, defaults to
+        SLSQP
+    values : dict, optional
+        Values of the Inverter inputs, or the starting design of the
+        optimizations, defaults to `analysis.baseline_design`
+    max_workers : int, optional
+        Number of worker processes, defaults to the number of CPUs
+    prune : bool
+        Skip the configurations dominated by one already evaluated
+
+    Returns
+    -------
+    list of dict
+        One entry per configuration, ranked by decreasing efficiency with the
+        failed and pruned ones last. Each holds the 'config', its 'status'
+        ('evaluated', 'failed' or 'pruned'), its 'rank', and for the
+        configurations run, 'success' and the `topology_outputs`. Pruned
+        entries name the configuration that dominated them under
+        'dominated_by'.
+    """
+    pending = configurations(n_phases, switches_per_phase)
+    max_workers = min(max_workers or os.cpu_count(), len(pending))
+
+    results = []
+    pruned = []
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             initializer=_init_worker,
+                             initargs=(optimize, driver, values,
+                                       inverter_options)) as executor:
+        # Keep at most one configuration per worker in flight, so that those
+        # still queued can be pruned as results come in
+        running = set()
+        while pending or running:
+            while pending and len(running) < max_workers:
+                running.add(executor.submit(_evaluate, pending.pop(0)))
+
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results.append(result)
+                if not (prune and result['success']):
+                    continue
+                for config in [config for config in pending
+                               if dominates(result['config'], config)]:
+                    pending.remove(config)
+                    pruned.append({'config': config,
+                                   'status': 'pruned',
+                                   'dominated_by': result['config']})
+
+    for result in results:
+        result['status'] = 'evaluated' if result['success'] else 'failed'
+    ranking = sorted(results,
+                     key=lambda result: (not result['success'], -result['efficiency']))
+    ranking += sorted(pruned, key=lambda entry: _n_switches(entry['config']))
+    for rank, entry in enumerate(ranking, start=1):
+        entry['rank'] = rank
+    return ranking
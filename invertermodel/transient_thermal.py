@@ -0,0 +1,501 @@
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+from scipy.linalg import expm
+from scipy.signal import lfilter
+
+import openmdao.api as om
+
+
+def _as_loss_columns(array, columns=None):
+    """
+    Return a (n, n_losses) float array from a chunk of loss data, which is
+    either a structured array whose `columns` are the losses or a plain 1D or 2D
+    array
+    """
+    if array.dtype.names is not None:
+        if columns is None:
+            raise ValueError("The columns holding the losses must be given for "
+                             "structured loss profiles")
+        return np.column_stack([np.asarray(array[name], dtype=float)
+                                for name in columns])
+
+    array = np.asarray(array, dtype=float)
+    if array.ndim == 1:
+        array = array.reshape(-1, 1)
+    if columns is not None:
+        array = array[:, columns]
+    return array
+
+
+def iter_losses(losses, chunk_size, columns=None):
+    """
+    Lazily read a loss profile in chunks of at most `chunk_size` time steps.
+
+    Parameters
+    ----------
+    losses : str, os.PathLike, ndarray, or iterable
+        Either a path to a .npy file (opened memory-mapped), an array (including
+        np.memmap) with one row per time step, or an iterable yielding blocks of
+        rows
+    chunk_size : int
+    columns : list, optional
+        Field names (structured arrays, e.g. the output of
+        `DriveCycleRunner.run`) or column indices of the losses
+
+    Yields
+    ------
+    ndarray
+        (n, n_losses) array of losses with n <= chunk_size
+    """
+    if isinstance(losses, (str, os.PathLike)):
+        losses = np.load(losses, mmap_mode='r')
+
+    blocks = [losses] if isinstance(losses, np.ndarray) else losses
+    for block in blocks:
+        block = np.asarray(block)
+        for start in range(0, block.shape[0], chunk_size):
+            yield _as_loss_columns(block[start:start + chunk_size], columns)
+
+
+def cauer_system(resistances, capacitances, injections, scales=None):
+    """
+    Conductance matrix, node capacitances and loss injection matrix of a Cauer
+    ladder: node i is connected to node i+1 through resistances[i], the last
+    node is connected to ambient, and every node has a thermal capacitance to
+    ambient
+
+    Parameters
+    ----------
+    resistances, capacitances : ndarray
+        Per node values, ordered from the hottest node towards ambient
+    injections : list of int
+        Node into which each loss is injected
+    scales : ndarray, optional
+        Factor applied to each loss, defaults to 1
+    """
+    n = len(resistances)
+    g = 1 / resistances
+    i = np.arange(n)
+
+    G = np.zeros((n, n), dtype=g.dtype)
+    G[i, i] = g
+    G[i[1:], i[1:]] += g[:-1]
+    G[i[:-1], i[1:]] = -g[:-1]
+    G[i[1:], i[:-1]] = -g[:-1]
+
+    scales = np.ones(len(injections)) if scales is None else scales
+    B = np.zeros((n, len(injections)), dtype=scales.dtype)
+    B[injections, np.arange(len(injections))] = scales
+    return G, capacitances, B
+
+
+def foster_system(resistances, time_constants, scale=1.0):
+    """
+    Conductance matrix, capacitances and loss injection matrix of a Foster
+    network, a chain of parallel RC pairs, with the loss multiplied by
+    `scale`. Only the sum of the temperature rises across the pairs is
+    physical.
+    """
+    G = np.diag(1 / resistances)
+    return G, time_constants / resistances, np.full((len(resistances), 1), scale)
+
+
+def _discretize(G, c, B, dt):
+    """
+    Exact zero-order-hold discretization of diag(c) dθ/dt = -G θ + B q, with
+    the Van Loan block matrix exponential
+    """
+    n, m = B.shape
+    M = np.zeros((n + m, n + m), dtype=np.result_type(G, c, B))
+    M[:n, :n] = -G / c[:, None]
+    M[:n, n:] = B / c[:, None]
+    E = expm(M * dt)
+    return E[:n, :n], E[:n, n:]
+
+
+class ExponentialIntegrator:
+    """
+    Exact time integrator of the linear thermal network
+
+        diag(c) dθ/dt = -G θ + B q,
+
+    where θ are the temperature rises above ambient and the losses q are
+    constant over each time step of length `dt`. With G symmetric, the network
+    is decoupled into independent first order modes by the eigendecomposition
+    of diag(c)^-1/2 G diag(c)^-1/2 (i.e. the Cauer network is converted to its
+    Foster equivalent), and each mode is advanced with its exact exponential
+    update, run over a whole chunk of time steps at once as a first order IIR
+    filter.
+
+    If `gradients` is True, the sensitivities of θ to the network parameters
+    are integrated alongside, by exactly differentiating the discrete update
+        θ_k = Φ θ_{k-1} + Γ q_k
+    with dΦ/dp and dΓ/dp found by complex step.
+
+    Parameters
+    ----------
+    system : callable
+        Maps the parameter vector to (G, c, B), must be complex-step safe
+    params : array_like
+        Network parameters
+    dt : float
+        Time step (s)
+    output_matrix : ndarray, optional
+        Maps the node temperature rises to the output temperature rises,
+        defaults to every node
+    gradients : bool
+        Integrate the sensitivities to `params`
+    """
+
+    def __init__(self, system, params, dt, output_matrix=None, gradients=False):
+        params = np.asarray(params, dtype=float)
+        G, c, B = system(params)
+        n = G.shape[0]
+
+        scale = 1 / np.sqrt(c)
+        rates, V = np.linalg.eigh(scale[:, None] * G * scale[None, :])
+        self.decay = np.exp(-rates * dt)
+        self._modes_to_nodes = scale[:, None] * V
+        self._nodes_to_modes = V.T / scale[None, :]
+        self._input = ((1 - self.decay) / rates)[:, None] * \
+            (V.T @ (scale[:, None] * B))
+
+        self.output_matrix = np.eye(n) if output_matrix is None \
+            else np.asarray(output_matrix, dtype=float)
+        self.gradients = gradients
+
+        self._z = np.zeros(n)
+        self._theta = np.zeros(n)
+        if gradients:
+            h = 1e-40
+            dPhi = np.empty((params.size, n, n))
+            dGamma = np.empty((params.size,) + B.shape)
+            for i in range(params.size):
+                perturbed = params.astype(complex)
+                perturbed[i] += 1j * h
+                Phi, Gamma = _discretize(*system(perturbed), dt)
+                dPhi[i] = Phi.imag / h
+                dGamma[i] = Gamma.imag / h
+            self._dPhi = dPhi
+            self._dGamma = dGamma
+            self._dz = np.zeros((params.size, n))
+
+    def _filter(self, u, z0):
+        """
+        Run z_k = decay * z_{k-1} + u_k along axis -2 of `u`, for every mode
+        (axis -1) from the initial modal states `z0`
+        """
+        z = np.empty_like(u)
+        for m, decay in enumerate(self.decay):
+            z[..., m], _ = lfilter([1.0], [1.0, -decay], u[..., m], axis=-1,
+                                   zi=decay * z0[..., m:m+1])
+        return z
+
+    def step(self, losses):
+        """
+        Advance the network over a chunk of time steps
+
+        Parameters
+        ----------
+        losses : ndarray
+            (n_steps, n_losses) losses over each time step
+
+        Returns
+        -------
+        rise : ndarray
+            (n_steps, n_outputs) output temperature rises at the end of each
+            time step
+        sensitivity : ndarray or None
+            (n_params, n_steps, n_outputs) derivatives of `rise` with respect
+            to the parameters
+        """
+        z = self._filter(losses @ self._input.T, self._z)
+        theta = z @ self._modes_to_nodes.T
+
+        sensitivity = None
+        if self.gradients:
+            theta_prev = np.concatenate([self._theta[None, :], theta[:-1]])
+            forcing = theta_prev @ self._dPhi.transpose(0, 2, 1) + \
+                losses @ self._dGamma.transpose(0, 2, 1)
+            dz = self._filter(forcing @ self._nodes_to_modes.T, self._dz)
+            self._dz = dz[:, -1]
+            sensitivity = dz @ (self.output_matrix @ self._modes_to_nodes).T
+
+        self._z = z[-1]
+        self._theta = theta[-1]
+        return theta @ self.output_matrix.T, sensitivity
+
+    def peaks(self, chunks):
+        """
+        Integrate over every chunk of losses from `chunks`, keeping only the
+        peak of each output temperature rise
+
+        Returns
+        -------
+        peak : ndarray
+            Peak temperature rise of each output
+        index : ndarray
+            Time step at which each peak occurs
+        gradient : ndarray or None
+            (n_outputs, n_params) derivatives of the peaks with respect to the
+            parameters
+        """
+        n_outputs = self.output_matrix.shape[0]
+        peak = np.full(n_outputs, -np.inf)
+        index = np.zeros(n_outputs, dtype=int)
+        gradient = np.zeros((n_outputs, self._dz.shape[0])) \
+            if self.gradients else None
+
+        offset = 0
+        for losses in chunks:
+            rise, sensitivity = self.step(losses)
+            argmax = np.argmax(rise, axis=0)
+            chunk_peak = rise[argmax, np.arange(n_outputs)]
+            new = chunk_peak > peak
+            peak[new] = chunk_peak[new]
+            index[new] = offset + argmax[new]
+            if self.gradients:
+                for i in np.flatnonzero(new):
+                    gradient[i] = sensitivity[:, argmax[i], i]
+            offset += rise.shape[0]
+
+        return peak, index, gradient
+
+
+class _TransientThermalNetwork(om.ExplicitComponent, ABC):
+    """
+    Base class for components computing the peak temperatures of a thermal
+    network over a loss profile.
+
+    Subclasses add their parameter inputs in setup (in the order of the
+    parameter vector of `_system`) and call `_declare_network`. The peaks and
+    their gradients are found in a single pass over the profile in compute, and
+    reused by compute_partials.
+
+    The loss profile is an option, fixed at setup, but each loss is multiplied
+    by a `<loss>_scale` input (1 by default), the last parameters of
+    `_system`. Since the temperatures are linear in the losses, the peaks are
+    differentiable with respect to the scales. Connecting the ratio of a
+    design's loss to the loss the profile was computed at (e.g. P_loss over
+    its value at the reference design) gives the gradients of the peaks with
+    respect to the design variables that set the losses, for a profile whose
+    shape does not change with the design.
+    """
+
+    def initialize(self):
+        self.options.declare("losses",
+                             desc="Loss profile, see `transient_thermal.iter_losses`")
+        self.options.declare("dt", types=(int, float),
+                             desc="Time step of the loss profile (s)")
+        self.options.declare("columns", default=None, allow_none=True,
+                             desc="Field names or column indices of the losses in the profile")
+        self.options.declare("chunk_size", default=65536, types=int,
+                             desc="Number of time steps integrated at once")
+
+    def _declare_network(self, parameters, temperatures, losses):
+        self._temperatures = temperatures
+
+        scales = [f"{name}_scale" for name in losses]
+        for name in scales:
+            self.add_input(name, val=1.0,
+                           desc=f"Factor applied to the {name[:-6].replace('_', ' ')} profile")
+        self._parameters = parameters + scales
+
+        self.add_input("temperature_ambient", units='K',
+                       desc="Temperature of the ambient air at the heatsink")
+        for name in temperatures:
+            self.add_output(f"{name}_peak", units='K',
+                            desc=f"Peak of {name.replace('_', ' ')} over the profile")
+
+        peaks = [f"{name}_peak" for name in temperatures]
+        self.declare_partials(peaks, self._parameters)
+        self.declare_partials(peaks, "temperature_ambient", val=1.0)
+
+        self._result = None
+
+    @abstractmethod
+    def _system(self, params):
+        pass
+
+    def _output_matrix(self):
+        return None
+
+    def _integrate(self, inputs):
+        params = np.concatenate([np.atleast_1d(inputs[name])
+                                 for name in self._parameters])
+        if self._result is None or not np.array_equal(self._result[0], params):
+            integrator = ExponentialIntegrator(self._system, params,
+                                               self.options['dt'],
+                                               output_matrix=self._output_matrix(),
+                                               gradients=True)
+            chunks = iter_losses(self.options['losses'],
+                                 self.options['chunk_size'],
+                                 self.options['columns'])
+            self._result = (params,) + integrator.peaks(chunks)
+        return self._result[1:]
+
+    def compute(self, inputs, outputs):
+        peak, _, _ = self._integrate(inputs)
+        for i, name in enumerate(self._temperatures):
+            outputs[f"{name}_peak"] = inputs['temperature_ambient'] + peak[i]
+
+    def compute_partials(self, inputs, partials):
+        _, _, gradient = self._integrate(inputs)
+        for i, name in enumerate(self._temperatures):
+            start = 0
+            for parameter in self._parameters:
+                size = np.size(inputs[parameter])
+                partials[f"{name}_peak", parameter] = \
+                    gradient[i, start:start + size]
+                start += size
+
+
+class _TransientLadder(_TransientThermalNetwork):
+    """
+    Transient counterpart of `thermal._ThermalLadder`: a Cauer ladder with a
+    thermal capacitance at each node. Subclasses define `_ladder`, which returns
+    the temperatures, the resistance below and capacitance at each node, and the
+    loss injected at each node (or None).
+    """
+
+    @abstractmethod
+    def _ladder(self):
+        pass
+
+    def setup(self):
+        temperatures, resistances, capacitances, losses = self._ladder()
+        self._injections = [i for i, name in enumerate(losses) if name is not None]
+        self._declare_network(resistances + capacitances, temperatures,
+                              [name for name in losses if name is not None])
+
+    def _system(self, params):
+        n = len(self._temperatures)
+        return cauer_system(params[:n], params[n:2*n], self._injections, params[2*n:])
+
+
+class MOSFETTransientThermalNetwork(_TransientLadder):
+    def setup(self):
+        self.add_input("resistance_junction_to_case", units='K/W',
+                       desc="Thermal resistance between the MOSFET junction and case")
+        self.add_input("resistance_case_to_sink", units='K/W',
+                       desc="Thermal resistance between the MOSFET case and heatsink")
+        self.add_input("resistance_sink_to_air", units='K/W',
+                       desc="Thermal resistance between the heatsink and ambient air")
+
+        self.add_input("capacitance_junction", units='J/K',
+                       desc="Thermal capacitance of the MOSFET die")
+        self.add_input("capacitance_case", units='J/K',
+                       desc="Thermal capacitance of the MOSFET case")
+        self.add_input("capacitance_sink", units='J/K',
+                       desc="Thermal capacitance of the heatsink")
+
+        super().setup()
+
+    def _ladder(self):
+        return (['temperature_junction', 'temperature_case', 'temperature_sink'],
+                ['resistance_junction_to_case',
+                 'resistance_case_to_sink',
+                 'resistance_sink_to_air'],
+                ['capacitance_junction', 'capacitance_case', 'capacitance_sink'],
+                ['P_loss', None, None])
+
+
+class DCLinkCapacitorTransientThermalNetwork(_TransientLadder):
+    def initialize(self):
+        super().initialize()
+        self.options.declare("heatsink", default=False, types=bool,
+                             desc="Indicates if the DC Capacitor is connected to a heatsink")
+
+    def setup(self):
+        self.add_input("resistance_hotspot_to_case", units='K/W',
+                       desc="Thermal resistance between the capacitor hotspot and case")
+        if self.options['heatsink']:
+            self.add_input("resistance_case_to_sink", units='K/W',
+                           desc="Thermal resistance between the capacitor case and heatsink")
+            self.add_input("resistance_sink_to_air", units='K/W',
+                           desc="Thermal resistance between the heatsink and ambient air")
+        else:
+            self.add_input("resistance_case_to_air", units='K/W',
+                           desc="Thermal resistance between the capacitor case and ambient air")
+
+        self.add_input("capacitance_hotspot", units='J/K',
+                       desc="Thermal capacitance of the capacitor winding")
+        self.add_input("capacitance_case", units='J/K',
+                       desc="Thermal capacitance of the capacitor case")
+        if self.options['heatsink']:
+            self.add_input("capacitance_sink", units='J/K',
+                           desc="Thermal capacitance of the heatsink")
+
+        super().setup()
+
+    def _ladder(self):
+        if self.options['heatsink']:
+            return (['temperature_hotspot', 'temperature_case', 'temperature_sink'],
+                    ['resistance_hotspot_to_case',
+                     'resistance_case_to_sink',
+                     'resistance_sink_to_air'],
+                    ['capacitance_hotspot', 'capacitance_case', 'capacitance_sink'],
+                    ['P_loss', None, None])
+        return (['temperature_hotspot', 'temperature_case'],
+                ['resistance_hotspot_to_case', 'resistance_case_to_air'],
+                ['capacitance_hotspot', 'capacitance_case'],
+                ['P_loss', None])
+
+
+class ACFilterInductorTransientThermalNetwork(_TransientLadder):
+    def setup(self):
+        self.add_input("resistance_core_to_windings", units='K/W',
+                       desc="Thermal resistance between the inductor core and windings")
+        self.add_input("resistance_windings_to_sink", units='K/W',
+                       desc="Thermal resistance between the inductor windings and heatsink")
+        self.add_input("resistance_sink_to_air", units='K/W',
+                       desc="Thermal resistance between the heatsink and ambient air")
+
+        self.add_input("capacitance_core", units='J/K',
+                       desc="Thermal capacitance of the inductor core")
+        self.add_input("capacitance_windings", units='J/K',
+                       desc="Thermal capacitance of the inductor windings")
+        self.add_input("capacitance_sink", units='J/K',
+                       desc="Thermal capacitance of the heatsink")
+
+        super().setup()
+
+    def _ladder(self):
+        return (['temperature_core', 'temperature_windings', 'temperature_sink'],
+                ['resistance_core_to_windings',
+                 'resistance_windings_to_sink',
+                 'resistance_sink_to_air'],
+                ['capacitance_core', 'capacitance_windings', 'capacitance_sink'],
+                ['P_loss_core', 'P_loss_copper', None])
+
+
+class FosterThermalNetwork(_TransientThermalNetwork):
+    """
+    Junction temperature of a device described by the Foster network of its
+    datasheet transient thermal impedance,
+        Z(t) = sum_i R_i * (1 - exp(-t / tau_i))
+    """
+
+    def initialize(self):
+        super().initialize()
+        self.options.declare("n_terms", default=4, types=int,
+                             desc="Number of RC pairs in the Foster network")
+
+    def setup(self):
+        n_terms = self.options['n_terms']
+        self.add_input("resistance", shape=n_terms, units='K/W',
+                       desc="Thermal resistance of each RC pair")
+        self.add_input("time_constant", shape=n_terms, units='s',
+                       desc="Time constant of each RC pair")
+
+        self._declare_network(['resistance', 'time_constant'],
+                              ['temperature_junction'], ['P_loss'])
+
+    def _system(self, params):
+        n_terms = self.options['n_terms']
+        return foster_system(params[:n_terms], params[n_terms:2*n_terms], params[2*n_terms])
+
+    def _output_matrix(self):
+        return np.ones((1, self.options['n_terms']))
@@ -0,0 +1,207 @@
+import os
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+import openmdao.api as om
+
+from .analysis import baseline_design, optimize, set_values, setup_optimization_problem
+
+
+# Load parameters and operating point a converged design is indexed by
+default_keys = ('load_inductance',
+                'load_phase_back_emf',
+                'load_phase_resistance',
+                'electrical_frequency',
+                'bus_voltage')
+
+
+class WarmStartDatabase:
+    """
+    Persistent store of converged Inverter designs, indexed by the load
+    parameters and operating point they were optimized for, to seed the design
+    variables of a new optimization from the nearest stored solutions.
+
+    Distances are measured between the base 10 logarithms of the keys, so that
+    every key counts by its relative difference whatever its units. The store
+    is a single .npz file, read on first access and rewritten on every
+    `add`. The KD-tree over the keys is rebuilt lazily after an `add`.
+
+    Parameters
+    ----------
+    path : str, optional
+        .npz file of the store, created on the first `add`. Without a path the
+        store only lives in memory.
+    keys : tuple of str
+        Promoted names of the Inverter inputs the designs are indexed by, all
+        positive
+    """
+
+    def __init__(self, path=None, keys=default_keys):
+        self.path = path
+        self.keys = tuple(keys)
+        self._columns = None
+        self._tree = None
+
+    def _load(self):
+        if self._columns is not None:
+            return self._columns
+
+        columns = {}
+        if self.path is not None and os.path.exists(self.path):
+            with np.load(self.path) as data:
+                columns = {name: data[name] for name in data.files}
+            stored_keys = tuple(columns.pop('__keys__'))
+            if stored_keys != self.keys:
+                raise ValueError(f"Warm start database {self.path} is keyed on {stored_keys}, "
+                                 f"not {self.keys}")
+        self._columns = columns
+        return columns
+
+    def __len__(self):
+        columns = self._load()
+        return len(columns[self.keys[0]]) if columns else 0
+
+    def design_names(self):
+        """
+        Names of the stored design variables
+        """
+        return [name for name in self._load()
+                if name not in self.keys and name != 'efficiency']
+
+    def _points(self, key_values):
+        return np.log10(np.column_stack([np.asarray(key_values[name], dtype=float).ravel()
+                                         for name in self.keys]))
+
+    def _get_tree(self):
+        if self._tree is None:
+            self._tree = cKDTree(self._points(self._load()))
+        return self._tree
+
+    def add(self, key_values, design, efficiency=np.nan):
+        """
+        Store a converged `design` ({name: value} of its design variables),
+        indexed by `key_values` ({key: value}), and save the store
+        """
+        columns = self._load()
+        row = {name: float(np.ravel(key_values[name])[0]) for name in self.keys}
+        row.update({name: float(np.ravel(value)[0]) for name, value in design.items()})
+        row['efficiency'] = float(np.ravel(efficiency)[0])
+        if columns and set(row) != set(columns):
+            raise ValueError("Design variables differ from those stored: "
+                             f"{sorted(set(row) ^ set(columns))}")
+
+        for name, value in row.items():
+            columns[name] = np.append(columns.get(name, np.empty(0)), value)
+        self._tree = None
+
+        if self.path is not None:
+            # Write then rename, so that a crash never leaves a partial store
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'wb') as file:
+                np.savez(file, __keys__=np.array(self.keys), **columns)
+            os.replace(tmp_path, self.path)
+
+    def query(self, key_values, k=1):
+        """
+        The (at most) `k` stored designs nearest to `key_values`, nearest
+        first
+
+        Returns
+        -------
+        list of (distance, design, efficiency)
+        """
+        n_stored = len(self)
+        if n_stored == 0:
+            return []
+
+        k = min(k, n_stored)
+        distances, indices = self._get_tree().query(self._points(key_values)[0], k=k)
+        distances, indices = np.atleast_1d(distances), np.atleast_1d(indices)
+
+        columns = self._load()
+        names = self.design_names()
+        return [(float(distance),
+                 {name: columns[name][i] for name in names},
+                 float(columns['efficiency'][i]))
+                for distance, i in zip(distances, indices)]
+
+    def seed(self, prob, key_values=None):
+        """
+        Set the design variables of `prob` to the stored design nearest to
+        `key_values`, read from `prob` if not given
+
+        Returns
+        -------
+        float or None
+            Distance to the design used, None if the store is empty
+        """
+        if key_values is None:
+            key_values = {name: prob.get_val(name) for name in self.keys}
+        nearest = self.query(key_values)
+        if not nearest:
+            return None
+
+        distance, design, _ = nearest[0]
+        set_values(prob, design)
+        if 'modulation_index_slack' in design:
+            # The stored slack matched the stored load, start it from the
+            # modulation index of the new one instead
+            try:
+                prob.run_model()
+            except om.AnalysisError:
+                pass
+            else:
+                prob.set_val('modulation_index_slack',
+                             np.minimum(prob.get_val('modulation_index'), 1.0))
+        return distance
+
+
+def warm_started_optimize(database, values=None, prob=None, driver=None,
+                          **inverter_options):
+    """
+    Run the efficiency maximization of analysis.setup_optimization_problem for
+    the load of `values`, starting from the nearest design in `database`, and
+    add the optimum to `database` if it converges
+
+    Parameters
+    ----------
+    database : WarmStartDatabase
+    values : dict, optional
+        Values of the Inverter inputs, including the keys of `database`.
+        Defaults to `analysis.baseline_design`.
+    prob : Problem, optional
+        Problem from setup_optimization_problem to reuse, otherwise one is set
+        up with `driver` and `inverter_options`
+    driver : Driver, optional
+        Driver of the new problem, defaults to SLSQP
+
+    Returns
+    -------
+    dict
+        'success', 'iterations', 'efficiency', 'design' and 'distance' to the
+        seed design (None for a cold start)
+    """
+    values = baseline_design if values is None else values
+    if prob is None:
+        prob = setup_optimization_problem(driver=driver, values=values,
+                                          **inverter_options)
+    else:
+        set_values(prob, values)
+        prob.set_val('modulation_index_slack', 0.9)
+
+    distance = database.seed(prob)
+    success = optimize(prob)
+    iterations = prob.driver.result.iter_count
+
+    design = {name: prob.get_val(name).copy() for name in prob.model.get_design_vars()}
+    efficiency = prob.get_val('efficiency')[0]
+    if success:
+        database.add({name: prob.get_val(name) for name in database.keys},
+                     design, efficiency)
+
+    return {'success': success,
+            'iterations': iterations,
+            'efficiency': efficiency,
+            'design': design,
+            'distance': distance}
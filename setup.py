@@ -15,10 +15,14 @@ setup(name='invertermodel',
       packages=[
           'invertermodel',
       ],
+      package_data={
+          'invertermodel': ['data/*.csv', 'data/*.json'],
+      },
       python_requires=">=3.10",
       install_requires=[
           'numpy>=1.21.4',
-          'openmdao>=3.18.0',
+          'openmdao>=3.35.0',
+          'scipy>=1.7.0',
       ],
       classifiers=[
         "Programming Language :: Python"